@@ -0,0 +1,196 @@
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+import os
+
+from langchain_ollama import ChatOllama
+
+from agents.code_lookup import CodeLookupTool
+from agents.github_agent import GitHubMCPAgent
+from agents.github_exec_tool import GitHubExecTool
+from agents.orchestrator import Orchestrator
+from agents.rag import RAGAgent
+from utils.code_index import CodeIndex
+from utils.llm import build_chat_llm, warm_up
+from utils.query_analysis import extract_repository
+from utils.repo_snapshot import RepoSnapshotStore, SnapshotRefresher
+from utils.startup import StartupCoordinator
+
+
+LLM_MODEL = os.getenv("LLM_MODEL", "qwen2.5:7b-instruct-q4_0")
+# Modelo de embeddings (ver utils/embedding_backends.py); el índice de Pinecone se deriva del modelo y la dimensión
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-mpnet-base-v2")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+EMBEDDING_DIM = int(os.environ["EMBEDDING_DIM"]) if os.getenv("EMBEDDING_DIM") else None
+# Herramientas MCP que entran en el prompt del agente de GitHub por pregunta (0 = todas)
+GITHUB_AGENT_TOP_TOOLS = int(os.getenv("GITHUB_AGENT_TOP_TOOLS", "3"))
+# "direct": las preguntas que cubre un solo agente se le envían sin el bucle ReAct del orquestador
+ORCHESTRATOR_MODE = os.getenv("ORCHESTRATOR_MODE", "direct")
+# herramienta local lookup_code (índice de símbolos del código, ver utils/code_index.py)
+CODE_INDEX = os.getenv("CODE_INDEX", "1") != "0"
+ALLOWED_TOOLS = {
+    "list_pull_requests", "list_releases", "list_issues", "get_file_contents", "get_pull_request", "get_issue", "get_release_by_tag"
+}
+
+
+class Assistant:
+    """
+    Builds the whole stack once (LLM client, embedder, MCP session, GitHub and RAG agents,
+    orchestrator) and serves queries and README ingestion. Shared by app.py and api.py.
+    Components can be injected (e.g. a stub LLM or a recorded MCP session) instead of built.
+    """
+
+    def __init__(
+        self,
+        logger: Callable[[str], None] = print,
+        llm: Optional[Any] = None,
+        embedder: Optional[Any] = None,
+        vector_store: Optional[Any] = None,
+        github_agent: Optional[GitHubMCPAgent] = None,
+        code_index: Optional[CodeIndex] = None,
+        refresh_snapshots: bool = True,
+    ):
+        self.logger = logger
+        self.llm = llm
+        self.embedder = embedder
+        self.vector_store = vector_store
+        self.github_agent = github_agent
+        self.code_index = code_index
+        # False cuando otro componente (p. ej. agents/resource_manager.py) ya mantiene las instantáneas
+        self.refresh_snapshots = refresh_snapshots
+        self.orchestrator: Optional[Orchestrator] = None
+        self.refresher: Optional[SnapshotRefresher] = None
+        self.startup_timeline: List[Dict[str, Any]] = []
+        self._github_tool: Optional[GitHubExecTool] = None
+        self._pipeline = None
+
+    async def start(self, agents: bool = True) -> "Assistant":
+        """
+        Builds the stack with a StartupCoordinator: the MCP server (docker run), the embedding
+        model, the Pinecone client and the Ollama model load run concurrently, then the agents.
+        With agents=False only the models and the vector store are built (no MCP server).
+        The per-component timeline is kept in `startup_timeline`.
+        """
+        if self.orchestrator is not None or (not agents and None not in (self.llm, self.embedder, self.vector_store)):
+            return self
+
+        startup = StartupCoordinator(logger=self.logger)
+        # pesos de los modelos en memoria antes de la primera pregunta (los inyectados ya vienen cargados)
+        warm_llm, warm_embedder = self.llm is None, self.embedder is None
+        startup.add("llm", self._start_llm)
+        startup.add("embedder", self._start_embedder)
+        startup.add("vector_store", self._start_vector_store, deps=("embedder",))
+        if warm_llm:
+            startup.add("llm_warmup", self._warm_up_llm, deps=("llm",), optional=True)
+        if warm_embedder:
+            startup.add("embedder_warmup", self._warm_up_embedder, deps=("embedder",), optional=True)
+        if agents:
+            if self.github_agent is None:
+                self.github_agent = GitHubMCPAgent()
+            if self.github_agent.snapshot is None:
+                self.github_agent.snapshot = RepoSnapshotStore.from_env()
+            startup.add("mcp", self.github_agent.connect, optional=True)
+            startup.add("github_agent", self._build_github_tool, deps=("llm", "embedder", "mcp"))
+            startup.add("orchestrator", self._build_orchestrator, deps=("github_agent", "vector_store"))
+        try:
+            await startup.run()
+        finally:
+            self.startup_timeline = startup.timeline
+
+        if agents and self.refresh_snapshots:
+            # sesión leída en cada ronda: puede no existir todavía si el servidor MCP no arrancó
+            self.refresher = SnapshotRefresher.from_env(self.github_agent.snapshot, lambda: self.github_agent.session, logger=self.logger)
+            if self.refresher is not None:
+                self.refresher.start()
+        return self
+
+    # --- pasos del arranque (ver start) ---
+
+    def _start_llm(self) -> None:
+        if self.llm is None:
+            self.llm = build_chat_llm(model=LLM_MODEL, temperature=0.0, num_thread=4, num_gpu=0)
+
+    def _start_embedder(self) -> None:
+        if self.embedder is None:
+            from utils.embeddings import Embedder
+            self.embedder = Embedder(EMBEDDING_MODEL, backend=EMBEDDING_BACKEND, truncate_dim=EMBEDDING_DIM)
+
+    def _start_vector_store(self) -> None:
+        if self.vector_store is None:
+            from utils.embeddings import PineconeVectorStore
+            self.vector_store = PineconeVectorStore.for_embedder(self.embedder)
+
+    async def _warm_up_llm(self) -> None:
+        # solo con Ollama (no con los modelos inyectados en las pruebas offline)
+        if isinstance(self.llm, ChatOllama):
+            await warm_up(self.llm)
+
+    def _warm_up_embedder(self) -> None:
+        self.embedder.embed_chunk("warm up")
+
+    async def _build_github_tool(self) -> GitHubExecTool:
+        if self.code_index is None and CODE_INDEX:
+            self.code_index = CodeIndex.from_env(self.embedder)
+        executor = await self.github_agent.build_executor(
+            allowed_tools=ALLOWED_TOOLS,
+            model=LLM_MODEL,
+            temperature=0.0,
+            max_iterations=5,
+            llm=self.llm,
+            top_n_tools=GITHUB_AGENT_TOP_TOOLS,
+            embedder=self.embedder,
+            extra_tools=[CodeLookupTool(index=self.code_index)] if self.code_index is not None else None,
+        )
+        self._github_tool = GitHubExecTool(executor=executor)
+        return self._github_tool
+
+    async def _build_orchestrator(self) -> None:
+        github_tool = self._github_tool
+        rag_tool = RAGAgent(vector_store=self.vector_store, embedder=self.embedder, llm=self.llm)
+
+        orchestrator = Orchestrator(
+            tools=[(github_tool.name, github_tool), (rag_tool.name, rag_tool)],
+            llm=self.llm,
+            logger=self.logger,
+            timeout_s=6000.0,
+            mode=ORCHESTRATOR_MODE,
+        )
+        await orchestrator.build_orchestrator()
+        self.orchestrator = orchestrator
+
+    def _record_query(self, query: str) -> None:
+        # popularidad de los repositorios: decide qué instantáneas mantiene el SnapshotRefresher
+        snapshot = getattr(self.github_agent, "snapshot", None)
+        if snapshot is not None:
+            snapshot.record_query(extract_repository(query))
+
+    async def ainvoke(self, query: str) -> Dict[str, Any]:
+        await self.start()
+        self._record_query(query)
+        return await self.orchestrator.ainvoke({"input": query}, include_run_info=True, return_intermediate_steps=False)
+
+    async def astream(self, query: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yields the orchestrator progress as events:
+        {"type": "action", "tool", "input"}, {"type": "observation", "tool", "output"}, {"type": "final", "output"}.
+        """
+        await self.start()
+        self._record_query(query)
+        async for chunk in self.orchestrator.astream({"input": query}):
+            for action in chunk.get("actions", []):
+                yield {"type": "action", "tool": action.tool, "input": str(action.tool_input)}
+            for step in chunk.get("steps", []):
+                yield {"type": "observation", "tool": step.action.tool, "output": str(step.observation)}
+            if "output" in chunk:
+                yield {"type": "final", "output": chunk["output"]}
+
+    def ingest_readme(self, owner: str, repo: str) -> Dict[str, Any]:
+        """fetch -> chunk -> embed -> upsert of one README (blocking; see ReadmeIngestionPipeline)."""
+        if self._pipeline is None:
+            from utils.ingestion import ReadmeIngestionPipeline
+            self._pipeline = ReadmeIngestionPipeline(self.embedder, self.vector_store)
+        return self._pipeline.ingest(owner, repo)
+
+    async def close(self) -> None:
+        if self.refresher is not None:
+            await self.refresher.stop()
+        if self.github_agent is not None:
+            await self.github_agent.close()
@@ -0,0 +1,69 @@
+from typing import Any, Dict
+import asyncio
+import json
+import time
+
+from langchain.tools import BaseTool
+
+from utils import metrics, tracing
+
+
+class CodeLookupTool(BaseTool):
+    """
+    Local tool of the GitHub agent over utils/code_index.py: returns the code of one definition
+    (function, method, class) or the matching file paths, without fetching and truncating whole
+    files. The first lookup on a repository starts indexing it in the background; until it is
+    ready the agent is told to use get_file_contents.
+    """
+    name: str = "lookup_code"
+    description: str = (
+        "Find a function, method or class in a repository's source code and return exactly its code, "
+        "file path and lines; prefer it to get_file_contents for questions about code. "
+        'Args: owner*, repo*, symbol (name, e.g. "handleRequest" or "Server.handleRequest"), '
+        "query (what the code does, when the name is unknown), path (part of a file path: lists files and their definitions). "
+        "If it says the repository is being indexed, use get_file_contents instead."
+    )
+    index: Any  # utils.code_index.CodeIndex
+    github_client: Any = None  # GitHubClient; creado al indexar si es None
+
+    def _parse(self, tool_input) -> Dict:
+        args = tool_input
+        if isinstance(args, str):
+            stripped = args.strip()
+            try:
+                args = json.loads(stripped) if stripped.startswith("{") else {"query": stripped}
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON for Action Input: {e}")
+        if not isinstance(args, dict):
+            raise ValueError("Action Input must be a JSON object (dict).")
+        return {k: v for k, v in args.items() if v not in (None, "")}
+
+    def _lookup(self, args: Dict) -> str:
+        owner, repo = str(args.get("owner") or "").strip(), str(args.get("repo") or "").strip()
+        if not owner or not repo:
+            return 'Error: "owner" and "repo" are required.'
+        full_name = f"{owner}/{repo}"
+        if not any(args.get(k) for k in ("symbol", "query", "path")):
+            return 'Error: give at least one of "symbol", "query" or "path".'
+
+        indexed = self.index.indexed(full_name) is not None
+        metrics.cache_lookup("code_index", indexed)
+        if not indexed:
+            # la descarga y los embeddings de un repositorio grande tardan minutos: nunca dentro de la pregunta
+            status = self.index.index_in_background(owner, repo, ref=args.get("ref"), client=self.github_client)
+            if status["status"] == "failed":
+                return f"Error: Could not index {full_name}: {status['error']} Use get_file_contents instead."
+            started = int(time.time() - status["since"])
+            return f"{full_name} is being indexed in the background (started {started}s ago). Use get_file_contents for now."
+        return self.index.lookup(full_name, symbol=args.get("symbol"), query=args.get("query"), path=args.get("path"))
+
+    def _run(self, tool_input, run_manager=None) -> str:
+        args = self._parse(tool_input)
+        with tracing.span("code_lookup", repo=f"{args.get('owner')}/{args.get('repo')}"):
+            return self._lookup(args)
+
+    async def _arun(self, tool_input, run_manager=None) -> str:
+        args = self._parse(tool_input)
+        with tracing.span("code_lookup", repo=f"{args.get('owner')}/{args.get('repo')}"):
+            # descarga, parseo y embeddings bloqueantes: fuera del bucle de eventos
+            return await asyncio.to_thread(self._lookup, args)
@@ -1,36 +1,57 @@
 import asyncio
 import json
 from contextlib import AsyncExitStack
-from typing import Optional, Any, Dict, Iterable
+from typing import Optional, Any, Dict, Iterable, List, Union
 
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
-from langchain_ollama import ChatOllama
 from langchain.tools import BaseTool
 from langchain.agents import AgentExecutor, create_react_agent
 from langchain.prompts import PromptTemplate
 
-from utils.process_tool_output import process_tool_output
+from utils.process_tool_output import process_tool_output, register_processors_from_schema
+from utils.paginated_output import PAGINATED_TOOLS, summarize_listing
+from utils.mcp_recording import MCPRecorder, RecordingSession
+from utils.tool_cache import ToolResultCache, Prefetcher
+from utils.repo_snapshot import RepoSnapshotStore
+from utils import tracing, metrics
+from utils.llm import build_chat_llm
+from agents.prompts import GITHUB_REACT_PROMPT
+from agents.tool_selection import ToolSelector, ToolSelectingExecutor, compact_schema, full_schema, first_sentence
 
 import os
+import time
 
 
 class GitHubMCPAgent:
-    def __init__(self, server_cmd: str = "docker", pat_env: str = "GITHUB_TOKEN"):
+    def __init__(
+        self,
+        server_cmd: str = "docker",
+        pat_env: str = "GITHUB_TOKEN",
+        recorder: Optional[MCPRecorder] = None,
+        snapshot: Optional[RepoSnapshotStore] = None,
+    ):
         self.server_cmd = server_cmd
         self.pat = os.environ.get(pat_env)
         self.session: Optional[ClientSession] = None
         self.exit_stack = AsyncExitStack()
+        # con MCP_RECORD_PATH definido se graba el tráfico real para el servidor de replay
+        self.recorder = recorder or MCPRecorder.from_env()
+        # resultados recientes compartidos por todas las MCPTool (ver utils/tool_cache.py)
+        self.result_cache = ToolResultCache.from_env()
+        self.prefetcher: Optional[Prefetcher] = None
+        # listados de los repositorios más consultados, sincronizados en segundo plano (ver utils/repo_snapshot.py)
+        self.snapshot = snapshot
 
     async def connect(self, extra_env: dict | None = None, args: list[str] | None = None):
         if self.session is not None:
             return 
 
-        if not self.pat:
-            raise ValueError("GITHUB token not configured in environment.")
-
         if args is None:
+            # el token solo lo necesita el servidor de GitHub (no el de replay, que recibe sus propios args)
+            if not self.pat:
+                raise ValueError("GITHUB token not configured in environment.")
             args = [
                 "run", "--rm", "-i",
                 "-e", f"GITHUB_PERSONAL_ACCESS_TOKEN={self.pat}",
@@ -49,8 +70,10 @@ class GitHubMCPAgent:
             read, write = stdio
             self.session = await self.exit_stack.enter_async_context(ClientSession(read, write))
             await self.session.initialize()
+            metrics.MCP_SESSIONS.inc()
             return await self.list_tools()
         except Exception:
+            metrics.MCP_SESSION_ERRORS.inc()
             raise
 
     async def ensure_connected(self):
@@ -69,100 +92,90 @@ class GitHubMCPAgent:
         temperature: float = 0.0,
         max_iterations: int = 8,
         prompt_template: Optional[str] = None,
-    ) -> AgentExecutor:
+        llm: Optional[Any] = None,
+        schema_style: str = "compact",
+        top_n_tools: Optional[int] = None,
+        embedder: Optional[Any] = None,
+        extra_tools: Optional[List[BaseTool]] = None,
+    ) -> Union[AgentExecutor, ToolSelectingExecutor]:
+        """
+        Builds the ReAct executor over the MCP tools.
+
+        schema_style: "compact" renders each tool as its first description sentence plus a one-line
+            argument list; "full" keeps the whole MCP description and the verbose schema summary.
+        top_n_tools: with an `embedder`, only the N tools most similar to each question are put in
+            the prompt (returns a ToolSelectingExecutor with the same invoke/ainvoke interface).
+        extra_tools: local tools offered next to the MCP tools (e.g. CodeLookupTool).
+        """
         await self.ensure_connected()
         assert self.session is not None
 
         listed = await self.session.list_tools()
         available = {t.name: t for t in listed.tools}
 
+        # orden estable (allowed_tools suele ser un set): el texto de herramientas del prompt no cambia entre procesos
         if allowed_tools is None:
-            selected = available.values()
+            selected = [available[name] for name in sorted(available)]
         else:
-            selected = [available[name] for name in allowed_tools if name in available]
+            selected = [available[name] for name in sorted(allowed_tools) if name in available]
+        register_processors_from_schema(selected)
+        if self.recorder is not None:
+            self.recorder.record_tools(selected)
+        self.prefetcher = Prefetcher.from_env(self.result_cache, available_tools={t.name for t in selected})
 
         tools = []
         for t in selected:
-            
-            schema_hint = ""
-            try:
-                schema_dict = t.inputSchema or {}
-
-                props = schema_dict.get("properties") or {}
-                req = schema_dict.get("required") or []
-                if props or req:
-                    schema_hint = "\n\nInput JSON schema (summary):\n"
-                    if props:
-                        schema_hint += "properties: " 
-                        for k, v in props.items():
-                            if "enum" in v:
-                                enum_vals = v["enum"]
-                                schema_hint += f"{k} (enum: {', '.join(map(str, enum_vals))}), "
-                            else:
-                                schema_hint += f"{k} ({v.get('type', 'unknown')}), "
-                    if req:
-                        schema_hint += "required: " + ", ".join(req) + "\n"
-            except Exception:
-                pass
+            description = t.description or f"Tool {t.name} from MCP server"
+            if schema_style == "compact":
+                description = f"{first_sentence(description)} {compact_schema(t.inputSchema)}".strip()
+            else:
+                description += full_schema(t.inputSchema)
 
             tools.append(
                 MCPTool(
                     name=t.name,
-                    description=(t.description or f"Tool {t.name} from MCP server") + schema_hint,
+                    description=description,
                     session=self.session,
                     mcp_tool_name=t.name,
+                    recorder=self.recorder,
+                    cache=self.result_cache,
+                    prefetcher=self.prefetcher,
+                    snapshot=self.snapshot,
                 )
             )
 
-        llm = ChatOllama(model=model, temperature=temperature)
-
-        REACT_PROMPT = """Answer the following questions as best you can. You have access to the following tools:
-                {tools}
-
-                Use the following format:
-
-                Question: the input question you must answer
-                Thought: you should always think about what to do
-                Action: the action to take, should be one of [{tool_names}]
-                Action Input: the input to the action
-                Observation: the result of the action
-                ... (this Thought/Action/Action Input/Observation can repeat N times)
-                Thought: I now know the final answer
-                Final Answer: the final answer to the original input question
-
-                IMPORTANT:
-                - End with "Final Answer:" once you can fully answer the question.
-                - Do NOT add an optional parameter as an argument to the tool input if not necessary or explicitly mentioned in the input.
-                - Every tool input must have "repo" and "owner" parameters.
-                - If the tool has a "ref" parameter, use "main" unless specified otherwise.
-
-                Begin!
+        tools.extend(extra_tools or [])
 
-                Question: {input}
-                Thought: {agent_scratchpad}
-                """
+        if llm is None:
+            llm = build_chat_llm(model=model, temperature=temperature)
 
         prompt = PromptTemplate(
             input_variables=["tools", "tool_names", "input", "agent_scratchpad"],
-            template=REACT_PROMPT,
+            template=prompt_template or GITHUB_REACT_PROMPT,
         )
 
-        agent = create_react_agent(llm, tools, prompt)
-        executor = AgentExecutor(
-            agent=agent,
-            tools=tools,
-            verbose=True,
-            handle_parsing_errors = "Fix the format. Stick to the given prompt. " \
-                                    "Make sure there is a Thought, Action and Action Input.",
-            max_iterations=max_iterations,
-            return_intermediate_steps=True
+        def make_executor(agent_tools: List[BaseTool]) -> AgentExecutor:
+            agent = create_react_agent(llm, agent_tools, prompt)
+            return AgentExecutor(
+                agent=agent,
+                tools=agent_tools,
+                verbose=True,
+                handle_parsing_errors = "Fix the format. Stick to the given prompt. " \
+                                        "Make sure there is a Thought, Action and Action Input.",
+                max_iterations=max_iterations,
+                return_intermediate_steps=True
 
-        )
-        
-        return executor
+            )
+
+        if top_n_tools and embedder is not None and top_n_tools < len(tools):
+            return ToolSelectingExecutor(ToolSelector(embedder, tools), make_executor, top_n=top_n_tools)
+
+        return make_executor(tools)
 
     async def close(self):
         try:
+            if self.prefetcher is not None:
+                await self.prefetcher.close()
             await self.exit_stack.aclose()
         finally:
             self.session = None
@@ -171,9 +184,16 @@ class GitHubMCPAgent:
 class MCPTool(BaseTool):
     name: str
     description: str
-    session: ClientSession
+    session: Any  # ClientSession o RecordedSession (replay offline)
     mcp_tool_name: str
-    _cache: Dict[str, str] = {}
+    # listados: páginas que se siguen por llamada y elementos que se devuelven al agente
+    max_pages: int = 1
+    top_n_items: int = 10
+    recorder: Optional[MCPRecorder] = None  # graba cada llamada (incluidas las páginas siguientes)
+    cache: Optional[ToolResultCache] = None
+    prefetcher: Optional[Prefetcher] = None  # tras un listado, trae en segundo plano el detalle de los primeros elementos
+    snapshot: Optional[RepoSnapshotStore] = None
+    snapshot_max_age_s: float = float(os.getenv("REPO_SNAPSHOT_MAX_AGE", "600"))
 
     def _run(self, tool_input, run_manager=None) -> str:
 
@@ -210,9 +230,43 @@ class MCPTool(BaseTool):
             else:
                 args = {"query": args}
 
-        
-        result = await self.session.call_tool(self.mcp_tool_name, args)
+        if self.snapshot is not None and self.mcp_tool_name in PAGINATED_TOOLS and isinstance(args, dict):
+            answer = self.snapshot.answer_listing(self.mcp_tool_name, args, self.snapshot_max_age_s, top_n=self.top_n_items)
+            metrics.cache_lookup("repo_snapshot", answer is not None)
+            if answer is not None:
+                return answer
+
+        if self.cache is not None:
+            with tracing.span("mcp.call", tool=self.mcp_tool_name) as s:
+                cached = await self.cache.aget(self.mcp_tool_name, args)
+                s.set_attribute("cached", cached is not None)
+            if cached is not None:
+                return cached
 
-        processed_output = process_tool_output(self.mcp_tool_name, result)
+        session = RecordingSession(self.session, self.recorder) if self.recorder is not None else self.session
+
+        def prefetch(items):
+            self.prefetcher.after_listing(session, self.mcp_tool_name, args, items)
+
+        status = "exception"
+        start = time.perf_counter()
+        try:
+            with tracing.span("mcp.call", tool=self.mcp_tool_name) as s:
+                if self.mcp_tool_name in PAGINATED_TOOLS:
+                    processed_output = await summarize_listing(
+                        session, self.mcp_tool_name, args, top_n=self.top_n_items, max_pages=self.max_pages,
+                        on_top_items=prefetch if self.prefetcher is not None else None,
+                    )
+                else:
+                    result = await session.call_tool(self.mcp_tool_name, args)
+                    processed_output = process_tool_output(self.mcp_tool_name, result)
+                s.set_attribute("output_chars", len(processed_output))
+            # los procesadores devuelven los errores de la herramienta como texto para el agente
+            status = "error" if processed_output.startswith("Error") else "ok"
+        finally:
+            metrics.MCP_CALLS.labels(tool=self.mcp_tool_name, status=status).inc()
+            metrics.MCP_LATENCY.labels(tool=self.mcp_tool_name).observe(time.perf_counter() - start)
 
+        if self.cache is not None:
+            self.cache.put(self.mcp_tool_name, args, processed_output)
         return processed_output
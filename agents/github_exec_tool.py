@@ -1,21 +1,43 @@
-from langchain.tools import BaseTool
-from langchain.agents import AgentExecutor
+from typing import Any
 
+from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
 
+from utils import tracing
+
+
+# Salida fija de AgentExecutor con early_stopping_method="force"
+STOPPED_OUTPUT = "Agent stopped due to iteration limit or time limit."
+
+
+def salvage_output(output: Any, last_observation: Any) -> str:
+    """At the iteration limit the last tool observation is more useful than the fixed stop message."""
+    if output == STOPPED_OUTPUT and last_observation:
+        return str(last_observation)
+    return output
+
+
+def final_output(res: Any) -> str:
+    if not isinstance(res, dict):
+        return res
+    steps = res.get("intermediate_steps") or []
+    return salvage_output(res["output"], steps[-1][1] if steps else None)
+
 class ArgsSchema(BaseModel):
     input: str = Field(..., description="Reasoning based on the user query with all the necessary details")
 
 class GitHubExecTool(BaseTool):
     name: str = "GitHubAgent"
     description: str = "Use the GitHub agent to answer queries about repositories. It can access the files and git details of the repositories"
-    executor: AgentExecutor
+    executor: Any  # AgentExecutor o ToolSelectingExecutor
     args_schema: type = ArgsSchema
 
     def _run(self, input: str) -> str:
-        res = self.executor.invoke({"input": input})
-        return res["output"] if isinstance(res, dict) else res
+        with tracing.span("github_agent", input_chars=len(input)):
+            res = self.executor.invoke({"input": input})
+        return final_output(res)
 
     async def _arun(self, input: str) -> str:
-        res = await self.executor.ainvoke({"input": input}, include_run_info=True, return_intermediate_steps=False)
-        return res["output"] if isinstance(res, dict) else res
\ No newline at end of file
+        with tracing.span("github_agent", input_chars=len(input)):
+            res = await self.executor.ainvoke({"input": input}, include_run_info=True, return_intermediate_steps=False)
+        return final_output(res)
\ No newline at end of file
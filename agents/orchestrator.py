@@ -1,24 +1,48 @@
-from typing import List, Callable, Any
+from typing import Dict, List, Callable, Any, Optional
 from langchain.tools import BaseTool
 import asyncio
+import time
 
 from langchain.agents import AgentExecutor, create_react_agent
 from langchain.prompts import PromptTemplate
+from langchain_core.agents import AgentAction, AgentStep
+
+from agents.github_exec_tool import salvage_output
+from agents.prompts import ORCHESTRATOR_REACT_PROMPT
+from agents.router import QueryRouter, QUERY_CLASSES
+from agents.tool_selection import limit_executor
+from utils import tracing, metrics
 
 
 
 class Orchestrator():
+    """
+    ReAct orchestrator over the sub-agent tools.
+
+    mode="react": every question goes through the orchestrator's ReAct loop (route, call the
+        sub-agent, then one more generation to write the final answer).
+    mode="direct": a QueryRouter classifies the question; when one sub-agent covers it, that agent
+        is called directly and its final answer is returned as is, skipping the orchestrator's LLM
+        turns. Other questions use the ReAct loop. Iteration limits come from QUERY_CLASSES.
+    """
+
     def __init__(
         self,
         tools: List[tuple[str, BaseTool]],
         llm: Any,
         logger: Callable[[str], None] = print,
-        timeout_s: float = 300.0
+        timeout_s: float = 300.0,
+        mode: str = "react",
+        router: Optional[QueryRouter] = None,
     ):
         self.agents = tools
         self.llm = llm
         self.logger = logger
         self.timeout_s = timeout_s
+        self.mode = mode
+        self.router = router or QueryRouter()
+        self.executor: AgentExecutor | None = None
+        self._limited: Dict[tuple, Any] = {}
 
     async def build_orchestrator(self) -> AgentExecutor:
         llm = self.llm
@@ -26,36 +50,15 @@ class Orchestrator():
         for _, agent in self.agents:
             tools.append(agent)
 
-        REACT_PROMPT = """ Answer the following questions as best you can. You have access to the following tools
-            {tools}
-
-            Use the following format:
-
-            Question: the input question
-            Thought: reasoning
-            Action: one of [{tool_names}]
-            Action Input: A brief reasoning based on the Question and with all the details needed\n
-            Observation: result of the action
-            ... (repeat as needed)
-
-            Thought: I now know the final answer
-            Final Answer: the final answer
-
-            Rules:
-            - End with 'Final Answer:' once you can fully answer.
-            - Keep observations concise and relevant.
-
-            Question: {input}
-            Thought:{agent_scratchpad}"""
-        
-
         prompt = PromptTemplate(
             input_variables=["tools", "tool_names", "input", "agent_scratchpad"],
-            template=REACT_PROMPT,
+            template=ORCHESTRATOR_REACT_PROMPT,
         )
 
 
         agent = create_react_agent(llm, tools, prompt)
+        # "generate" no está soportado por los agentes de create_react_agent (ValueError al llegar al
+        # límite); con "force" la última observación se devuelve como respuesta (ver salvage_output)
         executor = AgentExecutor(
             agent=agent,
             tools=tools,
@@ -63,7 +66,94 @@ class Orchestrator():
             handle_parsing_errors = "Fix the format. Stick to the given prompt. Make sure there is a Thought, Action and Action Input.",
             max_iterations=6,
             return_intermediate_steps=True,
-            early_stopping_method="generate"
+            early_stopping_method="force"
             
         )
-        return executor
\ No newline at end of file
+        self.executor = executor
+        return executor
+
+    def _limited_executor(self, query_class: str) -> AgentExecutor:
+        key = ("orchestrator", query_class)
+        if key not in self._limited:
+            limits = QUERY_CLASSES[query_class]
+            self._limited[key] = limit_executor(self.executor, limits["max_iterations"], limits["early_stopping_method"])
+        return self._limited[key]
+
+    def _limited_tool(self, name: str, query_class: str) -> BaseTool:
+        key = (name, query_class)
+        if key not in self._limited:
+            tool = dict(self.agents)[name]
+            if getattr(tool, "executor", None) is not None:
+                limits = QUERY_CLASSES[query_class]
+                tool = tool.model_copy(update={
+                    "executor": limit_executor(tool.executor, limits["max_iterations"], limits["early_stopping_method"])
+                })
+            self._limited[key] = tool
+        return self._limited[key]
+
+    async def _chunks(self, inputs: dict, span, **kwargs):
+        """Executor-style chunks ({"actions"}, {"steps"}, {"output"}) for either mode."""
+        query = inputs.get("input", "")
+        query_class = self.router.classify(query) if self.mode == "direct" else None
+        agent_name = QUERY_CLASSES[query_class]["agent"] if query_class else None
+        span.set_attribute("mode", self.mode)
+        if query_class:
+            span.set_attribute("query_class", query_class)
+
+        if agent_name is not None and agent_name in dict(self.agents):
+            self.logger(f"[Orchestrator] {query_class} -> {agent_name} (direct)")
+            action = AgentAction(tool=agent_name, tool_input=query, log=f"Routed directly to {agent_name} ({query_class})")
+            yield {"actions": [action]}
+            observation = await self._limited_tool(agent_name, query_class).ainvoke(query)
+            yield {"steps": [AgentStep(action=action, observation=observation)]}
+            yield {"output": str(observation)}
+            return
+
+        executor = self._limited_executor(query_class) if query_class else self.executor
+        last_observation = None
+        async for chunk in executor.astream(inputs, **kwargs):
+            for step in chunk.get("steps", []):
+                last_observation = step.observation
+            if "output" in chunk:
+                chunk = {**chunk, "output": salvage_output(chunk["output"], last_observation)}
+            yield chunk
+
+    async def ainvoke(self, inputs: dict, **kwargs):
+        """Runs the question inside the root "orchestrator" span; returns {"input", "output", "intermediate_steps"}."""
+        kwargs.pop("return_intermediate_steps", None)
+        kwargs.pop("include_run_info", None)
+        result = {"input": inputs.get("input", ""), "output": "", "intermediate_steps": []}
+        async for chunk in self.astream(inputs, **kwargs):
+            result["intermediate_steps"].extend((step.action, step.observation) for step in chunk.get("steps", []))
+            if "output" in chunk:
+                result["output"] = chunk["output"]
+        return result
+
+    async def astream(self, inputs: dict, **kwargs):
+        """Streams the executor chunks ({"actions"}, {"steps"}, {"output"}) with the orchestrator span and metrics."""
+        if self.executor is None:
+            await self.build_orchestrator()
+        start = time.perf_counter()
+        route, status, steps = "none", "error", []
+        try:
+            with tracing.span("orchestrator", query_chars=len(inputs.get("input", ""))) as s:
+                async for chunk in self._chunks(inputs, s, **kwargs):
+                    steps.extend(chunk.get("steps", []))
+                    yield chunk
+                route = route_of(steps)
+                s.set_attribute("route", route)
+            status = "ok"
+        finally:
+            metrics.REQUESTS.labels(route=route, status=status).inc()
+            metrics.REQUEST_LATENCY.labels(route=route).observe(time.perf_counter() - start)
+
+
+def route_of(intermediate_steps) -> str:
+    """"github", "rag", "both" or "none" depending on the agents the orchestrator called."""
+    # (action, observation) de intermediate_steps o AgentStep de astream
+    actions = [step[0] if isinstance(step, tuple) else step.action for step in intermediate_steps]
+    used = {getattr(action, "tool", None) for action in actions}
+    github, rag = "GitHubAgent" in used, "RAGAgent" in used
+    if github and rag:
+        return "both"
+    return "github" if github else "rag" if rag else "none"
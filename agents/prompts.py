@@ -0,0 +1,55 @@
+# Plantillas ReAct de los agentes.
+#
+# Todo lo que no cambia entre preguntas (instrucciones, herramientas, formato, reglas) va antes de
+# "{input}", y las herramientas se renderizan siempre en el mismo orden: así el prefijo del prompt
+# es idéntico byte a byte en cada turno y Ollama lo reutiliza desde su caché KV en vez de volver a
+# evaluarlo. Sin sangría: los espacios de más también son tokens de prefill.
+
+ORCHESTRATOR_REACT_PROMPT = """Answer the following questions as best you can. You have access to the following tools
+{tools}
+
+Use the following format:
+
+Question: the input question
+Thought: reasoning
+Action: one of [{tool_names}]
+Action Input: A brief reasoning based on the Question and with all the details needed
+
+Observation: result of the action
+... (repeat as needed)
+
+Thought: I now know the final answer
+Final Answer: the final answer
+
+Rules:
+- End with 'Final Answer:' once you can fully answer.
+- Keep observations concise and relevant.
+
+Question: {input}
+Thought:{agent_scratchpad}"""
+
+
+GITHUB_REACT_PROMPT = """Answer the following questions as best you can. You have access to the following tools:
+{tools}
+
+Use the following format:
+
+Question: the input question you must answer
+Thought: you should always think about what to do
+Action: the action to take, should be one of [{tool_names}]
+Action Input: the input to the action
+Observation: the result of the action
+... (this Thought/Action/Action Input/Observation can repeat N times)
+Thought: I now know the final answer
+Final Answer: the final answer to the original input question
+
+IMPORTANT:
+- End with "Final Answer:" once you can fully answer the question.
+- Do NOT add an optional parameter as an argument to the tool input if not necessary or explicitly mentioned in the input.
+- Every tool input must have "repo" and "owner" parameters.
+- If the tool has a "ref" parameter, use "main" unless specified otherwise.
+
+Begin!
+
+Question: {input}
+Thought: {agent_scratchpad}"""
@@ -3,6 +3,8 @@ from pydantic import Field
 
 from langchain_ollama import ChatOllama
 
+from utils import tracing
+
 class RAGAgent(BaseTool):
     name: str = "RAGAgent"
     description: str = "Use this tool to search the vector database for relevant, high-level context from various GitHub repository README files. This is ideal for answering general questions about a project's purpose, architecture, setup, or usage. DO NOT use this tool for queries that require accessing specific, granular data, file contents, or real-time repository status (e.g., retrieving a specific line of code or a list of files)."
@@ -11,6 +13,10 @@ class RAGAgent(BaseTool):
     llm: object = Field(default=None)
 
     def _run(self, query: str) -> str:
+        with tracing.span("rag_agent", query_chars=len(query)):
+            return self._answer(query)
+
+    def _answer(self, query: str) -> str:
  
         query_embedding = self.embedder.embed_chunk(query)
 
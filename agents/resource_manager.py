@@ -0,0 +1,273 @@
+"""
+Resources of the Streamlit app, shared by every browser session of one process.
+
+Each session used to get its own AsyncRunner thread, its own MCP server process (docker run) and
+its own embedding model copy, released only at process exit. ResourceManager keeps:
+- once per process: the AsyncRunner, the chat model, the embedder, the vector store, the code
+  index, the MCP result cache and the repository snapshot (with its refresher);
+- per session: an Assistant with its own MCP server process, GitHub agent and orchestrator, built
+  on the session's first query, reference-counted while queries run and closed after
+  `idle_timeout_s` without use (the next query of that session builds it again).
+
+A new session evicts the least recently used idle one when `max_sessions` MCP server processes
+are live or the process resident memory is over `max_rss_mb`; when every session is busy the
+query fails with "try again" instead of starting one more process.
+
+    resources = ResourceManager.from_env()
+    shared = resources.runner.run(resources.start())          # models, vector store, caches
+
+    async def answer(session_id, query):
+        async with resources.session(session_id) as assistant:
+            return await assistant.ainvoke(query)
+
+Environment:
+    SESSION_IDLE_TIMEOUT     seconds before an idle session's MCP server is closed (default 900)
+    SESSION_MAX              live sessions, i.e. MCP server processes (default 8)
+    SESSION_MAX_RSS_MB       resident memory above which new sessions must replace idle ones (default 0, no limit)
+    SESSION_SWEEP_INTERVAL   seconds between idle sweeps (default 60)
+"""
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import os
+import time
+
+from agents.assistant import CODE_INDEX, Assistant
+from agents.github_agent import GitHubMCPAgent
+from utils import metrics
+from utils.code_index import CodeIndex
+from utils.repo_snapshot import RepoSnapshotStore, SnapshotRefresher
+from utils.runner_async import AsyncRunner
+from utils.tool_cache import ToolResultCache
+
+
+SESSIONS = metrics.gauge("resource_sessions", "Live per-session assistants (one MCP server process each).")
+SESSION_EVICTIONS = metrics.counter("resource_session_evictions_total", "Per-session assistants closed by the resource manager.", ["reason"])
+SESSION_REJECTIONS = metrics.counter("resource_session_rejections_total", "Queries refused because every live session was busy.")
+PROCESS_RSS = metrics.gauge("process_resident_memory_bytes", "Resident memory of the process.")
+
+
+def process_rss_bytes() -> int:
+    """Current resident memory of this process (0 where /proc is not available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class SessionEntry:
+    __slots__ = ("session_id", "assistant", "refs", "last_used", "ready")
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.assistant: Optional[Assistant] = None
+        self.refs = 0  # consultas en curso: con refs > 0 la sesión no se expulsa
+        self.last_used = time.monotonic()
+        self.ready: Optional[asyncio.Task] = None  # construcción del Assistant (docker run incluido)
+
+
+class ResourceManager:
+    """Shares the heavy components across sessions and bounds the per-session ones."""
+
+    def __init__(
+        self,
+        runner: Optional[AsyncRunner] = None,
+        idle_timeout_s: float = 900.0,
+        max_sessions: int = 8,
+        max_rss_mb: float = 0.0,
+        sweep_interval_s: float = 60.0,
+        logger: Callable[[str], None] = print,
+    ):
+        self.runner = runner or AsyncRunner()
+        self.idle_timeout_s = idle_timeout_s
+        self.max_sessions = max(1, max_sessions)
+        self.max_rss_bytes = int(max_rss_mb * 1024 * 1024)
+        self.sweep_interval_s = sweep_interval_s
+        self.logger = logger
+        self.shared: Optional[Assistant] = None  # solo modelos y vector store (start(agents=False))
+        self.snapshot: Optional[RepoSnapshotStore] = None
+        self.result_cache: Optional[ToolResultCache] = None
+        self.code_index: Optional[CodeIndex] = None
+        self.refresher: Optional[SnapshotRefresher] = None
+        # orden de uso: la sesión menos reciente va primero
+        self.sessions: "OrderedDict[str, SessionEntry]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, runner: Optional[AsyncRunner] = None, logger: Callable[[str], None] = print) -> "ResourceManager":
+        return cls(
+            runner,
+            idle_timeout_s=float(os.getenv("SESSION_IDLE_TIMEOUT", "900")),
+            max_sessions=int(os.getenv("SESSION_MAX", "8")),
+            max_rss_mb=float(os.getenv("SESSION_MAX_RSS_MB", "0")),
+            sweep_interval_s=float(os.getenv("SESSION_SWEEP_INTERVAL", "60")),
+            logger=logger,
+        )
+
+    async def start(self) -> Assistant:
+        """Builds the shared components once; returns the Assistant that holds the models."""
+        async with self._lock:
+            if self.shared is None:
+                shared = await Assistant(logger=self.logger, refresh_snapshots=False).start(agents=False)
+                self.snapshot = RepoSnapshotStore.from_env()
+                self.result_cache = ToolResultCache.from_env()
+                self.code_index = CodeIndex.from_env(shared.embedder) if CODE_INDEX else None
+                # un único refresco de instantáneas, sobre cualquier sesión MCP viva
+                self.refresher = SnapshotRefresher.from_env(self.snapshot, self._any_mcp_session, logger=self.logger)
+                if self.refresher is not None:
+                    self.refresher.start()
+                self._sweeper = asyncio.ensure_future(self._sweep_loop())
+                self.shared = shared
+        return self.shared
+
+    def _any_mcp_session(self) -> Any:
+        for entry in reversed(self.sessions.values()):
+            agent = entry.assistant.github_agent if entry.assistant is not None else None
+            if agent is not None and agent.session is not None:
+                return agent.session
+        return None
+
+    async def _build(self, entry: SessionEntry) -> Assistant:
+        agent = GitHubMCPAgent(snapshot=self.snapshot)
+        agent.result_cache = self.result_cache
+        assistant = Assistant(
+            logger=self.logger,
+            llm=self.shared.llm,
+            embedder=self.shared.embedder,
+            vector_store=self.shared.vector_store,
+            github_agent=agent,
+            code_index=self.code_index,
+            refresh_snapshots=False,
+        )
+        try:
+            await assistant.start()
+        except Exception:
+            # el servidor MCP puede haber arrancado aunque falle otro paso
+            await assistant.close()
+            raise
+        entry.assistant = assistant
+        return assistant
+
+    @asynccontextmanager
+    async def session(self, session_id: str) -> AsyncIterator[Assistant]:
+        """The session's Assistant, built if needed and not evictable until the block exits."""
+        entry = await self._acquire(session_id)
+        try:
+            yield entry.assistant
+        finally:
+            entry.refs -= 1
+            entry.last_used = time.monotonic()
+
+    async def _acquire(self, session_id: str) -> SessionEntry:
+        await self.start()
+        victims: List[Tuple[SessionEntry, str]] = []
+        async with self._lock:
+            entry = self.sessions.get(session_id)
+            if entry is None:
+                victims = self._make_room()
+                entry = SessionEntry(session_id)
+                entry.ready = asyncio.ensure_future(self._build(entry))
+                self.sessions[session_id] = entry
+            else:
+                self.sessions.move_to_end(session_id)
+            entry.refs += 1
+            SESSIONS.set(len(self.sessions))
+        await self._close(victims)
+
+        try:
+            # shield: si se cancela esta consulta, la construcción sigue para las siguientes
+            await asyncio.shield(entry.ready)
+        except BaseException:
+            entry.refs -= 1
+            if entry.ready.done():
+                async with self._lock:
+                    if self.sessions.get(session_id) is entry:
+                        del self.sessions[session_id]
+                    SESSIONS.set(len(self.sessions))
+            raise
+        return entry
+
+    def _idle(self) -> List[SessionEntry]:
+        return [e for e in self.sessions.values() if e.refs == 0 and e.ready is not None and e.ready.done()]
+
+    def _make_room(self) -> List[Tuple[SessionEntry, str]]:
+        """Picks the session a new one replaces (called with the lock held)."""
+        if len(self.sessions) >= self.max_sessions:
+            reason = "sessions"
+        elif self.max_rss_bytes and process_rss_bytes() > self.max_rss_bytes:
+            reason = "memory"
+        else:
+            return []
+        idle = self._idle()
+        if not idle:
+            SESSION_REJECTIONS.inc()
+            raise RuntimeError(f"All {len(self.sessions)} assistant sessions are busy ({reason} limit); try again in a moment.")
+        del self.sessions[idle[0].session_id]
+        return [(idle[0], reason)]
+
+    async def evict_idle(self) -> int:
+        """Closes the sessions idle for longer than idle_timeout_s (and one more while over the memory limit)."""
+        now = time.monotonic()
+        rss = process_rss_bytes()
+        PROCESS_RSS.set(rss)
+        async with self._lock:
+            idle = self._idle()
+            victims = [(e, "idle") for e in idle if now - e.last_used > self.idle_timeout_s]
+            if not victims and idle and self.max_rss_bytes and rss > self.max_rss_bytes:
+                victims = [(idle[0], "memory")]
+            for entry, _ in victims:
+                del self.sessions[entry.session_id]
+            SESSIONS.set(len(self.sessions))
+        await self._close(victims)
+        return len(victims)
+
+    async def _close(self, victims: List[Tuple[SessionEntry, str]]) -> None:
+        for entry, reason in victims:
+            SESSION_EVICTIONS.labels(reason=reason).inc()
+            if entry.assistant is None:
+                continue
+            self.logger(f"[Resources] Closing session {entry.session_id[:8]} ({reason})")
+            try:
+                await entry.assistant.close()
+            except Exception as e:
+                self.logger(f"[Resources] Error closing session {entry.session_id[:8]}: {e}")
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval_s)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                self.logger(f"[Resources] Idle sweep failed: {e}")
+
+    def startup_timeline(self, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Startup timeline of the shared components followed by the session's own steps."""
+        rows = list(self.shared.startup_timeline) if self.shared is not None else []
+        entry = self.sessions.get(session_id) if session_id else None
+        if entry is not None and entry.assistant is not None:
+            shared_names = {row["component"] for row in rows}
+            rows += [row for row in entry.assistant.startup_timeline if row["component"] not in shared_names]
+        return rows
+
+    async def close(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+        if self.refresher is not None:
+            await self.refresher.stop()
+        async with self._lock:
+            victims = [(entry, "shutdown") for entry in self.sessions.values()]
+            self.sessions.clear()
+            SESSIONS.set(0)
+        await self._close(victims)
+
+    def shutdown(self) -> None:
+        """Blocking close for atexit: closes every session, then stops the runner thread."""
+        try:
+            self.runner.run(self.close(), timeout=30)
+        finally:
+            self.runner.stop()
@@ -0,0 +1,78 @@
+from typing import Dict, Optional
+import re
+
+
+# Límites por clase de consulta. max_iterations cuenta los turnos del LLM del agente (una herramienta
+# + la respuesta final = 2), con uno de margen para errores de formato. "force" corta sin otra
+# generación: los agentes de create_react_agent no admiten "generate" (lanza ValueError).
+QUERY_CLASSES: Dict[str, Dict] = {
+    # un get_* sobre un elemento concreto (PR/issue #N, release por tag, fichero)
+    "github_item": {"agent": "GitHubAgent", "max_iterations": 3, "early_stopping_method": "force"},
+    # un list_*
+    "github_listing": {"agent": "GitHubAgent", "max_iterations": 3, "early_stopping_method": "force"},
+    # list_* y después get_* del primer elemento ("last PR ... summarize")
+    "github_followup": {"agent": "GitHubAgent", "max_iterations": 4, "early_stopping_method": "force"},
+    # preguntas generales sobre el proyecto: contexto del README
+    "readme": {"agent": "RAGAgent", "max_iterations": 1, "early_stopping_method": "force"},
+    # sin clase clara: bucle ReAct completo del orquestador
+    "open": {"agent": None, "max_iterations": 6, "early_stopping_method": "force"},
+}
+
+_REPO = re.compile(r"\b[\w-]+/[\w.-]+\b")
+# owner/repo citado como repositorio ("in vercel/next.js", "the github/github-mcp-server repository")
+_REPO_REF = re.compile(r"\b(?:in|of|from|repository|repo)\s+([\w-]+/[\w.-]*[\w-])|([\w-]+/[\w.-]*[\w-])\s+(?:repository|repo)\b", re.IGNORECASE)
+_ITEM = re.compile(r"#\s*\d+|\b(?:pr|pull request|issue)\s+(?:number\s+)?\d+\b|\bv\d+(?:\.\d+)+\b|\btag\b", re.IGNORECASE)
+# una ruta con directorio, o un nombre de fichero tras "file", "script", "fetch"... ("next.js" solo no cuenta)
+_FILE = re.compile(
+    r"(?:^|\s)\.?[\w.-]+/(?:[\w.-]+/)*[\w-]+\.\w{1,6}\b|\b(?:file|script|fetch|read|open)\s+[\w.-]+\.\w{1,6}\b",
+    re.IGNORECASE,
+)
+_LISTING = re.compile(r"\b(?:pull requests?|prs?|issues?|releases?|commits?)\b", re.IGNORECASE)
+_FETCH = re.compile(r"^\s*(?:please\s+)?(?:fetch|get|list|identify|retrieve|give me)\b|\bfetch\b", re.IGNORECASE)
+_DETAIL = re.compile(r"\b(?:summari[sz]e|summary|explain|details?|describe|consists?|information)\b", re.IGNORECASE)
+_README = re.compile(r"\breadme\b", re.IGNORECASE)
+# lo que cuenta un README o la documentación: sin esto una pregunta ("how many stars...") no va directa a RAGAgent
+_DOCS = re.compile(
+    r"\b(?:readme|docs?|documentation|install\w*|set\s*up|setup|configur\w*|get(?:ting)?\s+started|quick\s*start|"
+    r"usage|guides?|guidelines|tutorials?|courses?|licen[sc]e\w*|contributing|community|security|vulnerabilit\w*|"
+    r"governance|purpose|features?|components?|capabilit\w*|resources|says?|mention\w*|recommend\w*|claims?|indicates?|points?)\b",
+    re.IGNORECASE,
+)
+_QUESTION = re.compile(r"^\s*(?:what|which|where|who|why|how|when|if|does|do|is|are|can)\b", re.IGNORECASE)
+
+
+class QueryRouter:
+    """
+    Rule-based classifier that decides whether a single sub-agent covers a question
+    (see QUERY_CLASSES). "readme" needs a documentation signal (install, license, docs...),
+    since RAGAgent has no GitHub tools to fall back on. Questions it cannot place with
+    confidence are classed "open" and go through the orchestrator's ReAct loop as before.
+    """
+
+    def classify(self, query: str) -> str:
+        refs = [m.group(1) or m.group(2) for m in _REPO_REF.finditer(query)] or _REPO.findall(query)[:1]
+        has_repo = bool(refs)
+        # sin el owner/repo: "vercel/next.js" no es una ruta a un fichero .js
+        text = query
+        for ref in refs:
+            text = text.replace(ref, " ")
+        item = _ITEM.search(text) or _FILE.search(text)
+        listing = _LISTING.search(text)
+
+        # README + datos de GitHub en la misma pregunta: necesita los dos agentes
+        if _README.search(text) and (item or listing):
+            return "open"
+        if has_repo and item:
+            return "github_item"
+        if has_repo and listing:
+            return "github_followup" if _DETAIL.search(text) else "github_listing"
+        if not (item or listing or _FETCH.search(text)) and _QUESTION.search(query) and _DOCS.search(text):
+            return "readme"
+        return "open"
+
+    def route(self, query: str) -> Dict:
+        query_class = self.classify(query)
+        return {"query_class": query_class, **QUERY_CLASSES[query_class]}
+
+    def agent_for(self, query: str) -> Optional[str]:
+        return QUERY_CLASSES[self.classify(query)]["agent"]
@@ -0,0 +1,125 @@
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+
+from langchain.agents import AgentExecutor
+from langchain.tools import BaseTool
+
+from utils import metrics
+
+
+def compact_schema(schema: Optional[Dict]) -> str:
+    """
+    One-line rendering of an MCP inputSchema: `args: owner*:string, state:open|closed|all`.
+    Required arguments are marked with '*'.
+    """
+    schema = schema or {}
+    props = schema.get("properties") or {}
+    required = set(schema.get("required") or [])
+    if not props:
+        return ""
+
+    args = []
+    for name in sorted(props, key=lambda k: (k not in required, k)):
+        spec = props[name] or {}
+        kind = "|".join(map(str, spec["enum"])) if "enum" in spec else spec.get("type", "any")
+        args.append(f"{name}{'*' if name in required else ''}:{kind}")
+    return "args: " + ", ".join(args)
+
+
+def full_schema(schema: Optional[Dict]) -> str:
+    """Previous rendering, kept as the baseline for benchmarks."""
+    schema = schema or {}
+    props = schema.get("properties") or {}
+    req = schema.get("required") or []
+    if not (props or req):
+        return ""
+
+    hint = "\n\nInput JSON schema (summary):\n"
+    if props:
+        hint += "properties: "
+        for k, v in props.items():
+            if "enum" in v:
+                hint += f"{k} (enum: {', '.join(map(str, v['enum']))}), "
+            else:
+                hint += f"{k} ({v.get('type', 'unknown')}), "
+    if req:
+        hint += "required: " + ", ".join(req) + "\n"
+    return hint
+
+
+def first_sentence(text: str) -> str:
+    text = " ".join((text or "").split())
+    end = text.find(". ")
+    return text if end == -1 else text[:end + 1]
+
+
+class ToolSelector:
+    """Embeds tool descriptions once and returns the tools most similar to a query."""
+
+    def __init__(self, embedder, tools: List[BaseTool]):
+        self.embedder = embedder
+        self.tools = list(tools)
+        texts = [f"{t.name.replace('_', ' ')}: {t.description}" for t in self.tools]
+        vectors = np.asarray(embedder.embed_chunks(texts, normalize=True), dtype=np.float32)
+        self.vectors = vectors
+
+    def select(self, query: str, top_n: int) -> List[BaseTool]:
+        if top_n >= len(self.tools):
+            return self.tools
+        q = np.asarray(self.embedder.embed_chunk(query), dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+        scores = self.vectors @ q
+        best = sorted(np.argsort(-scores)[:top_n])  # orden original: mismo subconjunto -> mismo prompt
+        return [self.tools[i] for i in best]
+
+
+class ToolSelectingExecutor:
+    """
+    Drop-in for AgentExecutor.invoke/ainvoke that only exposes the top-N tools relevant to each
+    question. One AgentExecutor is built (and cached) per distinct tool subset, so the prompt
+    prefix for a given subset stays byte-identical across questions.
+    """
+
+    def __init__(
+        self,
+        selector: ToolSelector,
+        build_agent_executor: Callable[[List[BaseTool]], AgentExecutor],
+        top_n: int = 3,
+        logger: Callable[[str], None] = print,
+    ):
+        self.selector = selector
+        self.build_agent_executor = build_agent_executor
+        self.top_n = top_n
+        self.logger = logger
+        self._executors: Dict[tuple, AgentExecutor] = {}
+
+    def executor_for(self, query: str) -> AgentExecutor:
+        tools = self.selector.select(query, self.top_n)
+        key = tuple(t.name for t in tools)
+        metrics.cache_lookup("tool_subset_executor", key in self._executors)
+        if key not in self._executors:
+            self._executors[key] = self.build_agent_executor(tools)
+        self.logger(f"[GitHubAgent] Tools selected: {', '.join(key)}")
+        return self._executors[key]
+
+    def invoke(self, inputs: Dict[str, Any], *args, **kwargs):
+        return self.executor_for(inputs["input"]).invoke(inputs, *args, **kwargs)
+
+    async def ainvoke(self, inputs: Dict[str, Any], *args, **kwargs):
+        return await self.executor_for(inputs["input"]).ainvoke(inputs, *args, **kwargs)
+
+
+def limit_executor(executor, max_iterations: int, early_stopping_method: str = "force"):
+    """
+    Copy of an AgentExecutor (or ToolSelectingExecutor) with other iteration limits; the agent,
+    tools and prompt are shared, so the copy is cheap and keeps the prompt prefix unchanged.
+    """
+    if isinstance(executor, ToolSelectingExecutor):
+        build = executor.build_agent_executor
+        return ToolSelectingExecutor(
+            executor.selector,
+            lambda tools: limit_executor(build(tools), max_iterations, early_stopping_method),
+            top_n=executor.top_n,
+            logger=executor.logger,
+        )
+    return executor.model_copy(update={"max_iterations": max_iterations, "early_stopping_method": early_stopping_method})
@@ -0,0 +1,168 @@
+"""
+Headless HTTP API for the assistant (ASGI, Starlette + uvicorn).
+
+The stack (LLM client, embedder, MCP session, agents, orchestrator) is built once at startup and
+shared by all requests; the MCP session is closed on shutdown.
+
+Endpoints:
+    POST /query   {"query": "...", "stream": false}  -> {"output": "..."}
+                  with "stream": true the progress is sent as NDJSON events (action / observation / final)
+    POST /ingest  {"owner": "...", "repo": "..."}    -> ingestion stats of the README
+    GET  /health                                     -> MCP status and the per-component startup timeline
+    GET  /metrics                                    -> Prometheus text format
+
+Concurrency: at most API_MAX_CONCURRENCY queries run at once (default 2, matching OLLAMA_NUM_PARALLEL);
+the rest wait up to API_QUEUE_TIMEOUT seconds and then get 503. Ingestion runs one repository at a time.
+
+Usage:
+    python api.py --host 127.0.0.1 --port 8000
+    ASSISTANT_API_URL=http://127.0.0.1:8000 streamlit run app.py
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from agents.assistant import Assistant
+from utils import metrics
+
+
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "2"))
+API_QUEUE_TIMEOUT = float(os.getenv("API_QUEUE_TIMEOUT", "30"))
+
+
+class Limiter:
+    """Semaphore whose acquire gives up after `timeout` seconds instead of queueing forever."""
+
+    def __init__(self, limit: int, timeout: float):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.timeout = timeout
+
+    async def acquire(self) -> bool:
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def release(self) -> None:
+        self.semaphore.release()
+
+
+def _busy() -> JSONResponse:
+    return JSONResponse({"error": "Too many concurrent requests, try again later."}, status_code=503)
+
+
+async def _json_body(request: Request) -> dict:
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, ValueError):
+        return {}
+    return body if isinstance(body, dict) else {}
+
+
+async def query(request: Request):
+    body = await _json_body(request)
+    text = str(body.get("query") or "").strip()
+    if not text:
+        return JSONResponse({"error": "Field 'query' is required."}, status_code=400)
+
+    assistant: Assistant = request.app.state.assistant
+    limiter: Limiter = request.app.state.query_limiter
+    if not await limiter.acquire():
+        return _busy()
+
+    if not body.get("stream"):
+        try:
+            result = await assistant.ainvoke(text)
+        except Exception as e:
+            return JSONResponse({"error": f"Error processing the query: {e}"}, status_code=500)
+        finally:
+            limiter.release()
+        return JSONResponse({"output": result["output"] if isinstance(result, dict) else str(result)})
+
+    async def events():
+        # el permiso se libera al terminar (o cortarse) el stream, no al devolver la respuesta
+        try:
+            async for event in assistant.astream(text):
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        except Exception as e:
+            yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+        finally:
+            limiter.release()
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+async def ingest(request: Request):
+    body = await _json_body(request)
+    owner, repo = str(body.get("owner") or "").strip(), str(body.get("repo") or "").strip()
+    if not owner or not repo:
+        return JSONResponse({"error": "Fields 'owner' and 'repo' are required."}, status_code=400)
+
+    limiter: Limiter = request.app.state.ingest_limiter
+    if not await limiter.acquire():
+        return _busy()
+    try:
+        stats = await asyncio.to_thread(request.app.state.assistant.ingest_readme, owner, repo)
+    except Exception as e:
+        return JSONResponse({"error": f"Error ingesting {owner}/{repo}: {e}"}, status_code=500)
+    finally:
+        limiter.release()
+    return JSONResponse(stats, status_code=200 if stats.get("status") == "ok" else 404)
+
+
+async def health(request: Request):
+    assistant = request.app.state.assistant
+    gh = assistant.github_agent
+    return JSONResponse({
+        "status": "ok",
+        "mcp_connected": bool(gh and gh.session is not None),
+        "startup": getattr(assistant, "startup_timeline", []),
+    })
+
+
+async def metrics_endpoint(request: Request):
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+def create_app(assistant: Assistant = None) -> Starlette:
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette):
+        app.state.assistant = assistant or Assistant()
+        app.state.query_limiter = Limiter(API_MAX_CONCURRENCY, API_QUEUE_TIMEOUT)
+        app.state.ingest_limiter = Limiter(1, API_QUEUE_TIMEOUT)
+        await app.state.assistant.start()
+        try:
+            yield
+        finally:
+            await app.state.assistant.close()
+
+    return Starlette(
+        routes=[
+            Route("/query", query, methods=["POST"]),
+            Route("/ingest", ingest, methods=["POST"]),
+            Route("/health", health, methods=["GET"]),
+            Route("/metrics", metrics_endpoint, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless HTTP API for the GitHub AI Assistant.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run(create_app(), host=args.host, port=args.port, timeout_graceful_shutdown=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,31 @@
 import streamlit as st
 import atexit
+import json
+import os
+import uuid
+
+import requests
 
 from utils.github_client import GitHubClient
 from utils.chunking import Chunker
-from utils.embeddings import Embedder
-from utils.embeddings import PineconeVectorStore
-
-from agents.rag import RAGAgent
-from langchain_ollama  import ChatOllama
 
-from agents.orchestrator import Orchestrator
-from agents.github_agent import GitHubMCPAgent
-from agents.github_exec_tool import GitHubExecTool
+from agents.resource_manager import ResourceManager
 
 from utils.query_analysis import QueryAnalyzer
-import asyncio
-from utils.runner_async import AsyncRunner
+from utils.query_classifier import QueryClassifier
+from utils import tracing, metrics
+
+# Con ASSISTANT_API_URL la app es un cliente ligero de api.py; si no, construye el asistente en proceso
+ASSISTANT_API_URL = (os.getenv("ASSISTANT_API_URL") or "").rstrip("/")
+# QUERY_ANALYSIS=1 filtra las preguntas ajenas a GitHub/programación (clasificador local; el LLM solo en los casos dudosos)
+QUERY_ANALYSIS = os.getenv("QUERY_ANALYSIS", "0") == "1"
 
 def init_query_analyzer():
     """Inicializa el analizador de consultas"""
     if 'query_analyzer' not in st.session_state:
-        llm = st.session_state.chat_llm
-        st.session_state.query_analyzer = QueryAnalyzer(llm=llm, logger=streamlit_logger)
+        shared = get_resources().shared
+        classifier = QueryClassifier.from_env(shared.embedder)
+        st.session_state.query_analyzer = QueryAnalyzer(llm=shared.llm, logger=streamlit_logger, classifier=classifier)
     return st.session_state.query_analyzer
 
 st.set_page_config(page_title="GitHub README Processor", page_icon="🐙", layout="wide")
@@ -29,75 +33,85 @@ st.set_page_config(page_title="GitHub README Processor", page_icon="🐙", layou
 def streamlit_logger(msg: str):
     st.info(msg)
 
-st.session_state.chat_llm = ChatOllama(
-            model="qwen2.5:7b-instruct-q4_0",
-            temperature=0.0,
+@st.cache_resource
+def get_resources() -> ResourceManager:
+    """Una por proceso: runner, modelos, vector store y cachés compartidos por todas las sesiones del navegador"""
+    resources = ResourceManager.from_env()
+    atexit.register(resources.shutdown)
+    return resources
 
-            model_kwargs={
-                "num_ctx": 1024,      
-                "num_thread": 4,      
-                "keep_alive": "30s",
-                "num_gpu": 0  
-            }
-        )
+if not ASSISTANT_API_URL:
+    # Endpoint de métricas Prometheus junto a Streamlit (una vez por proceso; METRICS_PORT=0 lo desactiva)
+    metrics.start_http_server()
+
+    # 1) LLM, embedder y vector store: una sola vez por proceso (ver agents/resource_manager.py)
+    shared = get_resources().runner.run(get_resources().start())
+
+    # 2) el servidor MCP, los agentes y el orquestador de la sesión se crean con su primera pregunta
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
 
-# 1) Async runner
-if "runner" not in st.session_state:
-    st.session_state.runner = AsyncRunner()
-
-# 2) GitHub MCP 
-if "github_tool" not in st.session_state:
-    gh = GitHubMCPAgent()
-    try:
-
-        st.session_state.runner.run(gh.connect())
-    except Exception as e:
-        st.warning(f"Could not connect to MCP Server: {e}")
-
-    allowed_tools = {
-        "list_pull_requests", "list_releases", "list_issues", "get_file_contents", "get_pull_request", "get_issue", "get_release_by_tag"
-    }
-    executor = st.session_state.runner.run(
-        gh.build_executor(allowed_tools=allowed_tools, 
-                          model="qwen2.5:7b-instruct-q4_0", 
-                          temperature=0.0, max_iterations=5,
-                          )
-    )
-    st.session_state.gh_client = gh
-    st.session_state.github_tool = GitHubExecTool(executor=executor)
-
-# 3) RAG 
-if "rag_tool" not in st.session_state:
-    rag_tool = RAGAgent(vector_store=PineconeVectorStore(index_name="repo-text-embed-index", dimension=768),
-                        embedder=Embedder(),
-                        llm=st.session_state.chat_llm)
-    st.session_state.rag_tool = rag_tool
-
-# 4) Orchestrator -> build executor 
-if "orchestrator" not in st.session_state:
-    judge_llm = st.session_state.chat_llm
-    orchestrator = Orchestrator(
-        tools=[(st.session_state.github_tool.name, st.session_state.github_tool),
-                (st.session_state.rag_tool.name, st.session_state.rag_tool)
-        ],
-        llm=judge_llm,
-        logger=streamlit_logger,
-        timeout_s=6000.0
-    )
-    st.session_state.orchestrator = orchestrator
-    st.session_state.orch_executor = st.session_state.runner.run(orchestrator.build_orchestrator())
-
-def _cleanup():
-    try:
-        if "gh_client" in st.session_state:
-            st.session_state.runner.run(st.session_state.gh_client.close())
-    finally:
-        if "runner" in st.session_state:
-            st.session_state.runner.stop()
-
-atexit.register(_cleanup)
 st.title("🐙 GitHub AI Assistant")
 
+if not ASSISTANT_API_URL and get_resources().startup_timeline(st.session_state.session_id):
+    with st.sidebar.expander("🚀 Startup timeline", expanded=False):
+        st.table([
+            {"component": row["component"], "start (s)": row["start_s"], "duration (s)": row["duration_s"], "status": row["status"]}
+            for row in get_resources().startup_timeline(st.session_state.session_id)
+        ])
+
+# Desglose de tiempos por etapa (LLM, MCP, embeddings, Pinecone): traza solo las preguntas de esta sesión
+show_timings = not ASSISTANT_API_URL and st.sidebar.checkbox("⏱️ Show timing breakdown", value=False)
+
+
+async def _answer_query(session_id: str, query: str, timings: bool = False):
+    with (tracing.record("query") if timings else tracing.span("query")) as root:
+        async with get_resources().session(session_id) as assistant:
+            result = await assistant.ainvoke(query)
+    return result, root.trace
+
+
+def _api_query(query: str, status) -> str:
+    """Streams /query from api.py, showing each agent step as it arrives."""
+    answer = ""
+    with requests.post(f"{ASSISTANT_API_URL}/query", json={"query": query, "stream": True}, stream=True, timeout=6000) as resp:
+        if resp.status_code != 200:
+            raise RuntimeError(resp.json().get("error", resp.text))
+        for line in resp.iter_lines(decode_unicode=True):
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["type"] == "action":
+                status.write(f"🔧 **{event['tool']}**: {event['input']}")
+            elif event["type"] == "observation":
+                status.write(f"📥 {event['output'][:500]}")
+            elif event["type"] == "final":
+                answer = event["output"]
+            elif event["type"] == "error":
+                raise RuntimeError(event["error"])
+    return answer
+
+
+def _show_timings(spans):
+    rows = tracing.breakdown(spans)
+    if not rows:
+        return
+    with st.expander(f"⏱️ Timing breakdown ({rows[0]['total_ms'] / 1000:.1f} s)", expanded=True):
+        totals = tracing.totals_by_stage(spans)
+        st.bar_chart({"self time (ms)": totals})
+        st.dataframe(
+            [
+                {
+                    "stage": "\u2003" * row["depth"] + row["stage"],
+                    "total ms": row["total_ms"],
+                    "self ms": row["self_ms"],
+                    "details": ", ".join(f"{k}={v}" for k, v in row["attributes"].items()),
+                }
+                for row in rows
+            ],
+            use_container_width=True,
+        )
+
 # === SECTION 1 ===
 st.header("📋 Process README")
 
@@ -110,29 +124,48 @@ with col2:
 if st.button("🚀 Process README", type="primary"):
     if not owner or not repo:
         st.warning("Please enter the owner and the repository name.")
+    elif ASSISTANT_API_URL:
+        with st.spinner("🧠 Processing README in the assistant API..."):
+            try:
+                resp = requests.post(f"{ASSISTANT_API_URL}/ingest", json={"owner": owner, "repo": repo}, timeout=600)
+                stats = resp.json()
+            except Exception as e:
+                stats = {"status": "error", "error": str(e)}
+        if stats.get("status") == "ok":
+            st.success(f"🎉 {stats['chunks']} chunks embedded and saved in Pinecone.")
+            st.session_state.readme_processed = True
+        elif stats.get("status") == "no_readme":
+            st.error("The README could not be downloaded.")
+        else:
+            st.error(f"❌ Error processing the README: {stats.get('error')}")
     else:
         gh_client = GitHubClient()
-        readme = gh_client.fetch_readme(owner, repo)
-        if not readme:
+        try:
+            readme, fetch_error = gh_client.fetch_readme(owner, repo), None
+        except Exception as e:
+            readme, fetch_error = "", e
+        if fetch_error is not None:
+            st.error(f"❌ Error downloading the README: {fetch_error}")
+        elif not readme:
             st.error("The README could not be downloaded.")
         else:
             st.success("✅ README downloaded successfully.")
 
+            embedder = shared.embedder
             with st.spinner("📝 Dividing README into chunks..."):
-                chunker = Chunker(max_tokens=350)
+                chunker = Chunker(max_tokens=min(350, embedder.max_seq_length), model_name=embedder.tokenizer_name)
                 chunks = chunker.chunk(readme, overlap=50)
             st.success(f"📄 README divided into {len(chunks)} chunks.")
 
             with st.spinner("🧠 Calculating embeddings..."):
-                embedder = Embedder()
                 embeddings = embedder.embed_chunks(chunks, normalize=True, return_with_text=True)
             st.success(f"✨ {len(embeddings)} embeddings were calculated.")
 
             try:
                 document = "README"
                 with st.spinner("💾 Registering embeddings in Pinecone..."):
-                    vector_store = PineconeVectorStore(index_name="repo-text-embed-index", dimension=768)
-                    vector_store.upsert_embeddings(embeddings, document, repo)
+                    vector_store = shared.vector_store
+                    vector_store.upsert_embeddings(embeddings, document, f"{owner}/{repo}")
                 st.success("🎉 Embeddings saved in Pinecone successfully.")
                 
                 st.session_state.readme_processed = True
@@ -160,25 +193,35 @@ if send_query_button:
         st.warning("⚠️ Please, write a query.")
     else:
         with st.spinner("🔎 Analyzing query..."):
-            is_relevant = True
+            if QUERY_ANALYSIS and not ASSISTANT_API_URL:
+                analyzer = init_query_analyzer()
+                analysis = analyzer.analyze_query(user_query)
+                is_relevant = analyzer.is_relevant_query(analysis)
+            else:
+                is_relevant = True
         
         if is_relevant:
             st.success("✅ Valid query. Processing...")
             
             with st.spinner("🤖 Searching for answer with the Orchestrator agent..."):
                 try:
-                    
-                    respuesta = st.session_state.runner.run(st.session_state.orch_executor.ainvoke({"input": user_query}, include_run_info=True, return_intermediate_steps=False))
+                    if ASSISTANT_API_URL:
+                        with st.status("🤖 Agent steps", expanded=False) as status:
+                            respuesta, spans = _api_query(user_query, status), []
+                    else:
+                        respuesta, spans = get_resources().runner.run(_answer_query(st.session_state.session_id, user_query, timings=show_timings))
 
                     st.markdown("### 🎯 Answer:")
                     st.write(respuesta["output"] if isinstance(respuesta, dict) else respuesta)
+                    if show_timings:
+                        _show_timings(spans)
                                         
                 except Exception as e:
                     st.error(f"❌ Error processing the query: {str(e)}")
         
-        #else:
+        else:
             # 5. Manejar consulta irrelevante
-            #st.write(analysis["reasoning"] + "\nPlease try with another query related to GitHub code.")
+            st.write(analysis["reasoning"] + "\nPlease try with another query related to GitHub code.")
 
 
 #Footer
@@ -0,0 +1,27 @@
+import csv
+
+
+RESULTS_CSV = "resultados.xlsb.csv"
+
+
+def load_results_csv(path: str = RESULTS_CSV) -> list:
+    """
+    Evaluated queries exported from the results spreadsheet (';'-separated, cp1252).
+    The trailing "Promedios" row with the column averages is skipped.
+    """
+    with open(path, encoding="cp1252", newline="") as f:
+        rows = list(csv.DictReader(f, delimiter=";"))
+    return [row for row in rows if row.get("query") and row["query"].strip() != "Promedios"]
+
+
+def branch_of(row: dict) -> str:
+    """Normalized routing label of a row: "github" or "rag"."""
+    return "rag" if row.get("predicted_branch", "").strip().lower().startswith("rag") else "github"
+
+
+def expected_branch(row: dict) -> str:
+    """Correct route for a row: the predicted branch, flipped when routing_correct is 0."""
+    predicted = branch_of(row)
+    if row.get("routing_correct", "").strip() == "0":
+        return "github" if predicted == "rag" else "rag"
+    return predicted
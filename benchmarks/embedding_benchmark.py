@@ -0,0 +1,102 @@
+"""
+Compare embedding backends: load time, batch throughput, single-query CPU latency and retrieval quality.
+
+Retrieval quality is measured without labels: every chunk loses its first sentence, which becomes
+the query, and the benchmark checks where the source chunk ranks (recall@1, recall@5, MRR).
+
+Usage (from the repository root):
+    python -m benchmarks.embedding_benchmark --readme README.md --readme ../other/README.md
+    python -m benchmarks.embedding_benchmark --config all-MiniLM-L6-v2:sentence-transformers \\
+        --config mpnet-base-nli-matryoshka:sentence-transformers:256
+"""
+import argparse
+import re
+import statistics
+import time
+
+import numpy as np
+
+from utils.chunking import Chunker
+from utils.embeddings import Embedder, index_name_for
+
+
+DEFAULT_CONFIGS = [
+    "all-mpnet-base-v2:sentence-transformers",
+    "all-MiniLM-L6-v2:sentence-transformers",
+    "mpnet-base-nli-matryoshka:sentence-transformers",
+    "mpnet-base-nli-matryoshka:sentence-transformers:256",
+]
+
+
+def parse_config(config: str):
+    parts = config.split(":")
+    model, backend = parts[0], parts[1] if len(parts) > 1 else "sentence-transformers"
+    dim = int(parts[2]) if len(parts) > 2 else None
+    return model, backend, dim
+
+
+def build_eval_set(texts, chunk_tokens: int):
+    chunker = Chunker(max_tokens=chunk_tokens)
+    queries, docs = [], []
+    for text in texts:
+        for chunk in chunker.chunk(text, overlap=0):
+            sentences = re.split(r"(?<=[.!?])\s+|\n+", chunk.strip(), maxsplit=1)
+            if len(sentences) == 2 and len(sentences[0].split()) >= 5 and len(sentences[1].split()) >= 20:
+                queries.append(sentences[0])
+                docs.append(sentences[1])
+    return queries, docs
+
+
+def retrieval_quality(query_vecs: np.ndarray, doc_vecs: np.ndarray):
+    query_vecs = query_vecs / np.linalg.norm(query_vecs, axis=1, keepdims=True)
+    doc_vecs = doc_vecs / np.linalg.norm(doc_vecs, axis=1, keepdims=True)
+    sims = query_vecs @ doc_vecs.T
+    ranks = (sims > sims[np.arange(len(sims)), np.arange(len(sims))][:, None]).sum(axis=1)
+    return float(np.mean(ranks < 1)), float(np.mean(ranks < 5)), float(np.mean(1.0 / (ranks + 1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", action="append", help="model:backend[:truncate_dim], repeatable")
+    parser.add_argument("--readme", action="append", help="README/markdown file used as corpus, repeatable")
+    parser.add_argument("--chunk-tokens", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--latency-queries", type=int, default=50)
+    args = parser.parse_args()
+
+    texts = [open(path, encoding="utf-8").read() for path in (args.readme or ["README.md"])]
+    queries, docs = build_eval_set(texts, args.chunk_tokens)
+    print(f"corpus: {len(docs)} chunks, {len(queries)} queries")
+
+    header = f"{'config':<55}{'dim':>5}{'load s':>8}{'chunks/s':>10}{'p50 ms':>8}{'p95 ms':>8}{'R@1':>7}{'R@5':>7}{'MRR':>7}"
+    print(header)
+    for config in args.config or DEFAULT_CONFIGS:
+        model, backend, dim = parse_config(config)
+
+        start = time.perf_counter()
+        embedder = Embedder(model, backend=backend, truncate_dim=dim, batch_size=args.batch_size)
+        load_s = time.perf_counter() - start
+
+        embedder.embed_chunks(docs[:args.batch_size])  # warm-up
+        start = time.perf_counter()
+        doc_vecs = np.asarray(embedder.embed_chunks(docs))
+        throughput = len(docs) / (time.perf_counter() - start)
+
+        latencies = []
+        for q in (queries * args.latency_queries)[:args.latency_queries]:
+            t0 = time.perf_counter()
+            embedder.embed_chunk(q)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+
+        query_vecs = np.asarray(embedder.embed_chunks(queries))
+        r1, r5, mrr = retrieval_quality(query_vecs, doc_vecs)
+
+        print(f"{config:<55}{embedder.dimension:>5}{load_s:>8.1f}{throughput:>10.1f}"
+              f"{statistics.median(latencies):>8.1f}{p95:>8.1f}{r1:>7.3f}{r5:>7.3f}{mrr:>7.3f}")
+        print(f"{'':<4}-> index: {index_name_for(embedder.model_id)}")
+
+
+if __name__ == "__main__":
+    main()
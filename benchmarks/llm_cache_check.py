@@ -0,0 +1,97 @@
+"""
+Checks that the completion cache (utils/llm_cache.py) answers repeated ReAct agent steps.
+
+Runs the same question twice through an AgentExecutor built like the GitHub agent's
+(create_react_agent + GITHUB_REACT_PROMPT) on the ChatOllama returned by build_chat_llm. Ollama
+is replaced by an in-process HTTP transport that answers with the scripted ReAct policy of
+benchmarks/stub_llm.py, so no model or network is needed. The second run must reach the "model"
+zero times.
+
+    python -m benchmarks.llm_cache_check
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+from langchain.agents import AgentExecutor, create_react_agent
+from langchain.prompts import PromptTemplate
+from langchain.tools import Tool
+
+from agents.prompts import GITHUB_REACT_PROMPT
+from benchmarks.stub_llm import scripted_react_step
+
+
+def fake_ollama_transport(calls: list) -> httpx.MockTransport:
+    """/api/chat answered with the scripted policy; every request is appended to `calls`."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path != "/api/chat":
+            return httpx.Response(404, json={"error": "not found"})
+        body = json.loads(request.content)
+        calls.append(body)
+        prompt = "\n".join(m.get("content") or "" for m in body["messages"])
+        message = {
+            "model": body["model"], "created_at": "2024-01-01T00:00:00Z", "done": True, "done_reason": "stop",
+            "message": {"role": "assistant", "content": scripted_react_step(prompt)},
+            "prompt_eval_count": len(prompt) // 4, "eval_count": 20,
+            "prompt_eval_duration": 1_000_000, "eval_duration": 2_000_000, "load_duration": 0, "total_duration": 3_000_000,
+        }
+        if body.get("stream", True):
+            return httpx.Response(200, content=(json.dumps(message) + "\n").encode("utf-8"))
+        return httpx.Response(200, json=message)
+
+    return httpx.MockTransport(handler)
+
+
+async def run_check(question: str) -> int:
+    from utils.llm import build_chat_llm
+
+    calls: list = []
+    llm = build_chat_llm(
+        model="cache-check", log_timings=False, async_client_kwargs={"transport": fake_ollama_transport(calls)},
+    )
+    if llm.cache is None:
+        print("The completion cache is disabled (LLM_CACHE=0).")
+        return 1
+
+    tools = [
+        Tool(name=name, description=f"{name} of a repository.", func=lambda args, n=name: f"{n}: #12 Fix the parser (open)")
+        for name in ("list_pull_requests", "get_pull_request")
+    ]
+    prompt = PromptTemplate(input_variables=["tools", "tool_names", "input", "agent_scratchpad"], template=GITHUB_REACT_PROMPT)
+    executor = AgentExecutor(agent=create_react_agent(llm, tools, prompt), tools=tools, max_iterations=4, handle_parsing_errors=True)
+
+    runs = []
+    for _ in range(2):
+        before, start = len(calls), time.perf_counter()
+        result = await executor.ainvoke({"input": question})
+        runs.append((len(calls) - before, time.perf_counter() - start, result["output"]))
+
+    for i, (model_calls, seconds, output) in enumerate(runs, 1):
+        print(f"run {i}: {model_calls} model calls, {seconds * 1000:.1f} ms, answer: {output[:80]!r}")
+    if runs[0][0] == 0 or runs[1][0] != 0 or runs[0][2] != runs[1][2]:
+        print("FAIL: the repeated agent steps were not answered from the cache")
+        return 1
+    print("OK: the repeated agent steps were answered from the cache")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check that repeated ReAct agent steps hit the completion cache.")
+    parser.add_argument("--question", default="List the open pull requests of the repository a2aproject/A2A")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        # caché vacía y aislada: no toca la del usuario
+        os.environ["LLM_CACHE"] = "1"
+        os.environ["LLM_CACHE_PATH"] = os.path.join(tmp, "llm_cache.sqlite")
+        code = asyncio.run(run_check(args.question))
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
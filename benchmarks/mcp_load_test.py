@@ -0,0 +1,94 @@
+"""
+Load test of the MCP client path (MCPTool -> session -> server) against the local replay server.
+
+The recorded calls are replayed in round-robin through MCPTool, so output processing and any
+caching layer in MCPTool are exercised, at a target rate with bounded concurrency. Reports
+throughput, latency percentiles and error counts.
+
+Usage (from the repository root, after recording traffic with MCP_RECORD_PATH=recordings/mcp.jsonl):
+    python -m benchmarks.mcp_load_test --recording recordings/mcp.jsonl --requests 2000 --concurrency 32
+    python -m benchmarks.mcp_load_test --recording recordings/mcp.jsonl --qps 200 --latency-ms 50 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from agents.github_agent import GitHubMCPAgent, MCPTool
+from utils.mcp_recording import Recording
+from utils.mcp_replay_server import REPLAY_TOOLS, replay_server_args
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))] if ordered else 0.0
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recording", required=True)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--qps", type=float, default=0.0, help="target request rate (0 = as fast as possible)")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    recording = Recording(args.recording)
+    calls = [event for tool in REPLAY_TOOLS for event in recording.calls_by_tool.get(tool, [])]
+    if not calls:
+        raise SystemExit("The recording has no calls for the replayed tools.")
+
+    gh = GitHubMCPAgent(server_cmd=sys.executable)
+    await gh.connect(args=replay_server_args(
+        args.recording, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate, seed=args.seed
+    ))
+    try:
+        tools = {
+            t["name"]: MCPTool(name=t["name"], description=t["description"] or "", session=gh.session,
+                               mcp_tool_name=t["name"], recorder=None)
+            for t in await gh.list_tools()
+        }
+
+        latencies, errors = [], 0
+        semaphore = asyncio.Semaphore(args.concurrency)
+        interval = 1.0 / args.qps if args.qps else 0.0
+
+        async def one(i: int):
+            nonlocal errors
+            event = calls[i % len(calls)]
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    output = await tools[event["tool"]]._arun(event["args"])
+                    if output.startswith("Error"):
+                        errors += 1
+                except Exception:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        tasks = []
+        for i in range(args.requests):
+            if interval:
+                # planificación de lazo abierto: la tasa no depende de lo que tarden las respuestas
+                await asyncio.sleep(max(0.0, start + i * interval - time.perf_counter()))
+            tasks.append(asyncio.create_task(one(i)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    finally:
+        await gh.close()
+
+    print(f"requests      {args.requests} ({len(calls)} distinct recorded calls)")
+    print(f"concurrency   {args.concurrency}")
+    print(f"throughput    {args.requests / elapsed:.1f} req/s")
+    print(f"latency ms    p50 {percentile(latencies, 0.5):.2f}  p95 {percentile(latencies, 0.95):.2f}  "
+          f"p99 {percentile(latencies, 0.99):.2f}  mean {statistics.mean(latencies):.2f}")
+    print(f"errors        {errors} ({errors / args.requests:.1%})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+"""
+PyTorch (sentence-transformers) vs ONNX Runtime fp32 vs ONNX Runtime dynamic int8 on README-sized batches.
+
+Reports throughput and the numerical distance of each ONNX path to the PyTorch embeddings.
+
+Usage (from the repository root):
+    python -m benchmarks.onnx_benchmark --model all-mpnet-base-v2 --threads 4 --readme README.md
+"""
+import argparse
+import time
+
+import numpy as np
+
+from utils.chunking import Chunker
+from utils.embeddings import Embedder
+
+
+def timed_embed(embedder: Embedder, chunks, repeats: int):
+    embedder.embed_chunks(chunks[:embedder.batch_size])  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        vectors = np.asarray(embedder.embed_chunks(chunks))
+    return vectors, len(chunks) * repeats / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="all-mpnet-base-v2")
+    parser.add_argument("--readme", action="append", help="README/markdown file used as corpus, repeatable")
+    parser.add_argument("--chunk-tokens", type=int, default=350, help="same size app.py uses when processing a README")
+    parser.add_argument("--threads", type=int, default=None, help="intra-op threads for both runtimes")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = [open(path, encoding="utf-8").read() for path in (args.readme or ["README.md"])]
+    chunker = Chunker(max_tokens=args.chunk_tokens)
+    chunks = [c for text in texts for c in chunker.chunk(text, overlap=50)]
+    print(f"model={args.model} chunks={len(chunks)} chunk_tokens={args.chunk_tokens} threads={args.threads}")
+
+    reference = None
+    print(f"{'backend':<24}{'chunks/s':>10}{'speedup':>9}{'min cos':>10}{'max |diff|':>12}")
+    for backend in ("sentence-transformers", "onnx", "onnx-int8"):
+        embedder = Embedder(args.model, backend=backend, batch_size=args.batch_size, num_threads=args.threads)
+        vectors, throughput = timed_embed(embedder, chunks, args.repeats)
+
+        if reference is None:
+            reference, base_throughput = vectors, throughput
+        a = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+        b = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        min_cos = float((a * b).sum(axis=1).min())
+        max_diff = float(np.abs(reference - vectors).max())
+
+        print(f"{backend:<24}{throughput:>10.1f}{throughput / base_throughput:>9.2f}{min_cos:>10.5f}{max_diff:>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Memory and recall@k of the quantized vector store against exact float32 search.
+
+Usage (from the repository root):
+    python -m benchmarks.quantization_benchmark --n 200000 --dim 768 --queries 200
+    python -m benchmarks.quantization_benchmark --vectors embeddings.npy
+"""
+import argparse
+import time
+
+import numpy as np
+
+from utils.quantized_store import QuantizedVectorStore
+
+
+def synthetic_corpus(n: int, dim: int, n_clusters: int = 256, seed: int = 0) -> np.ndarray:
+    # embeddings reales se agrupan por tema; un corpus de clusters gaussianos se parece más que ruido uniforme
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, size=n)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def recall_at_k(found: list, expected: set) -> float:
+    return len(set(found) & expected) / max(len(expected), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=100000, help="number of corpus vectors")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--vectors", help="optional .npy file with real embeddings (queries are sampled from it)")
+    parser.add_argument("--storage-dir", help="keep re-scoring vectors memory-mapped in this directory")
+    args = parser.parse_args()
+
+    if args.vectors:
+        corpus = np.load(args.vectors).astype(np.float32)
+        corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    else:
+        corpus = synthetic_corpus(args.n, args.dim)
+    n, dim = corpus.shape
+
+    rng = np.random.default_rng(1)
+    queries = corpus[rng.choice(n, size=args.queries, replace=False)]
+    queries = queries + 0.3 * rng.standard_normal(queries.shape).astype(np.float32)
+
+    ids = [str(i) for i in range(n)]
+    exact = QuantizedVectorStore(dimension=dim, mode="float32")
+    exact.add(corpus, ids=ids)
+    truth = [{m["id"] for m in exact.query(q, top_k=args.k)} for q in queries]
+
+    print(f"corpus={n} dim={dim} queries={args.queries} k={args.k} rescore_factor={args.rescore_factor}")
+    print(f"{'mode':<10}{'rescore':<9}{'RAM MB':>9}{'ratio':>8}{'recall@k':>10}{'ms/query':>10}")
+
+    float_bytes = exact.memory_usage()["codes_bytes"]
+    configs = [("float32", False), ("int8", False), ("int8", True), ("binary", False), ("binary", True)]
+    stores = {}
+    for mode, rescore in configs:
+        if mode not in stores:
+            store = QuantizedVectorStore(dimension=dim, mode=mode, rescore_factor=args.rescore_factor,
+                                         storage_dir=args.storage_dir if mode != "float32" else None)
+            store.add(corpus, ids=ids)
+            stores[mode] = store
+        store = stores[mode]
+
+        usage = store.memory_usage()
+        ram = usage["codes_bytes"] + usage["rescore_ram_bytes"] if rescore else usage["codes_bytes"]
+
+        start = time.perf_counter()
+        results = [store.query(q, top_k=args.k, rescore=rescore) for q in queries]
+        elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        recall = np.mean([recall_at_k([m["id"] for m in r], t) for r, t in zip(results, truth)])
+        print(f"{mode:<10}{str(rescore):<9}{ram / 2**20:>9.1f}{float_bytes / ram:>8.1f}{recall:>10.3f}{elapsed_ms:>10.2f}")
+
+    for store in stores.values():
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
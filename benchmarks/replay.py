@@ -0,0 +1,262 @@
+"""
+Offline replay of the evaluated queries against the Orchestrator / GitHubMCPAgent stack.
+
+MCP responses come from a recording (utils/mcp_recording.py format) and the LLM is either the
+deterministic ScriptedReActLLM or completions recorded from a real model (--llm-recording), so
+runs are reproducible and need neither Docker, GITHUB_TOKEN nor Ollama. Per query it reports
+latency, LLM calls, prompt tokens, MCP tool calls and the quality columns of resultados.xlsb.csv,
+plus p50/p95 latency over the run.
+
+With --baseline (a report written earlier with --output) the run fails with exit code 1 when
+p95 latency, mean LLM calls, mean tool calls or mean prompt tokens grow more than --max-regression.
+
+benchmarks/fixtures/ holds a small recording of the seven allowed tools on a2aproject/A2A and
+the questions it answers, so the benchmark runs out of the box; record your own traffic with
+MCP_RECORD_PATH (see MCPRecorder) to cover the spreadsheet queries.
+
+Usage (from the repository root):
+    python -m benchmarks.replay --recordings benchmarks/fixtures/mcp_sample.jsonl --queries benchmarks/fixtures/queries_sample.jsonl
+    python -m benchmarks.replay --recordings recordings/mcp.jsonl --output replay.json
+    python -m benchmarks.replay --recordings recordings/mcp.jsonl --baseline replay.json --max-regression 0.1
+    python -m benchmarks.replay --recordings recordings/mcp.jsonl --mode github --replay-latency
+"""
+import argparse
+import asyncio
+import csv
+import json
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from agents.github_agent import GitHubMCPAgent
+from agents.github_exec_tool import GitHubExecTool
+from agents.orchestrator import Orchestrator
+from agents.rag import RAGAgent
+from benchmarks.datasets import load_results_csv, branch_of, expected_branch
+from benchmarks.stub_llm import HashingEmbedder, RecordedChatModel, ScriptedReActLLM, prompt_text
+from utils.mcp_recording import Recording, RecordedSession
+from utils.quantized_store import QuantizedVectorStore
+from utils.tracing import TracingCallback
+
+
+ALLOWED_TOOLS = {
+    "list_pull_requests", "list_releases", "list_issues", "get_file_contents", "get_pull_request", "get_issue", "get_release_by_tag"
+}
+QUALITY_COLUMNS = (
+    "routing_correct", "tool_calls_count", "tool_args_correctness_0_3", "tool_sequence_optimality_0_3",
+    "task_success_0_1", "hallucination_0_1",
+)
+# métricas comparadas contra la línea base (más alto = peor)
+REGRESSION_METRICS = ("latency_p95_ms", "llm_calls_mean", "tool_calls_mean", "prompt_tokens_mean")
+
+try:
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count_tokens(text: str) -> int:
+        return len(_encoding.encode(text))
+except ImportError:
+    def count_tokens(text: str) -> int:
+        return len(text) // 4 + 1  # ~4 caracteres por token
+
+
+class UsageCallback(BaseCallbackHandler):
+    """Counts LLM calls and prompt tokens of every completion made by the model it is attached to."""
+
+    def __init__(self):
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+
+    def reset(self):
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs) -> None:
+        self.llm_calls += 1
+        self.prompt_tokens += count_tokens(prompt_text(messages[0]))
+
+    def on_llm_start(self, serialized, prompts, **kwargs) -> None:
+        self.llm_calls += 1
+        self.prompt_tokens += count_tokens(prompts[0])
+
+
+def load_queries(path: Optional[str]) -> List[Dict]:
+    """Rows of resultados.xlsb.csv, or of a JSONL file with at least a "query" field per line."""
+    if path is None:
+        return load_results_csv()
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def build_vector_store(embedder, readme_paths: List[str]) -> QuantizedVectorStore:
+    """Indexes README files split by paragraph (Chunker would need the tokenizer download)."""
+    store = QuantizedVectorStore(dimension=embedder.dimension, mode="float32")
+    for path in readme_paths:
+        with open(path, encoding="utf-8") as f:
+            chunks = [p.strip() for p in f.read().split("\n\n") if p.strip()]
+        store.upsert_embeddings(embedder.embed_chunks(chunks, return_with_text=True), document="README", repo=path)
+    return store
+
+
+async def build_stack(args, session: RecordedSession, llm):
+    """Same wiring as app.py with the recorded session, the stub LLM and the hashing embedder."""
+    embedder = HashingEmbedder()
+    gh = GitHubMCPAgent()
+    gh.session = session
+    github_executor = await gh.build_executor(
+        allowed_tools=ALLOWED_TOOLS, llm=llm, max_iterations=5,
+        top_n_tools=args.top_n_tools, embedder=embedder,
+    )
+    if args.mode == "github":
+        return github_executor
+
+    github_tool = GitHubExecTool(executor=github_executor)
+    rag_tool = RAGAgent(embedder=embedder, vector_store=build_vector_store(embedder, args.readme), llm=llm)
+    orchestrator = Orchestrator(
+        tools=[("GitHubAgent", github_tool), ("RAGAgent", rag_tool)], llm=llm, logger=lambda msg: None,
+        mode=args.orchestrator_mode,
+    )
+    await orchestrator.build_orchestrator()
+    return orchestrator
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def summarize(rows: List[Dict]) -> Dict:
+    latencies = [r["latency_ms"] for r in rows]
+    return {
+        "queries": len(rows),
+        "errors": sum(1 for r in rows if r["error"]),
+        "latency_p50_ms": round(percentile(latencies, 0.50), 2),
+        "latency_p95_ms": round(percentile(latencies, 0.95), 2),
+        "llm_calls_mean": round(statistics.mean(r["llm_calls"] for r in rows), 3),
+        "tool_calls_mean": round(statistics.mean(r["tool_calls"] for r in rows), 3),
+        "prompt_tokens_mean": round(statistics.mean(r["prompt_tokens"] for r in rows), 1),
+    }
+
+
+def check_regressions(summary: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    failures = []
+    for metric in REGRESSION_METRICS:
+        before, after = baseline.get(metric), summary.get(metric)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        if change > max_regression:
+            failures.append(f"{metric}: {before} -> {after} (+{change:.0%}, limit +{max_regression:.0%})")
+    return failures
+
+
+async def run(args) -> Dict:
+    session = RecordedSession(Recording(args.recordings), replay_latency=args.replay_latency, latency_scale=args.latency_scale)
+    usage = UsageCallback()
+    llm = RecordedChatModel.from_file(args.llm_recording) if args.llm_recording else ScriptedReActLLM()
+    llm.callbacks = [usage, TracingCallback()]  # spans "llm" con TRACE_FILE, como build_chat_llm
+    executor = await build_stack(args, session, llm)
+
+    queries = load_queries(args.queries)
+    if args.mode == "github":
+        queries = [q for q in queries if "predicted_branch" not in q or expected_branch(q) == "github"]
+    queries = queries[:args.limit]
+
+    rows = []
+    for entry in queries:
+        usage.reset()
+        calls_before, misses_before = session.calls, session.misses
+        error = ""
+        start = time.perf_counter()
+        try:
+            await executor.ainvoke({"input": entry["query"]})
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        row = {
+            "query": entry["query"],
+            "latency_ms": round(latency_ms, 2),
+            "llm_calls": usage.llm_calls,
+            "prompt_tokens": usage.prompt_tokens,
+            "tool_calls": session.calls - calls_before,
+            "replay_misses": session.misses - misses_before,
+            "error": error,
+            "recorded_branch": branch_of(entry) if "predicted_branch" in entry else "",
+        }
+        row.update({col: entry.get(col, "") for col in QUALITY_COLUMNS})
+        rows.append(row)
+
+    report = {"summary": summarize(rows), "queries": rows}
+    if isinstance(llm, RecordedChatModel):
+        report["summary"]["llm_replay_hits"] = llm.hits
+        report["summary"]["llm_replay_misses"] = llm.misses
+    return report
+
+
+def write_report(report: Dict, path: str) -> None:
+    if path.endswith(".csv"):
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(report["queries"][0]), delimiter=";")
+            writer.writeheader()
+            writer.writerows(report["queries"])
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def print_report(report: Dict) -> None:
+    print(f"{'query':<50}{'ms':>9}{'LLM':>5}{'tools':>6}{'prompt tok':>11}{'miss':>5}{'task':>5}")
+    for row in report["queries"]:
+        query = row["query"][:47] + "..." if len(row["query"]) > 50 else row["query"]
+        print(f"{query:<50}{row['latency_ms']:>9.1f}{row['llm_calls']:>5}{row['tool_calls']:>6}"
+              f"{row['prompt_tokens']:>11}{row['replay_misses']:>5}{row['task_success_0_1']:>5}")
+    print()
+    for key, value in report["summary"].items():
+        print(f"{key:<22}{value}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recordings", required=True, help="JSONL with the recorded MCP tool list and calls")
+    parser.add_argument("--llm-recording", default=None, help="JSONL of LLM completions (LLMOutputRecorder); stub LLM otherwise")
+    parser.add_argument("--queries", default=None, help="JSONL with a 'query' field per line (default: resultados.xlsb.csv)")
+    parser.add_argument("--readme", action="append", default=[], help="README file indexed for the RAG agent (repeatable)")
+    parser.add_argument("--mode", choices=("orchestrator", "github"), default="orchestrator")
+    parser.add_argument("--orchestrator-mode", choices=("react", "direct"), default="direct",
+                        help="direct: routed questions skip the orchestrator's ReAct loop (see agents/router.py)")
+    parser.add_argument("--top-n-tools", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--replay-latency", action="store_true", help="sleep for the recorded duration of every MCP call")
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--output", default=None, help="write the report as .json or .csv")
+    parser.add_argument("--baseline", default=None, help="JSON report of a previous run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed relative increase (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = await run(args)
+    print_report(report)
+    if args.output:
+        write_report(report, args.output)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["summary"]
+        failures = check_regressions(report["summary"], baseline, args.max_regression)
+        if failures:
+            print("\nRegressions against the baseline:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
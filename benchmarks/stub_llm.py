@@ -0,0 +1,208 @@
+"""
+Deterministic stand-ins for the LLM and the embedder, so the agent stack can run offline.
+
+ScriptedReActLLM follows a fixed ReAct policy driven by keywords of the question: it routes in the
+orchestrator prompt, picks a tool and its arguments in the GitHub agent prompt, and answers with the
+last observation. RecordedChatModel replays completions captured from a real model
+(LLMOutputRecorder), falling back to the scripted policy for unseen prompts.
+"""
+import hashlib
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+def prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(m.content) for m in messages)
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+_REPO = re.compile(r"(?:\b(?:in|of|from|repository|repo)\s+)([\w.-]+)/([\w.-]+)", re.IGNORECASE)
+_ANY_REPO = re.compile(r"\b([\w-]+)/([\w.-]+)")
+_PATH = re.compile(r"\b((?:[\w.-]+/)*[\w-]+\.[A-Za-z]{1,5})\b")
+_TAG = re.compile(r"\b(v\d+(?:\.\d+)*(?:[-\w.]*)?)\b")
+_NUMBER = re.compile(r"#\s*(\d+)")
+_GITHUB_HINTS = re.compile(r"pull request|\bprs?\b|issue|release|\bfile\b|fetch|commit|\btag\b|#\d+|\.\w{1,5}\b", re.IGNORECASE)
+
+
+def _question_and_scratchpad(prompt: str):
+    idx = prompt.rfind("\nQuestion: ")
+    tail = prompt[idx + len("\nQuestion: "):] if idx != -1 else prompt
+    question, _, scratchpad = tail.partition("\nThought:")
+    return question.strip(), scratchpad
+
+
+def _tool_names(prompt: str) -> List[str]:
+    match = re.search(r"\[([^\[\]]+)\]", prompt)
+    return [name.strip() for name in match.group(1).split(",")] if match else []
+
+
+def _repo(question: str):
+    match = _REPO.search(question) or _ANY_REPO.search(question)
+    return (match.group(1), match.group(2).rstrip(".,")) if match else (None, None)
+
+
+def _action(tool: str, tool_input: Any, thought: str) -> str:
+    if not isinstance(tool_input, str):
+        tool_input = json.dumps(tool_input)
+    return f"Thought: {thought}\nAction: {tool}\nAction Input: {tool_input}"
+
+
+def _final(observation: str) -> str:
+    return f"Thought: I now know the final answer\nFinal Answer: {observation.strip()[:1500]}"
+
+
+def scripted_react_step(prompt: str) -> str:
+    # prompt de RAGAgent: responde con el primer fragmento del contexto
+    if "\nContext:\n" in prompt and prompt.rstrip().endswith("Answer:"):
+        context = prompt.split("\nContext:\n", 1)[1].split("\n\nQuestion:", 1)[0]
+        return context.split("\n---\n")[0].strip()[:500] or "I don't have enough information."
+
+    question, scratchpad = _question_and_scratchpad(prompt)
+    tools = _tool_names(prompt)
+    observations = re.findall(r"Observation: (.*?)(?=\nThought:|\Z)", scratchpad, re.DOTALL)
+    actions = re.findall(r"Action: (\S+)", scratchpad)
+
+    # prompt del orquestador
+    if "GitHubAgent" in tools or "RAGAgent" in tools:
+        if observations:
+            return _final(observations[-1])
+        route = "GitHubAgent" if _GITHUB_HINTS.search(question) and "GitHubAgent" in tools else "RAGAgent"
+        return _action(route, question, f"The question should be answered with {route}.")
+
+    # prompt del agente de GitHub
+    owner, repo = _repo(question)
+    q = question.lower()
+    if observations:
+        last_action = actions[-1] if actions else ""
+        wants_detail = any(w in q for w in ("last", "latest")) and any(w in q for w in ("summar", "detail", "explain", "consist"))
+        number = _NUMBER.search(observations[-1])
+        follow_up = {"list_pull_requests": ("get_pull_request", "pullNumber"), "list_issues": ("get_issue", "issue_number")}
+        if wants_detail and last_action in follow_up and number and len(actions) == 1:
+            tool, arg = follow_up[last_action]
+            if tool in tools:
+                return _action(tool, {"owner": owner, "repo": repo, arg: int(number.group(1))}, "I need the details of the most recent item.")
+        return _final(observations[-1])
+
+    args: Dict[str, Any] = {"owner": owner, "repo": repo}
+    number = _NUMBER.search(question)
+    tag = _TAG.search(question)
+    paths = [p for p in _PATH.findall(question) if p != f"{owner}/{repo}" and not p.endswith(repo or "\0")]
+    if "release" in q and tag:
+        tool, args["tag"] = "get_release_by_tag", tag.group(1)
+    elif "release" in q:
+        tool = "list_releases"
+    elif ("pull request" in q or "pr " in q) and number:
+        tool, args["pullNumber"] = "get_pull_request", int(number.group(1))
+    elif "issue" in q and number:
+        tool, args["issue_number"] = "get_issue", int(number.group(1))
+    elif "issue" in q:
+        tool = "list_issues"
+        if "open" in q:
+            args["state"] = "OPEN"
+    elif paths:
+        tool, args["path"] = "get_file_contents", paths[0]
+    else:
+        tool = "list_pull_requests"
+        if "open" in q:
+            args["state"] = "open"
+
+    if tools and tool not in tools:
+        tool = tools[0]
+    return _action(tool, args, f"I should use {tool}.")
+
+
+class ScriptedReActLLM(BaseChatModel):
+    """Chat model that answers every ReAct step with `scripted_react_step`."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-react"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        text = self._complete(prompt_text(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _complete(self, prompt: str) -> str:
+        return scripted_react_step(prompt)
+
+
+class RecordedChatModel(ScriptedReActLLM):
+    """Replays completions by prompt hash from a JSONL file written by LLMOutputRecorder."""
+
+    outputs: Dict[str, str] = {}
+    hits: int = 0
+    misses: int = 0
+
+    @classmethod
+    def from_file(cls, path: str) -> "RecordedChatModel":
+        outputs = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    outputs[entry["prompt_sha256"]] = entry["output"]
+        return cls(outputs=outputs)
+
+    @property
+    def _llm_type(self) -> str:
+        return "recorded"
+
+    def _complete(self, prompt: str) -> str:
+        output = self.outputs.get(prompt_hash(prompt))
+        if output is None:
+            self.misses += 1
+            return scripted_react_step(prompt)
+        self.hits += 1
+        return output
+
+
+class LLMOutputRecorder(BaseCallbackHandler):
+    """Callback that appends {prompt_sha256, output} for every chat completion of a real model."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._prompts: Dict[Any, str] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        self._prompts[run_id] = prompt_text(messages[0])
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        prompt = self._prompts.pop(run_id, None)
+        if prompt is None:
+            return
+        output = response.generations[0][0].text
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"prompt_sha256": prompt_hash(prompt), "output": output}, ensure_ascii=False) + "\n")
+
+
+class HashingEmbedder:
+    """Bag-of-words hashing embedder with the Embedder interface (no model download)."""
+
+    def __init__(self, dimension: int = 256):
+        self.dimension = dimension
+
+    def embed_chunk(self, text: str) -> List[float]:
+        vec = np.zeros(self.dimension, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            vec[int(hashlib.md5(token.encode()).hexdigest()[:8], 16) % self.dimension] += 1.0
+        norm = np.linalg.norm(vec)
+        return (vec / norm if norm else vec).tolist()
+
+    def embed_chunks(self, chunks, normalize: bool = False, return_with_text: bool = False):
+        texts = [c["text"] if isinstance(c, dict) else c for c in chunks]
+        vectors = [self.embed_chunk(t) for t in texts]
+        if return_with_text:
+            return [{"text": t, "embedding": v} for t, v in zip(texts, vectors)]
+        return vectors
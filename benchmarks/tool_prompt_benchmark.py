@@ -0,0 +1,92 @@
+"""
+Prompt size and latency of the GitHub agent with full vs. compact tool schemas and per-query tool selection.
+
+Without --run only the first-turn prompt is rendered and its tokens counted (tiktoken cl100k_base,
+an approximation of the qwen tokenizer). With --run every query is executed end to end against
+Ollama and the MCP server, and the real prefill tokens reported by Ollama are summed.
+
+Usage (from the repository root, GITHUB_TOKEN set and Docker running):
+    python -m benchmarks.tool_prompt_benchmark
+    python -m benchmarks.tool_prompt_benchmark --run --limit 5 --model qwen2.5:7b-instruct-q4_0
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import tiktoken
+from langchain.tools.render import render_text_description
+
+from agents.github_agent import GitHubMCPAgent
+from agents.prompts import GITHUB_REACT_PROMPT
+from agents.tool_selection import ToolSelectingExecutor
+from benchmarks.datasets import load_results_csv, expected_branch
+from utils.embeddings import Embedder
+from utils.llm import build_chat_llm, LLMTimingCallback
+
+
+ALLOWED_TOOLS = {
+    "list_pull_requests", "list_releases", "list_issues", "get_file_contents", "get_pull_request", "get_issue", "get_release_by_tag"
+}
+
+
+def first_turn_prompt(executor, query: str) -> str:
+    tools = executor.selector.select(query, executor.top_n) if isinstance(executor, ToolSelectingExecutor) else executor.tools
+    return GITHUB_REACT_PROMPT.format(
+        tools=render_text_description(list(tools)),
+        tool_names=", ".join(t.name for t in tools),
+        input=query,
+        agent_scratchpad="",
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="qwen2.5:7b-instruct-q4_0")
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=None, help="number of GitHub queries to use")
+    parser.add_argument("--run", action="store_true", help="execute the queries end to end")
+    args = parser.parse_args()
+
+    queries = [row["query"] for row in load_results_csv() if expected_branch(row) == "github"][:args.limit]
+    encoding = tiktoken.get_encoding("cl100k_base")
+    embedder = Embedder()
+    timings = LLMTimingCallback(logger=lambda msg: None)
+    llm = build_chat_llm(args.model, callbacks=[timings], log_timings=False)
+
+    gh = GitHubMCPAgent()
+    await gh.connect()
+    configs = [("full", None), ("compact", None), ("compact", args.top_n)]
+    try:
+        print(f"{len(queries)} queries")
+        print(f"{'config':<22}{'prompt tok':>11}{'prefill tok':>12}{'LLM calls':>10}{'p50 s':>8}{'mean s':>8}")
+        for style, top_n in configs:
+            executor = await gh.build_executor(
+                allowed_tools=ALLOWED_TOOLS, model=args.model, max_iterations=5, llm=llm,
+                schema_style=style, top_n_tools=top_n, embedder=embedder,
+            )
+            prompt_tokens = statistics.mean(len(encoding.encode(first_turn_prompt(executor, q))) for q in queries)
+
+            prefill, calls, latencies = "-", "-", []
+            if args.run:
+                timings.turns.clear()
+                for q in queries:
+                    start = time.perf_counter()
+                    try:
+                        await executor.ainvoke({"input": q})
+                    except Exception as e:
+                        print(f"  error on '{q[:40]}...': {e}")
+                    latencies.append(time.perf_counter() - start)
+                prefill = sum(t["prompt_tokens"] for t in timings.turns) // len(queries)
+                calls = f"{len(timings.turns) / len(queries):.1f}"
+
+            name = f"{style}" + (f"+top{top_n}" if top_n else "")
+            p50 = f"{statistics.median(latencies):.1f}" if latencies else "-"
+            mean = f"{statistics.mean(latencies):.1f}" if latencies else "-"
+            print(f"{name:<22}{prompt_tokens:>11.0f}{prefill:>12}{calls:>10}{p50:>8}{mean:>8}")
+    finally:
+        await gh.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,165 @@
+"""
+Batch README ingestion for many repositories.
+
+Repositories are sharded across a process pool; every worker loads the embedding model once and
+runs the same fetch -> chunk -> embed -> upsert stages as the Streamlit app. Finished repositories
+are appended to a checkpoint file, so an interrupted run resumes where it stopped.
+
+Usage:
+    python ingest_repos.py repos.txt --workers 4
+    python ingest_repos.py facebook/react vercel/next.js --checkpoint ingest.jsonl
+
+`repos.txt` holds one owner/repo per line (blank lines and lines starting with # are ignored).
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+from collections import defaultdict
+
+from utils.embedding_backends import model_spec
+
+
+_pipeline = None
+
+
+def _init_worker(config: dict):
+    global _pipeline
+
+    # un hilo de cómputo por núcleo asignado: sin esto los workers compiten por los mismos núcleos
+    # y el escalado deja de ser lineal
+    threads = str(config["threads_per_worker"])
+    os.environ["OMP_NUM_THREADS"] = threads
+    os.environ["MKL_NUM_THREADS"] = threads
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    from utils.embeddings import Embedder, PineconeVectorStore
+    from utils.ingestion import ReadmeIngestionPipeline
+
+    embedder = Embedder(
+        config["model"],
+        backend=config["backend"],
+        truncate_dim=config["dim"],
+        num_threads=config["threads_per_worker"],
+    )
+    _pipeline = ReadmeIngestionPipeline(embedder, PineconeVectorStore.for_embedder(embedder))
+
+
+def _ingest_one(full_name: str) -> dict:
+    start = time.perf_counter()
+    owner, repo = full_name.split("/", 1)
+    try:
+        stats = _pipeline.ingest(owner, repo)
+    except Exception as e:
+        stats = {"repo": full_name, "status": "error", "error": str(e), "chunks": 0, "timings": {}}
+    stats["worker"] = os.getpid()
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+
+def read_repos(sources: list) -> list:
+    repos = []
+    for source in sources:
+        if os.path.isfile(source):
+            with open(source, encoding="utf-8") as f:
+                lines = [line.strip() for line in f]
+            repos.extend(line for line in lines if line and not line.startswith("#"))
+        else:
+            repos.append(source.strip())
+
+    seen, unique = set(), []
+    for repo in repos:
+        if repo.count("/") != 1:
+            print(f"[ingest] Skipping invalid repository name: {repo}")
+        elif repo.lower() not in seen:
+            seen.add(repo.lower())
+            unique.append(repo)
+    return unique
+
+
+def load_checkpoint(path: str, retry_failed: bool) -> set:
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # última línea truncada por una interrupción
+            if entry.get("status") != "error" or not retry_failed:
+                done.add(entry["repo"].lower())
+    return done
+
+
+def print_worker_report(per_worker: dict, wall_s: float):
+    total_repos = sum(w["repos"] for w in per_worker.values())
+    total_chunks = sum(w["chunks"] for w in per_worker.values())
+    print("\nworker      repos  chunks   busy s  chunks/s  embed s")
+    for pid, w in sorted(per_worker.items()):
+        rate = w["chunks"] / w["busy"] if w["busy"] else 0.0
+        print(f"{pid:<10}{w['repos']:>7}{w['chunks']:>8}{w['busy']:>9.1f}{rate:>10.1f}{w['embed']:>9.1f}")
+    print(f"total: {total_repos} repos, {total_chunks} chunks in {wall_s:.1f}s "
+          f"({total_repos / wall_s:.2f} repos/s, {total_chunks / wall_s:.1f} chunks/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("repos", nargs="+", help="owner/repo names or files with one per line")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="intra-op threads per worker (default: cores / workers)")
+    parser.add_argument("--checkpoint", default="ingest_checkpoint.jsonl")
+    parser.add_argument("--retry-failed", action="store_true", help="re-run repositories that ended in error")
+    parser.add_argument("--model", default=os.getenv("EMBEDDING_MODEL", "all-mpnet-base-v2"))
+    parser.add_argument("--backend", default=os.getenv("EMBEDDING_BACKEND", "sentence-transformers"))
+    parser.add_argument("--dim", type=int, default=int(os.environ["EMBEDDING_DIM"]) if os.getenv("EMBEDDING_DIM") else None)
+    args = parser.parse_args()
+
+    repos = read_repos(args.repos)
+    done = load_checkpoint(args.checkpoint, args.retry_failed)
+    pending = [r for r in repos if r.lower() not in done]
+    print(f"[ingest] {len(repos)} repositories, {len(repos) - len(pending)} already in checkpoint, {len(pending)} pending")
+    if not pending:
+        return
+
+    workers = max(1, min(args.workers, len(pending)))
+    config = {
+        "model": args.model,
+        "backend": args.backend,
+        "dim": args.dim,
+        "threads_per_worker": args.threads_per_worker or max(1, (os.cpu_count() or 1) // workers),
+    }
+
+    # el índice se crea una sola vez aquí para que los workers no compitan creándolo
+    dimension = args.dim or model_spec(args.model)["dimension"]
+    if dimension:
+        from utils.embeddings import PineconeVectorStore, index_name_for, model_id_for
+        PineconeVectorStore(index_name=index_name_for(model_id_for(args.model, dimension)), dimension=dimension)
+
+    per_worker = defaultdict(lambda: {"repos": 0, "chunks": 0, "busy": 0.0, "embed": 0.0})
+    start = time.perf_counter()
+    # spawn: cada worker arranca limpio (torch y los clientes gRPC no son seguros tras fork)
+    ctx = mp.get_context("spawn")
+    with ctx.Pool(workers, initializer=_init_worker, initargs=(config,)) as pool, \
+            open(args.checkpoint, "a", encoding="utf-8") as checkpoint:
+        for i, stats in enumerate(pool.imap_unordered(_ingest_one, pending), start=1):
+            checkpoint.write(json.dumps(stats) + "\n")
+            checkpoint.flush()
+
+            w = per_worker[stats["worker"]]
+            w["repos"] += 1
+            w["chunks"] += stats["chunks"]
+            w["busy"] += stats["elapsed"]
+            w["embed"] += stats["timings"].get("embed", 0.0)
+
+            detail = f" ({stats['error']})" if stats["status"] == "error" else ""
+            print(f"[ingest] {i}/{len(pending)} {stats['repo']}: {stats['status']}, "
+                  f"{stats['chunks']} chunks in {stats['elapsed']:.1f}s{detail}")
+
+    print_worker_report(per_worker, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
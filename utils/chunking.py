@@ -1,6 +1,8 @@
 from typing import List, Union
 from transformers import AutoTokenizer
 
+from utils import tracing
+
 
 class Chunker:
     def __init__(self, max_tokens: int = 800, model_name: str = "sentence-transformers/all-mpnet-base-v2"):
@@ -17,6 +19,12 @@ class Chunker:
         overlap: int = 0,
         return_metadata: bool = False
     ) -> Union[List[str], List[dict]]:
+        with tracing.span("chunker.chunk", chars=len(text), max_tokens=self.max_tokens) as s:
+            chunks = self._chunk(text, overlap, return_metadata)
+            s.set_attribute("chunks", len(chunks))
+        return chunks
+
+    def _chunk(self, text: str, overlap: int, return_metadata: bool) -> Union[List[str], List[dict]]:
         token_ids = self.tokenizer.encode(text, add_special_tokens=False)
         chunks: List[Union[str, dict]] = []
         i = 0
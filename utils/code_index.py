@@ -0,0 +1,483 @@
+"""
+Symbol index of a repository's source code, so the agent can read one function instead of whole files.
+
+The source tree is pulled once as a single tarball (GitHubClient.fetch_source_tree). Each file
+is split into definitions: Python through `ast`, other languages through per-language regexes
+with brace matching. The index is stored in SQLite with three parts:
+- every file path;
+- every definition (name, qualified name, kind, line range and code);
+- an embedding of each definition, used for questions that do not name a symbol.
+
+    index = CodeIndex.from_env(embedder)
+    index.index_repo("vercel", "next.js")
+    print(index.lookup("vercel/next.js", symbol="renderToHTML"))
+
+index_repo blocks for as long as the download, parsing and embedding take (minutes for large
+repositories), so the agent tool only calls index_in_background, which builds the index on one
+worker thread. Repositories over CODE_INDEX_MAX_MB compressed or CODE_INDEX_MAX_FILES source
+files are not indexed.
+
+Usage:
+    python -m utils.code_index vercel/next.js [--ref canary] [--force]
+
+Environment:
+    CODE_INDEX_PATH       SQLite file (default ~/.cache/github-ai-assistant/code_index.sqlite)
+    CODE_INDEX_MAX_MB     largest compressed tarball that is indexed (default 200)
+    CODE_INDEX_MAX_FILES  most source files that are indexed (default 20000)
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import argparse
+import ast
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from utils import tracing
+
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "github-ai-assistant", "code_index.sqlite")
+
+LANGUAGES = {
+    ".py": "python",
+    ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript", ".ts": "typescript", ".tsx": "typescript",
+    ".go": "go", ".rs": "rust", ".java": "java", ".kt": "kotlin", ".cs": "csharp",
+    ".c": "c", ".h": "c", ".cc": "cpp", ".cpp": "cpp", ".hpp": "cpp",
+    ".rb": "ruby", ".php": "php", ".swift": "swift", ".scala": "scala",
+}
+# además del código se indexan las rutas de estos ficheros (configuración, documentación)
+OTHER_FILES = (".md", ".rst", ".txt", ".toml", ".yaml", ".yml", ".json", ".cfg", ".ini", ".sh", "Dockerfile", "Makefile")
+
+_JS = [
+    ("function", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\*?\s+(\w+)")),
+    ("class", re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+(\w+)")),
+    ("function", re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+(\w+)\s*(?::[^=]+)?=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*(?::[^=]+)?=>|\w+\s*=>)")),
+    ("interface", re.compile(r"^\s*(?:export\s+)?(?:interface|type|enum)\s+(\w+)")),
+    # métodos: solo dentro de una clase (ver _regex_symbols)
+    ("method", re.compile(
+        r"^\s+(?:(?:public|private|protected|static|readonly|async|override)\s+)*(?:get\s+|set\s+)?"
+        r"(?!(?:if|for|while|switch|catch|return|function)\b)(\w+)\s*\([^)]*\)\s*(?::[^{]+)?\{\s*$"
+    )),
+]
+_C_LIKE_TYPES = ("class", re.compile(r"^\s*(?:(?:public|private|protected|internal|abstract|final|static|sealed|partial|data|open)\s+)*(?:class|interface|enum|struct|record|object|trait)\s+(\w+)"))
+_METHOD = ("method", re.compile(
+    r"^\s*(?:(?:public|private|protected|internal|static|final|abstract|synchronized|override|virtual|async|suspend|inline)\s+)+"
+    r"(?:fun\s+)?[\w<>\[\],.?\s]*?\b(\w+)\s*\([^;]*$"
+))
+PATTERNS: Dict[str, List[Tuple[str, re.Pattern]]] = {
+    "javascript": _JS,
+    "typescript": _JS,
+    "go": [
+        ("function", re.compile(r"^func\s+(?:\([^)]*\)\s*)?(\w+)")),
+        ("type", re.compile(r"^type\s+(\w+)\s+(?:struct|interface)")),
+    ],
+    "rust": [
+        ("function", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:const\s+)?(?:async\s+)?(?:unsafe\s+)?fn\s+(\w+)")),
+        ("type", re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|trait|impl)\s+(?:<[^>]*>\s*)?(\w+)")),
+    ],
+    "java": [_C_LIKE_TYPES, _METHOD],
+    "kotlin": [_C_LIKE_TYPES, ("function", re.compile(r"^\s*(?:(?:public|private|internal|override|suspend|inline)\s+)*fun\s+(?:<[^>]*>\s*)?(?:[\w.]+\.)?(\w+)\s*\("))],
+    "csharp": [_C_LIKE_TYPES, _METHOD],
+    "scala": [_C_LIKE_TYPES, ("function", re.compile(r"^\s*(?:(?:private|protected|override)\s+)*def\s+(\w+)"))],
+    "swift": [_C_LIKE_TYPES, ("function", re.compile(r"^\s*(?:(?:public|private|internal|static|override|final)\s+)*func\s+(\w+)"))],
+    "c": [
+        ("type", re.compile(r"^(?:typedef\s+)?(?:struct|enum|union)\s+(\w+)\s*\{")),
+        ("function", re.compile(r"^(?!\s)(?!(?:if|for|while|switch|return)\b)[\w\*\s]+?\b(\w+)\s*\([^;]*\)\s*\{?\s*$")),
+    ],
+    "php": [
+        ("class", re.compile(r"^\s*(?:abstract\s+|final\s+)?(?:class|interface|trait)\s+(\w+)")),
+        ("function", re.compile(r"^\s*(?:(?:public|private|protected|static|abstract|final)\s+)*function\s+&?(\w+)")),
+    ],
+    "ruby": [
+        ("class", re.compile(r"^\s*(?:class|module)\s+([\w:]+)")),
+        ("function", re.compile(r"^\s*def\s+(?:self\.)?([\w?!=]+)")),
+    ],
+}
+PATTERNS["cpp"] = PATTERNS["c"] + [_C_LIKE_TYPES]
+
+MAX_SYMBOL_LINES = 200
+
+
+class Symbol:
+    __slots__ = ("name", "qualname", "kind", "start_line", "end_line", "code")
+
+    def __init__(self, name: str, qualname: str, kind: str, start_line: int, end_line: int, code: str):
+        self.name = name
+        self.qualname = qualname
+        self.kind = kind
+        self.start_line = start_line
+        self.end_line = end_line
+        self.code = code
+
+
+def language_for(path: str) -> Optional[str]:
+    return LANGUAGES.get(os.path.splitext(path)[1].lower())
+
+
+def _python_symbols(text: str, lines: List[str]) -> List[Symbol]:
+    symbols = []
+
+    def visit(nodes, prefix: str = "", in_class: bool = False):
+        for node in nodes:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+                end = node.end_lineno or node.lineno
+                is_class = isinstance(node, ast.ClassDef)
+                kind = "class" if is_class else "method" if in_class else "function"
+                qualname = f"{prefix}{node.name}"
+                symbols.append(Symbol(node.name, qualname, kind, start, end, "\n".join(lines[start - 1:end])))
+                # métodos de las clases; las funciones anidadas quedan dentro del código de su función
+                if is_class:
+                    visit(node.body, f"{qualname}.", in_class=True)
+
+    visit(ast.parse(text).body)
+    return symbols
+
+
+def _block_end(lines: List[str], start: int, language: str) -> int:
+    """Last line (0-based) of the definition starting at `start`: brace matching, or `end` for Ruby."""
+    if language == "ruby":
+        indent = len(lines[start]) - len(lines[start].lstrip())
+        for i in range(start + 1, min(len(lines), start + MAX_SYMBOL_LINES)):
+            stripped = lines[i].strip()
+            if stripped == "end" and len(lines[i]) - len(lines[i].lstrip()) == indent:
+                return i
+        return min(len(lines), start + MAX_SYMBOL_LINES) - 1
+
+    depth, opened = 0, False
+    for i in range(start, min(len(lines), start + MAX_SYMBOL_LINES)):
+        # aproximado: las llaves dentro de cadenas o comentarios también cuentan
+        for ch in lines[i]:
+            if ch == "{":
+                depth += 1
+                opened = True
+            elif ch == "}":
+                depth -= 1
+        if opened and depth <= 0:
+            return i
+        if not opened and lines[i].rstrip().endswith(";"):
+            # declaración sin cuerpo (prototipo, const x = y => y + 1;)
+            return i
+    return min(len(lines), start + MAX_SYMBOL_LINES) - 1
+
+
+def _regex_symbols(lines: List[str], language: str) -> List[Symbol]:
+    symbols, current_class, class_end = [], None, -1
+    for i, line in enumerate(lines):
+        for kind, pattern in PATTERNS[language]:
+            match = pattern.match(line)
+            if not match:
+                continue
+            inside = current_class is not None and i <= class_end
+            if kind == "method" and not inside:
+                continue
+            name = match.group(1)
+            end = _block_end(lines, i, language)
+            qualname = f"{current_class}.{name}" if inside and kind in ("function", "method") else name
+            if inside and kind == "function":
+                kind = "method"
+            if kind in ("class", "type") and not inside:
+                current_class, class_end = name, end
+            symbols.append(Symbol(name, qualname, kind, i + 1, end + 1, "\n".join(lines[i:end + 1])))
+            break
+    return symbols
+
+
+def extract_symbols(path: str, text: str) -> List[Symbol]:
+    language = language_for(path)
+    lines = text.splitlines()
+    if language == "python":
+        try:
+            return _python_symbols(text, lines)
+        except (SyntaxError, ValueError):
+            return []
+    if language in PATTERNS:
+        return _regex_symbols(lines, language)
+    return []
+
+
+class CodeIndex:
+    def __init__(
+        self,
+        path: str = DEFAULT_PATH,
+        embedder=None,
+        max_embedded_symbols: int = 5000,
+        max_download_bytes: int = 200 * 1024 * 1024,
+        max_files: int = 20_000,
+        retry_after_s: float = 600.0,
+    ):
+        self.path = path
+        self.embedder = embedder
+        self.max_embedded_symbols = max_embedded_symbols
+        self.max_download_bytes = max_download_bytes
+        self.max_files = max_files
+        self.retry_after_s = retry_after_s  # tras un fallo en segundo plano no se reintenta antes
+        self._lock = threading.Lock()
+        self._repo_locks: Dict[str, threading.Lock] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[str, float] = {}  # repo -> inicio de la indexación en segundo plano
+        self._failed: Dict[str, Tuple[str, float]] = {}  # repo -> (error, momento)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS repos (repo TEXT PRIMARY KEY, ref TEXT, indexed_at REAL, files INTEGER, symbols INTEGER, embedding_model TEXT);"
+                "CREATE TABLE IF NOT EXISTS files (repo TEXT NOT NULL, path TEXT NOT NULL, language TEXT, lines INTEGER, PRIMARY KEY (repo, path));"
+                "CREATE TABLE IF NOT EXISTS symbols ("
+                " id INTEGER PRIMARY KEY, repo TEXT NOT NULL, path TEXT NOT NULL, name TEXT NOT NULL, qualname TEXT NOT NULL,"
+                " kind TEXT, start_line INTEGER, end_line INTEGER, code TEXT, embedding BLOB);"
+                "CREATE INDEX IF NOT EXISTS symbols_name ON symbols(repo, name);"
+            )
+
+    @classmethod
+    def from_env(cls, embedder=None) -> "CodeIndex":
+        return cls(
+            os.getenv("CODE_INDEX_PATH", DEFAULT_PATH),
+            embedder=embedder,
+            max_download_bytes=int(float(os.getenv("CODE_INDEX_MAX_MB", "200")) * 1024 * 1024),
+            max_files=int(os.getenv("CODE_INDEX_MAX_FILES", "20000")),
+        )
+
+    def indexed(self, repo: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT ref, indexed_at, files, symbols FROM repos WHERE repo = ?", (repo.lower(),)).fetchone()
+        return dict(zip(("ref", "indexed_at", "files", "symbols"), row)) if row else None
+
+    def index_repo(self, owner: str, repo: str, ref: Optional[str] = None, client=None, force: bool = False) -> Dict:
+        """Pulls the source tree once and (re)builds its index; blocking."""
+        full_name = f"{owner}/{repo}".lower()
+        with self._lock:
+            repo_lock = self._repo_locks.setdefault(full_name, threading.Lock())
+        # dos preguntas simultáneas sobre un repositorio nuevo: solo una lo descarga
+        with repo_lock:
+            existing = self.indexed(full_name)
+            if existing and not force and (ref is None or ref == existing["ref"]):
+                return existing
+
+            if client is None:
+                from utils.github_client import GitHubClient
+                client = GitHubClient()
+
+            stats = {"repo": full_name, "timings": {}}
+            with tracing.span("code_index.build", repo=full_name) as s:
+                start = time.perf_counter()
+                ref, files = client.fetch_source_tree(
+                    owner, repo, ref=ref, extensions=tuple(LANGUAGES) + OTHER_FILES,
+                    max_download_bytes=self.max_download_bytes, max_files=self.max_files,
+                )
+                stats["timings"]["fetch"] = time.perf_counter() - start
+
+                start = time.perf_counter()
+                file_rows, symbol_rows = [], []
+                for path, text in files.items():
+                    file_rows.append((full_name, path, language_for(path), text.count("\n") + 1))
+                    for sym in extract_symbols(path, text):
+                        symbol_rows.append([full_name, path, sym.name, sym.qualname, sym.kind, sym.start_line, sym.end_line, sym.code, None])
+                stats["timings"]["parse"] = time.perf_counter() - start
+
+                start = time.perf_counter()
+                if self.embedder is not None and symbol_rows:
+                    embedded = symbol_rows[: self.max_embedded_symbols]
+                    texts = [f"{row[4]} {row[3]} in {row[1]}\n{row[7][:400]}" for row in embedded]
+                    vectors = self.embedder.embed_chunks(texts, normalize=True)
+                    for row, vector in zip(embedded, vectors):
+                        row[8] = np.asarray(vector, dtype=np.float32).tobytes()
+                stats["timings"]["embed"] = time.perf_counter() - start
+
+                model = getattr(self.embedder, "model_id", None) if self.embedder is not None else None
+                with self._lock:
+                    self._conn.execute("BEGIN")
+                    try:
+                        for table in ("files", "symbols"):
+                            self._conn.execute(f"DELETE FROM {table} WHERE repo = ?", (full_name,))
+                        self._conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?)", file_rows)
+                        self._conn.executemany(
+                            "INSERT INTO symbols (repo, path, name, qualname, kind, start_line, end_line, code, embedding)"
+                            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            symbol_rows,
+                        )
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO repos VALUES (?, ?, ?, ?, ?, ?)",
+                            (full_name, ref, time.time(), len(file_rows), len(symbol_rows), model),
+                        )
+                    except sqlite3.Error:
+                        self._conn.execute("ROLLBACK")
+                        raise
+                    self._conn.execute("COMMIT")
+                s.set_attributes(files=len(file_rows), symbols=len(symbol_rows))
+
+            print(f"[CodeIndex] {full_name}@{ref}: {len(file_rows)} files, {len(symbol_rows)} symbols")
+            return {**stats, "ref": ref, "files": len(file_rows), "symbols": len(symbol_rows)}
+
+    def index_in_background(self, owner: str, repo: str, ref: Optional[str] = None, client=None) -> Dict:
+        """
+        Starts index_repo on the index's worker thread (once per repository) and returns at once:
+        {"status": "indexing", "since": start time} or {"status": "failed", "error": ...}.
+        """
+        full_name = f"{owner}/{repo}".lower()
+        with self._lock:
+            failed = self._failed.get(full_name)
+            if failed and time.time() - failed[1] < self.retry_after_s:
+                return {"status": "failed", "error": failed[0]}
+            if full_name not in self._pending:
+                if self._executor is None:
+                    # un solo hilo: dos repositorios grandes a la vez no compiten por la CPU con las preguntas
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="code-index")
+                self._pending[full_name] = time.time()
+                self._executor.submit(self._index_job, full_name, owner, repo, ref, client)
+            return {"status": "indexing", "since": self._pending[full_name]}
+
+    def _index_job(self, full_name: str, owner: str, repo: str, ref: Optional[str], client) -> None:
+        try:
+            self.index_repo(owner, repo, ref=ref, client=client)
+            with self._lock:
+                self._failed.pop(full_name, None)
+        except Exception as e:
+            print(f"[CodeIndex] Background indexing of {full_name} failed: {e}")
+            with self._lock:
+                self._failed[full_name] = (f"{type(e).__name__}: {e}", time.time())
+        finally:
+            with self._lock:
+                self._pending.pop(full_name, None)
+
+    # --- consultas ---
+
+    def _rows(self, query: str, params) -> List[Dict]:
+        keys = ("path", "name", "qualname", "kind", "start_line", "end_line", "code")
+        with self._lock:
+            return [dict(zip(keys, row)) for row in self._conn.execute(query, params)]
+
+    def find_symbol(self, repo: str, symbol: str, path: Optional[str] = None, top_k: int = 3) -> List[Dict]:
+        repo = repo.lower()
+        # "Clase.metodo" o "metodo"; se prefieren las coincidencias exactas
+        column = "qualname" if "." in symbol else "name"
+        base = f"SELECT path, name, qualname, kind, start_line, end_line, code FROM symbols WHERE repo = ? AND {column}"
+        path_filter, path_params = (" AND path LIKE ?", [f"%{path}%"]) if path else ("", [])
+        for op, value in (("= ?", symbol), ("= ? COLLATE NOCASE", symbol), ("LIKE ?", f"%{symbol}%")):
+            rows = self._rows(f"{base} {op}{path_filter} ORDER BY length(path) LIMIT ?", [repo, value, *path_params, top_k])
+            if rows:
+                return rows
+        return []
+
+    def search(self, repo: str, query: str, top_k: int = 3) -> List[Dict]:
+        """Definitions most similar to a natural-language description (needs the embedder)."""
+        if self.embedder is None:
+            return []
+        with self._lock:
+            model = self._conn.execute("SELECT embedding_model FROM repos WHERE repo = ?", (repo.lower(),)).fetchone()
+        # índice construido con otro modelo de embeddings: los vectores no son comparables
+        if model is None or model[0] != getattr(self.embedder, "model_id", None):
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, embedding FROM symbols WHERE repo = ? AND embedding IS NOT NULL", (repo.lower(),)
+            ).fetchall()
+        if not rows:
+            return []
+        matrix = np.frombuffer(b"".join(r[1] for r in rows), dtype=np.float32).reshape(len(rows), -1)
+        q = np.asarray(self.embedder.embed_chunks([query], normalize=True)[0], dtype=np.float32)
+        best = np.argsort(-(matrix @ q))[:top_k]
+        ids = [rows[i][0] for i in best]
+        found = {}
+        for id_ in ids:
+            found[id_] = self._rows(
+                "SELECT path, name, qualname, kind, start_line, end_line, code FROM symbols WHERE id = ?", (id_,)
+            )[0]
+        return [found[id_] for id_ in ids]
+
+    def find_files(self, repo: str, path: str, limit: int = 20) -> List[Tuple[str, List[str]]]:
+        """Files whose path contains `path`, with the definitions of each."""
+        with self._lock:
+            paths = [r[0] for r in self._conn.execute(
+                "SELECT path FROM files WHERE repo = ? AND path LIKE ? ORDER BY length(path) LIMIT ?",
+                (repo.lower(), f"%{path}%", limit),
+            )]
+            result = []
+            for p in paths:
+                names = [f"{q} (line {l})" for q, l in self._conn.execute(
+                    "SELECT qualname, start_line FROM symbols WHERE repo = ? AND path = ? ORDER BY start_line", (repo.lower(), p)
+                )]
+                result.append((p, names))
+        return result
+
+    def lookup(
+        self,
+        repo: str,
+        symbol: Optional[str] = None,
+        query: Optional[str] = None,
+        path: Optional[str] = None,
+        top_k: int = 3,
+        max_chars: int = 6000,
+    ) -> str:
+        """Text answer for the agent: the code of the matching definitions, or the matching file paths."""
+        info = self.indexed(repo)
+        if info is None:
+            return f"Error: {repo} is not indexed."
+
+        rows = self.find_symbol(repo, symbol, path, top_k) if symbol else []
+        note = ""
+        if not rows and (query or symbol):
+            rows = self.search(repo, query or symbol, top_k)
+            if symbol and rows:
+                note = f"No definition named '{symbol}'; closest matches:\n\n"
+        if not rows and path:
+            files = self.find_files(repo, path)
+            if not files:
+                return f"No files matching '{path}' in {repo}@{info['ref']}."
+            lines = [f"Files matching '{path}' in {repo}@{info['ref']}:"]
+            for p, names in files:
+                lines.append(f"- {p}" + (f": {', '.join(names[:15])}" if names else ""))
+            return "\n".join(lines)
+        if not rows:
+            return f"No definitions found in {repo}@{info['ref']}. Try another name, a description or a path."
+
+        parts, budget = [], max_chars
+        for row in rows:
+            header = f"{row['path']}:{row['start_line']}-{row['end_line']} ({row['kind']} {row['qualname']}) @ {info['ref']}"
+            code = row["code"] or ""
+            if len(code) > budget:
+                code = code[:max(0, budget)] + "\n... (truncated)"
+            parts.append(f"{header}\n{code}")
+            budget -= len(code)
+            if budget <= 0:
+                break
+        return note + "\n\n".join(parts)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Builds the source-code symbol index of repositories.")
+    parser.add_argument("repos", nargs="+", help="owner/repo")
+    parser.add_argument("--ref", default=None, help="branch, tag or commit (default branch if omitted)")
+    parser.add_argument("--force", action="store_true", help="rebuild even if already indexed")
+    parser.add_argument("--no-embeddings", action="store_true", help="index names and paths only")
+    args = parser.parse_args()
+
+    embedder = None
+    if not args.no_embeddings:
+        from utils.embeddings import Embedder
+        embedder = Embedder(
+            os.getenv("EMBEDDING_MODEL", "all-mpnet-base-v2"),
+            backend=os.getenv("EMBEDDING_BACKEND", "sentence-transformers"),
+            truncate_dim=int(os.environ["EMBEDDING_DIM"]) if os.getenv("EMBEDDING_DIM") else None,
+        )
+    index = CodeIndex.from_env(embedder)
+    for full_name in args.repos:
+        owner, repo = full_name.split("/", 1)
+        stats = index.index_repo(owner, repo, ref=args.ref, force=args.force)
+        print(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+from typing import List, Dict, Optional
+from functools import partial
+import numpy as np
+import os
+import re
+
+
+# Modelos conocidos. "dimension" es la dimensión nativa del modelo; el índice de Pinecone se deriva de aquí.
+EMBEDDING_MODELS: Dict[str, Dict] = {
+    "all-mpnet-base-v2": {
+        "hf_name": "sentence-transformers/all-mpnet-base-v2",
+        "dimension": 768,
+        "max_seq_length": 384,
+        "matryoshka": False,
+        "normalize": True,
+    },
+    "all-MiniLM-L6-v2": {
+        "hf_name": "sentence-transformers/all-MiniLM-L6-v2",
+        "dimension": 384,
+        "max_seq_length": 256,
+        "matryoshka": False,
+        "normalize": True,
+    },
+    "all-MiniLM-L12-v2": {
+        "hf_name": "sentence-transformers/all-MiniLM-L12-v2",
+        "dimension": 384,
+        "max_seq_length": 256,
+        "matryoshka": False,
+        "normalize": True,
+    },
+    "paraphrase-multilingual-MiniLM-L12-v2": {
+        "hf_name": "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+        "dimension": 384,
+        "max_seq_length": 128,
+        "matryoshka": False,
+        "normalize": False,
+    },
+    "mpnet-base-nli-matryoshka": {
+        "hf_name": "tomaarsen/mpnet-base-nli-matryoshka",
+        "dimension": 768,
+        "max_seq_length": 384,
+        "matryoshka": True,
+        "normalize": False,
+    },
+}
+
+
+def model_spec(model_name: str) -> Dict:
+    """
+    Spec of a known embedding model. Unknown names are treated as Hugging Face ids whose
+    dimension is discovered once the model is loaded.
+    """
+    if model_name in EMBEDDING_MODELS:
+        return dict(EMBEDDING_MODELS[model_name])
+    for spec in EMBEDDING_MODELS.values():
+        if spec["hf_name"] == model_name:
+            return dict(spec)
+    return {"hf_name": model_name, "dimension": None, "max_seq_length": None, "matryoshka": False, "normalize": False}
+
+
+class SentenceTransformerBackend:
+    """PyTorch inference through sentence-transformers."""
+
+    def __init__(self, spec: Dict, device: str = "cpu", num_threads: Optional[int] = None):
+        from sentence_transformers import SentenceTransformer
+
+        if num_threads:
+            import torch
+            torch.set_num_threads(num_threads)
+
+        self.model = SentenceTransformer(spec["hf_name"], device=device)
+        if spec.get("max_seq_length"):
+            self.model.max_seq_length = spec["max_seq_length"]
+        self.dimension = spec.get("dimension") or len(self.encode(["dimension probe"])[0])
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+
+
+class OnnxBackend:
+    """
+    CPU inference with ONNX Runtime.
+
+    The Hugging Face encoder is exported to ONNX once (optionally with dynamic int8 weight
+    quantization) and cached under `cache_dir`; pooling and normalization replicate the
+    sentence-transformers pipeline so vectors stay interchangeable with the PyTorch backend.
+    """
+
+    def __init__(
+        self,
+        spec: Dict,
+        device: str = "cpu",
+        num_threads: Optional[int] = None,
+        quantize: bool = False,
+        cache_dir: Optional[str] = None,
+    ):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.spec = spec
+        self.tokenizer = AutoTokenizer.from_pretrained(spec["hf_name"], use_fast=True)
+        self.max_seq_length = spec.get("max_seq_length") or self.tokenizer.model_max_length
+        self.normalize = spec.get("normalize", False)
+
+        cache_dir = cache_dir or os.path.join(os.path.expanduser("~"), ".cache", "github-ai-assistant", "onnx")
+        model_dir = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", spec["hf_name"]))
+        model_path = self._export(model_dir)
+        if quantize:
+            model_path = self._quantize(model_path)
+
+        options = ort.SessionOptions()
+        # intra-op = hilos por operador (matmuls); inter-op = 1 porque el grafo del encoder es secuencial
+        options.intra_op_num_threads = num_threads or os.cpu_count() or 1
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.dimension = spec.get("dimension") or len(self.encode(["dimension probe"])[0])
+
+    def _export(self, model_dir: str) -> str:
+        model_path = os.path.join(model_dir, "model.onnx")
+        if os.path.exists(model_path):
+            return model_path
+
+        import inspect
+        import torch
+        from transformers import AutoModel
+
+        os.makedirs(model_dir, exist_ok=True)
+        model = AutoModel.from_pretrained(self.spec["hf_name"]).eval()
+        sample = self.tokenizer(["export sample"], return_tensors="pt")
+        input_names = [name for name in self.tokenizer.model_input_names if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+        # torch >= 2.9 usa el exportador dynamo por defecto, que ignora dynamic_axes
+        export_kwargs = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                model_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+                **export_kwargs,
+            )
+        print(f"[OnnxBackend] Exported {self.spec['hf_name']} to {model_path}")
+        return model_path
+
+    def _quantize(self, model_path: str) -> str:
+        quantized_path = model_path.replace(".onnx", "-int8.onnx")
+        if not os.path.exists(quantized_path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+            print(f"[OnnxBackend] Quantized model saved to {quantized_path}")
+        return quantized_path
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        # ordenar por longitud reduce el padding dentro de cada batch
+        order = np.argsort([len(t) for t in texts])
+        embeddings = [None] * len(texts)
+
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            encoded = self.tokenizer(
+                [texts[i] for i in idx],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+            hidden = self.session.run(["last_hidden_state"], feeds)[0]
+
+            # mean pooling sobre los tokens reales, como el módulo Pooling de sentence-transformers
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+            for i, vec in zip(idx, pooled):
+                embeddings[i] = vec
+
+        return np.stack(embeddings).astype(np.float32)
+
+
+EMBEDDING_BACKENDS = {
+    "sentence-transformers": SentenceTransformerBackend,
+    "onnx": OnnxBackend,
+    "onnx-int8": partial(OnnxBackend, quantize=True),
+}
+
+
+def register_backend(name: str, backend_cls) -> None:
+    EMBEDDING_BACKENDS[name] = backend_cls
+
+
+def create_backend(name: str, spec: Dict, **kwargs):
+    if name not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{name}'. Available: {', '.join(EMBEDDING_BACKENDS)}")
+    return EMBEDDING_BACKENDS[name](spec, **kwargs)
@@ -2,19 +2,67 @@ from typing import List, Union, Dict
 import numpy as np
 import os
 from pinecone import Pinecone, ServerlessSpec
-import uuid
+import re
+import hashlib
 
 from pinecone.grpc import PineconeGRPC as Pinecone
 
-from sentence_transformers import SentenceTransformer
+from utils.embedding_backends import model_spec, create_backend
+from utils import tracing, metrics
+
 
 class Embedder:
-    def __init__(self, model_name="all-mpnet-base-v2", device: str = None):
+    def __init__(
+        self,
+        model_name: str = "all-mpnet-base-v2",
+        device: str = None,
+        backend: str = "sentence-transformers",
+        truncate_dim: int = None,
+        batch_size: int = 32,
+        **backend_kwargs,
+    ):
         device = device or "cpu"
-        self.model = SentenceTransformer(model_name, device=device)
+        self.model_name = model_name
+        self.spec = model_spec(model_name)
+        self.backend_name = backend
+        self.batch_size = batch_size
+        self.backend = create_backend(backend, self.spec, device=device, **backend_kwargs)
+
+        native_dim = self.backend.dimension
+        if truncate_dim is not None:
+            if not 0 < truncate_dim <= native_dim:
+                raise ValueError(f"truncate_dim must be between 1 and {native_dim}")
+            if not self.spec.get("matryoshka"):
+                print(f"[Embedder] Warning: {model_name} was not trained with Matryoshka loss; "
+                      f"truncating to {truncate_dim} dims may hurt retrieval quality.")
+        self.truncate_dim = truncate_dim if truncate_dim and truncate_dim < native_dim else None
+        self.dimension = self.truncate_dim or native_dim
+
+    @property
+    def tokenizer_name(self) -> str:
+        return self.spec["hf_name"]
+
+    @property
+    def max_seq_length(self) -> int:
+        return self.spec.get("max_seq_length") or 512
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the embedding space: vectors with different model_id must not share an index."""
+        return model_id_for(self.model_name, self.dimension)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        with tracing.span("embedder.encode", model=self.model_id, backend=self.backend_name, texts=len(texts)), \
+                metrics.EMBEDDING_LATENCY.labels(model=self.model_id).time():
+            embeddings = np.asarray(self.backend.encode(texts, batch_size=self.batch_size), dtype=np.float32)
+        metrics.EMBEDDED_TEXTS.labels(model=self.model_id).inc(len(texts))
+        if self.truncate_dim:
+            # Matryoshka: las primeras dimensiones concentran la información
+            embeddings = embeddings[:, :self.truncate_dim]
+        return embeddings
 
     def embed_chunk(self, text: str) -> List[float]:
-        return self.model.encode(text).tolist()
+        return self._encode([text])[0].tolist()
 
     def embed_chunks(
         self,
@@ -22,15 +70,17 @@ class Embedder:
         normalize: bool = False,
         return_with_text: bool = False
     ) -> Union[List[List[float]], List[Dict]]:
-        results = []
-        for chunk in chunks:
-            text = chunk["text"] if isinstance(chunk, dict) else chunk
-            embedding = self.embed_chunk(text)
+        texts = [chunk["text"] if isinstance(chunk, dict) else chunk for chunk in chunks]
+        if not texts:
+            return []
 
-            if normalize:
-                norm = np.linalg.norm(embedding)
-                embedding = (np.array(embedding) / norm).tolist()
+        embeddings = self._encode(texts)
+        if normalize:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.where(norms > 0, norms, 1.0)
 
+        results = []
+        for text, embedding in zip(texts, embeddings.tolist()):
             if return_with_text:
                 results.append({
                     "text": text,
@@ -40,6 +90,30 @@ class Embedder:
                 results.append(embedding)
 
         return results
+
+
+def model_id_for(model_name: str, dimension: int) -> str:
+    return f"{model_name.split('/')[-1]}-{dimension}"
+
+
+# índice de las versiones anteriores, creado con all-mpnet-base-v2 (768): se sigue usando para ese modelo
+LEGACY_INDEX_NAME = "repo-text-embed-index"
+LEGACY_MODEL_ID = "all-mpnet-base-v2-768"
+
+
+def index_name_for(model_id: str, base_name: str = "repo-text-embed") -> str:
+    """
+    One Pinecone index per embedding model/dimension (Pinecone names: lowercase, '-', max 45 chars).
+    The default model keeps the legacy `repo-text-embed-index`, so existing vectors are not lost.
+    """
+    if base_name == "repo-text-embed" and model_id == LEGACY_MODEL_ID:
+        return LEGACY_INDEX_NAME
+    suffix = re.sub(r"[^a-z0-9]+", "-", model_id.lower()).strip("-")
+    name = f"{base_name}-{suffix}"
+    if len(name) > 45:
+        digest = hashlib.sha1(name.encode()).hexdigest()[:6]
+        name = f"{name[:38].rstrip('-')}-{digest}"
+    return name
     
 
 class PineconeVectorStore:
@@ -62,13 +136,30 @@ class PineconeVectorStore:
                     "environment": "development"
                 }
             )
+        else:
+            existing_dim = pc.describe_index(index_name).dimension
+            if existing_dim != dimension:
+                raise ValueError(
+                    f"Index '{index_name}' has dimension {existing_dim} but the embeddings have dimension {dimension}. "
+                    "Use a separate index per embedding model (see index_name_for)."
+                )
         self.index = pc.Index(index_name)
+        self.index_name = index_name
+        self.dimension = dimension
+
+    @classmethod
+    def for_embedder(cls, embedder: Embedder, api_key: str = None, base_name: str = "repo-text-embed") -> "PineconeVectorStore":
+        return cls(api_key=api_key, index_name=index_name_for(embedder.model_id, base_name), dimension=embedder.dimension)
 
     def upsert_embeddings(self, items: List[Dict], document: str, repo: str) -> None:
-    
+        """
+        Upserts the chunks of `document` of `repo` (the "owner/repo" full name) with ids
+        "{repo}-{document}-{i}", then deletes the chunks of an earlier, longer version.
+        """
         vectors = []
         for i, item in enumerate(items):
-            vec_id = f"chunk-{uuid.uuid4().hex[:8]}"
+            # id determinista: reingerir el mismo README sobrescribe sus vectores en vez de duplicarlos
+            vec_id = f"{repo}-{document}-{i}"
             if isinstance(item, dict):
                 text = item.get("text", "")
                 embedding = item.get("embedding", [])
@@ -85,9 +176,32 @@ class PineconeVectorStore:
                     "metadata": {"text": "", "chunk_index": i, "document":document, "repo": repo}
                 })
 
-        self.index.upsert(vectors=vectors)
+        with tracing.span("pinecone.upsert", index=self.index_name, vectors=len(vectors)), \
+                metrics.VECTOR_STORE_LATENCY.labels(store="pinecone", op="upsert").time():
+            self.index.upsert(vectors=vectors)
         print(f"[Pinecone] {len(vectors)} vectors inserted.")
+        self._delete_stale_chunks(f"{repo}-{document}-", len(vectors))
+
+    def _delete_stale_chunks(self, prefix: str, keep: int) -> None:
+        # un README reingerido en menos fragmentos dejaría los últimos antiguos en el índice
+        try:
+            stale = [
+                vec_id
+                for page in self.index.list(prefix=prefix)
+                for vec_id in page
+                if vec_id[len(prefix):].isdigit() and int(vec_id[len(prefix):]) >= keep
+            ]
+            if stale:
+                self.index.delete(ids=stale)
+                print(f"[Pinecone] {len(stale)} stale vectors deleted.")
+        except Exception as e:
+            # list() solo existe en índices serverless
+            print(f"[Pinecone] Could not delete stale vectors of {prefix}*: {e}")
 
     def query(self, embedding: List[float], top_k: int = 5) -> List[Dict]:
-        results = self.index.query(vector=embedding, top_k=top_k, include_metadata=True)
-        return results.get("matches", [])
\ No newline at end of file
+        with tracing.span("pinecone.query", index=self.index_name, top_k=top_k) as s, \
+                metrics.VECTOR_STORE_LATENCY.labels(store="pinecone", op="query").time():
+            results = self.index.query(vector=embedding, top_k=top_k, include_metadata=True)
+            matches = results.get("matches", [])
+            s.set_attribute("matches", len(matches))
+        return matches
\ No newline at end of file
@@ -1,5 +1,8 @@
-from github import Github, GithubException
-import os, base64
+from github import Github, UnknownObjectException
+from typing import Dict, Iterable, Optional, Tuple
+import os, base64, tarfile
+
+import requests
 
 class GitHubClient:
     def __init__(self, token: str = None):
@@ -7,15 +10,18 @@ class GitHubClient:
         self.client = Github(token)
 
     def fetch_readme(self, owner: str, repo: str) -> str:
+        """README text, or "" when the repository or its README does not exist (404).
+
+        Any other error (rate limit, 5xx, network) is raised, so a bulk ingestion records it as
+        an error to retry instead of as a repository without README.
+        """
         try:
             repository = self.client.get_repo(f"{owner}/{repo}")
-            content = repository.get_readme()   
-            return base64.b64decode(content.content).decode("utf-8")
-        except GithubException as e:
-            print(f"[ERROR] GitHub API error: {e}")
-        except Exception as e:
-            print(f"[ERROR] Unexpected error: {e}")
-        return ""
+            content = repository.get_readme()
+        except UnknownObjectException as e:
+            print(f"[GitHub] No README for {owner}/{repo}: {e}")
+            return ""
+        return base64.b64decode(content.content).decode("utf-8")
     
     def get_repo_metadata(self, owner: str, repo: str) -> dict:
         repository = self.client.get_repo(f"{owner}/{repo}")
@@ -27,4 +33,52 @@ class GitHubClient:
             "created_at": repository.created_at.isoformat(),
             "updated_at": repository.updated_at.isoformat(),
             "language": repository.language
-        }
\ No newline at end of file
+        }
+
+    def fetch_source_tree(
+        self,
+        owner: str,
+        repo: str,
+        ref: Optional[str] = None,
+        extensions: Optional[Iterable[str]] = None,
+        max_file_bytes: int = 200_000,
+        max_download_bytes: int = 200 * 1024 * 1024,
+        max_files: int = 20_000,
+    ) -> Tuple[str, Dict[str, str]]:
+        """
+        Text files of the repository at `ref` (default branch if None) from a single tarball
+        download: (ref, {path: content}). Only `extensions` are kept; large files are skipped.
+        Raises ValueError when the compressed download passes `max_download_bytes` or more than
+        `max_files` files are kept (a partial tree would give wrong "not found" answers).
+        """
+        repository = self.client.get_repo(f"{owner}/{repo}")
+        ref = ref or repository.default_branch
+        url = repository.get_archive_link("tarball", ref)
+        extensions = tuple(extensions) if extensions else None
+
+        files = {}
+        with requests.get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            # modo stream: el tar no se guarda en disco ni entero en memoria
+            with tarfile.open(fileobj=response.raw, mode="r|gz") as archive:
+                for member in archive:
+                    # bytes comprimidos leídos hasta ahora: el tarball puede ser de varios GB
+                    if response.raw.tell() > max_download_bytes:
+                        raise ValueError(f"{owner}/{repo} is larger than {max_download_bytes // (1024 * 1024)} MB compressed")
+                    if not member.isfile() or member.size > max_file_bytes:
+                        continue
+                    # el primer componente es "<owner>-<repo>-<sha>/"
+                    path = member.name.split("/", 1)[-1]
+                    if extensions and not path.endswith(extensions):
+                        continue
+                    data = archive.extractfile(member)
+                    if data is None:
+                        continue
+                    try:
+                        files[path] = data.read().decode("utf-8")
+                    except UnicodeDecodeError:
+                        continue
+                    if len(files) > max_files:
+                        raise ValueError(f"{owner}/{repo} has more than {max_files} source files")
+        return ref, files
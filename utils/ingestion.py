@@ -0,0 +1,60 @@
+from typing import Dict, Optional
+import time
+
+from utils.github_client import GitHubClient
+from utils.chunking import Chunker
+
+
+class ReadmeIngestionPipeline:
+    """
+    fetch -> chunk -> embed -> upsert for one repository README, with the same classes and
+    parameters app.py uses in "Process README". Heavy objects (embedder, tokenizer, Pinecone
+    client) are created once and reused across repositories.
+    """
+
+    def __init__(
+        self,
+        embedder,
+        vector_store,
+        github_client: Optional[GitHubClient] = None,
+        chunker: Optional[Chunker] = None,
+        max_tokens: int = 350,
+        overlap: int = 50,
+        document: str = "README",
+    ):
+        self.embedder = embedder
+        self.vector_store = vector_store
+        self.github_client = github_client or GitHubClient()
+        self.chunker = chunker or Chunker(
+            max_tokens=min(max_tokens, embedder.max_seq_length),
+            model_name=embedder.tokenizer_name,
+        )
+        self.overlap = overlap
+        self.document = document
+
+    def ingest(self, owner: str, repo: str) -> Dict:
+        stats = {"repo": f"{owner}/{repo}", "status": "ok", "chunks": 0, "timings": {}}
+        timings = stats["timings"]
+
+        start = time.perf_counter()
+        readme = self.github_client.fetch_readme(owner, repo)
+        timings["fetch"] = time.perf_counter() - start
+        if not readme:
+            stats["status"] = "no_readme"
+            return stats
+
+        start = time.perf_counter()
+        chunks = self.chunker.chunk(readme, overlap=self.overlap)
+        timings["chunk"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        embeddings = self.embedder.embed_chunks(chunks, normalize=True, return_with_text=True)
+        timings["embed"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if embeddings:
+            self.vector_store.upsert_embeddings(embeddings, self.document, stats["repo"])
+        timings["upsert"] = time.perf_counter() - start
+
+        stats["chunks"] = len(embeddings)
+        return stats
@@ -0,0 +1,136 @@
+from typing import Any, Callable, Dict, List, Optional, Union
+import os
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_ollama import ChatOllama
+
+from utils.llm_cache import SQLiteCompletionCache
+from utils.tracing import TracingCallback
+from utils import metrics
+
+
+# Ollama descarga el modelo tras `keep_alive` sin peticiones; con el valor anterior ("30s") cada
+# pregunta nueva pagaba la carga de pesos y perdía la caché de prompt. "-1" lo mantiene residente.
+DEFAULT_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+DEFAULT_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "4096"))
+# argumentos del cliente que no cambian la salida: fuera de la clave de la caché
+_CLIENT_ARGS = ("base_url", "client_kwargs", "async_client_kwargs", "sync_client_kwargs", "disable_streaming")
+
+
+class LLMTimingCallback(BaseCallbackHandler):
+    """
+    Logs Ollama's per-call timings. `prompt_eval_count` only counts the prompt tokens that were
+    actually evaluated, so a small value on a long prompt means the prefix came from the KV cache.
+    """
+
+    def __init__(self, logger: Callable[[str], None] = print, max_history: int = 200):
+        self.logger = logger
+        self.max_history = max_history
+        self.turns: List[Dict[str, Any]] = []
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                info = generation.generation_info or {}
+                if "prompt_eval_count" not in info and "eval_count" not in info:
+                    continue
+                turn = {
+                    "model": info.get("model_name") or info.get("model"),
+                    "prompt_tokens": info.get("prompt_eval_count", 0),
+                    "prompt_eval_ms": info.get("prompt_eval_duration", 0) / 1e6,
+                    "completion_tokens": info.get("eval_count", 0),
+                    "eval_ms": info.get("eval_duration", 0) / 1e6,
+                    "load_ms": info.get("load_duration", 0) / 1e6,
+                    "total_ms": info.get("total_duration", 0) / 1e6,
+                }
+                self.turns.append(turn)
+                del self.turns[:-self.max_history]
+
+                tok_s = turn["completion_tokens"] / (turn["eval_ms"] / 1000) if turn["eval_ms"] else 0.0
+                self.logger(
+                    f"[LLM] {turn['model']}: prefill {turn['prompt_tokens']} tok in {turn['prompt_eval_ms']:.0f} ms | "
+                    f"generation {turn['completion_tokens']} tok in {turn['eval_ms']:.0f} ms ({tok_s:.1f} tok/s) | "
+                    f"load {turn['load_ms']:.0f} ms | total {turn['total_ms']:.0f} ms"
+                )
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """Feeds Ollama's token counts and durations into the metrics registry (utils/metrics.py)."""
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                info = generation.generation_info or {}
+                if "eval_count" not in info:
+                    continue
+                model = info.get("model_name") or info.get("model") or "unknown"
+                metrics.LLM_TOKENS.labels(model=model, kind="prompt").inc(info.get("prompt_eval_count", 0))
+                metrics.LLM_TOKENS.labels(model=model, kind="completion").inc(info.get("eval_count", 0))
+                metrics.LLM_PREFILL.labels(model=model).observe(info.get("prompt_eval_duration", 0) / 1e9)
+                if info.get("eval_duration"):
+                    metrics.LLM_TOKENS_PER_SECOND.labels(model=model).observe(info["eval_count"] / (info["eval_duration"] / 1e9))
+
+
+def build_chat_llm(
+    model: str,
+    temperature: float = 0.0,
+    num_ctx: Optional[int] = DEFAULT_NUM_CTX,
+    num_thread: Optional[int] = None,
+    num_gpu: Optional[int] = None,
+    keep_alive: Optional[Union[int, str]] = DEFAULT_KEEP_ALIVE,
+    log_timings: bool = True,
+    logger: Callable[[str], None] = print,
+    use_cache: bool = True,
+    **kwargs,
+) -> ChatOllama:
+    """
+    ChatOllama with the runtime options set as real fields (ChatOllama ignores unknown kwargs such
+    as `model_kwargs`, so options passed that way never reached Ollama).
+    use_cache: answer repeated prompts from the persistent completion cache (utils/llm_cache.py,
+        LLM_CACHE=0 disables it). Token streaming is disabled with it, since streamed calls skip
+        the cache; agent-level streaming (AgentExecutor.astream) is unaffected.
+    """
+    callbacks = list(kwargs.pop("callbacks", None) or [])
+    callbacks.append(TracingCallback())  # spans "llm"; no hace nada con el tracing desactivado
+    callbacks.append(LLMMetricsCallback())
+    if log_timings:
+        callbacks.append(LLMTimingCallback(logger=logger))
+
+    cache = None
+    if use_cache:
+        # opciones que cambian la salida (num_thread, num_gpu o keep_alive no)
+        options = {"temperature": temperature, "num_ctx": num_ctx}
+        options.update({k: v for k, v in kwargs.items() if k not in _CLIENT_ARGS})
+        cache = SQLiteCompletionCache.from_env(model, options, base_url=kwargs.get("base_url"))
+        if cache is not None:
+            # los agentes de create_react_agent llaman a astream, y el streaming de ChatOllama
+            # (_astream) no pasa por la caché: sin streaming, astream usa ainvoke y la consulta
+            kwargs.setdefault("disable_streaming", True)
+
+    return ChatOllama(
+        model=model,
+        temperature=temperature,
+        num_ctx=num_ctx,
+        num_thread=num_thread,
+        num_gpu=num_gpu,
+        keep_alive=keep_alive,
+        callbacks=callbacks or None,
+        cache=cache,
+        **kwargs,
+    )
+
+
+async def warm_up(llm: Any, prompt: str = "ping") -> None:
+    """
+    One-token generation sent straight to Ollama (bypassing the completion cache) so the first
+    question does not pay the model load. Uses the same num_ctx/num_thread/num_gpu as the chat
+    model: different options would make Ollama load the model again.
+    """
+    import ollama
+
+    options = {k: getattr(llm, k) for k in ("num_ctx", "num_thread", "num_gpu") if getattr(llm, k, None) is not None}
+    options["num_predict"] = 1
+    await ollama.AsyncClient(host=getattr(llm, "base_url", None)).generate(
+        model=llm.model, prompt=prompt, options=options, keep_alive=getattr(llm, "keep_alive", None)
+    )
\ No newline at end of file
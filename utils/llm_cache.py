@@ -0,0 +1,186 @@
+"""
+Persistent exact-match completion cache for the chat model (a langchain BaseCache over SQLite).
+
+All agents run at temperature 0, so the same prompt with the same model and options gives the
+same completion. The key is a SHA-256 of the model name and sampling options (temperature,
+num_ctx...), langchain's call string (stop words) and the full serialized prompt. Entries also record the model digest
+reported by Ollama: when a model is pulled again or replaced under the same tag, its old
+entries are dropped.
+
+Values are the generated texts (the ReAct agents use neither tool calls nor multimodal output)
+serialized as JSON and zlib-compressed. When the file grows over
+`max_bytes`, the least recently used entries are evicted.
+
+Environment:
+    LLM_CACHE          0 disables the cache (default 1)
+    LLM_CACHE_PATH     SQLite file (default ~/.cache/github-ai-assistant/llm_cache.sqlite)
+    LLM_CACHE_MAX_MB   size bound of the stored completions (default 64)
+"""
+from typing import Any, Optional, Sequence
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, Generation
+
+from utils import metrics
+
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "github-ai-assistant", "llm_cache.sqlite")
+
+# tiempos y contadores de Ollama: una respuesta de la caché no ha evaluado ni generado tokens
+_TIMING_KEYS = (
+    "total_duration", "load_duration", "prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration",
+)
+
+
+def ollama_model_digest(model: str, base_url: Optional[str] = None) -> str:
+    """Digest of the local Ollama model ("" if Ollama cannot be reached)."""
+    try:
+        import ollama
+
+        names = {model, model if ":" in model else f"{model}:latest"}
+        for entry in ollama.Client(host=base_url).list().models:
+            if entry.model in names:
+                return entry.digest or ""
+    except Exception as e:
+        print(f"[LLMCache] Could not read the digest of {model}: {e}")
+    return ""
+
+
+def _encode(generations: Sequence[Generation]) -> bytes:
+    items = []
+    for g in generations:
+        info = {k: v for k, v in (g.generation_info or {}).items() if k not in _TIMING_KEYS}
+        items.append({"text": g.text, "chat": isinstance(g, ChatGeneration), "info": info})
+    return zlib.compress(json.dumps(items, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def _decode(value: bytes) -> list:
+    generations = []
+    for item in json.loads(zlib.decompress(value)):
+        info = {**item["info"], "cached": True}
+        if item["chat"]:
+            generations.append(ChatGeneration(message=AIMessage(content=item["text"], response_metadata=info), generation_info=info))
+        else:
+            generations.append(Generation(text=item["text"], generation_info=info))
+    return generations
+
+
+class SQLiteCompletionCache(BaseCache):
+    """Completion cache of one model; several instances can share the same file."""
+
+    def __init__(
+        self,
+        model: str,
+        digest: str = "",
+        options: Optional[dict] = None,
+        path: str = DEFAULT_PATH,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.model = model
+        self.digest = digest
+        # el llm_string de ChatOllama no incluye el modelo ni las opciones: van en la clave
+        self.options = json.dumps({"model": model, **(options or {})}, sort_keys=True, default=str)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # una conexión compartida por el hilo de Streamlit y el bucle del AsyncRunner (protegida con _lock)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL, digest TEXT NOT NULL,"
+                " value BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS completions_last_used ON completions(last_used)")
+            if digest:
+                dropped = self._conn.execute(
+                    "DELETE FROM completions WHERE model = ? AND digest != ?", (model, digest)
+                ).rowcount
+                if dropped:
+                    print(f"[LLMCache] {model} changed: dropped {dropped} cached completions")
+
+    @classmethod
+    def from_env(cls, model: str, options: Optional[dict] = None, base_url: Optional[str] = None) -> Optional["SQLiteCompletionCache"]:
+        if os.getenv("LLM_CACHE", "1") == "0":
+            return None
+        try:
+            return cls(
+                model,
+                digest=ollama_model_digest(model, base_url),
+                options=options,
+                path=os.getenv("LLM_CACHE_PATH", DEFAULT_PATH),
+                max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "64")) * 1024 * 1024),
+            )
+        except sqlite3.Error as e:
+            print(f"[LLMCache] Cache disabled: {e}")
+            return None
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        h = hashlib.sha256()
+        h.update(self.options.encode("utf-8"))
+        h.update(b"\0")
+        h.update(llm_string.encode("utf-8"))
+        h.update(b"\0")
+        h.update(prompt.encode("utf-8"))
+        return h.hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM completions WHERE key = ? AND digest = ?", (key, self.digest)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), key))
+        metrics.cache_lookup("llm_completion", row is not None)
+        if row is None:
+            return None
+        try:
+            return _decode(row[0])
+        except (ValueError, KeyError, zlib.error):
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        value = _encode(return_val)
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, model, digest, value, size, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, self.model, self.digest, value, len(value), time.time()),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # se libera hasta el 90 % del límite para no expulsar en cada inserción
+        excess = total - int(self.max_bytes * 0.9)
+        freed, keys = 0, []
+        for key, size in self._conn.execute("SELECT key, size FROM completions ORDER BY last_used"):
+            keys.append(key)
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM completions WHERE key = ?", [(k,) for k in keys])
+
+    # lecturas locales de ~1 ms: sin saltar al executor de hilos
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        return self.lookup(prompt, llm_string)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM completions WHERE model = ?", (self.model,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,180 @@
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import json
+import os
+import threading
+import time
+
+from mcp import types
+
+
+# Formato de grabación (JSONL), una línea por evento:
+#   {"type": "tools", "tools": [{"name", "description", "inputSchema"}, ...]}
+#   {"type": "call", "tool": str, "args": {...}, "result": <CallToolResult>, "duration_ms": float}
+
+
+def normalize_args(args: Optional[Dict]) -> Dict:
+    return {k: v for k, v in sorted((args or {}).items()) if v is not None}
+
+
+def call_key(tool_name: str, args: Optional[Dict]) -> str:
+    return f"{tool_name}:{json.dumps(normalize_args(args), sort_keys=True, default=str)}"
+
+
+PAGINATION_ARGS = {"page", "perPage", "after"}
+
+
+def _identity(args: Optional[Dict]) -> Dict:
+    """Arguments without pagination; owner/repo case-insensitive and "42" equal to 42."""
+    identity = {}
+    for k, v in normalize_args(args).items():
+        if k in PAGINATION_ARGS:
+            continue
+        v = str(v).strip()
+        identity[k] = v.lower() if k in ("owner", "repo") else v
+    return identity
+
+
+def serialize_result(result) -> Dict:
+    if hasattr(result, "model_dump"):
+        return result.model_dump(mode="json", exclude_none=True)
+    return {"content": [{"type": "text", "text": str(result)}], "isError": False}
+
+
+def deserialize_result(data: Dict) -> types.CallToolResult:
+    return types.CallToolResult.model_validate(data)
+
+
+def error_result(message: str) -> types.CallToolResult:
+    return types.CallToolResult(content=[types.TextContent(type="text", text=message)], isError=True)
+
+
+class Recording:
+    """In-memory index of a recording: tool list and responses keyed by (tool, normalized args)."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.tools: Dict[str, Dict] = {}
+        self.calls: Dict[str, Dict] = {}
+        self.calls_by_tool: Dict[str, List[Dict]] = {}
+        if path:
+            self.load(path)
+
+    def load(self, path: str) -> "Recording":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event.get("type") == "tools":
+                    for tool in event["tools"]:
+                        self.tools[tool["name"]] = tool
+                elif event.get("type") == "call":
+                    # la última grabación de una llamada gana
+                    self.calls[call_key(event["tool"], event["args"])] = event
+                    self.calls_by_tool.setdefault(event["tool"], []).append(event)
+        return self
+
+    def lookup(self, tool_name: str, args: Optional[Dict]) -> Optional[Dict]:
+        """
+        Exact match first; otherwise a call of the same tool that differs only in the pagination
+        arguments (page, perPage, after). Any other difference is a miss (None).
+        """
+        event = self.calls.get(call_key(tool_name, args))
+        if event is not None:
+            return event
+
+        # otro número de PR, otra ruta u otro estado no es la misma llamada: servirla falsearía la medida
+        wanted = _identity(args)
+        for candidate in reversed(self.calls_by_tool.get(tool_name, [])):
+            if _identity(candidate["args"]) == wanted:
+                return candidate
+        return None
+
+    def list_tools_result(self) -> types.ListToolsResult:
+        return types.ListToolsResult(tools=[types.Tool.model_validate(t) for t in self.tools.values()])
+
+
+class RecordedSession:
+    """
+    Offline stand-in for an MCP ClientSession that answers `list_tools` / `call_tool` from a
+    recording. With `replay_latency` each call sleeps for its recorded duration (times `latency_scale`).
+    """
+
+    def __init__(self, recording: Recording, replay_latency: bool = False, latency_scale: float = 1.0):
+        self.recording = recording
+        self.replay_latency = replay_latency
+        self.latency_scale = latency_scale
+        self.calls = 0
+        self.misses = 0
+
+    async def initialize(self):
+        return None
+
+    async def list_tools(self) -> types.ListToolsResult:
+        return self.recording.list_tools_result()
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, *args, **kwargs):
+        self.calls += 1
+        event = self.recording.lookup(name, arguments)
+        if event is None:
+            self.misses += 1
+            return error_result(f"No recorded response for {name} with {json.dumps(normalize_args(arguments))}")
+        if self.replay_latency and event.get("duration_ms"):
+            await asyncio.sleep(event["duration_ms"] * self.latency_scale / 1000)
+        return deserialize_result(event["result"])
+
+
+class MCPRecorder:
+    """
+    Appends real MCP traffic to a JSONL recording that Recording / the replay server can serve.
+    Enabled in GitHubMCPAgent when MCP_RECORD_PATH is set (see `from_env`).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, env: str = "MCP_RECORD_PATH") -> Optional["MCPRecorder"]:
+        path = os.environ.get(env)
+        return cls(path) if path else None
+
+    def _write(self, event: Dict) -> None:
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def record_tools(self, tools: Iterable) -> None:
+        self._write({
+            "type": "tools",
+            "tools": [
+                {"name": t.name, "description": t.description, "inputSchema": t.inputSchema} for t in tools
+            ],
+        })
+
+    def record_call(self, tool_name: str, args: Optional[Dict], result, duration_ms: float) -> None:
+        self._write({
+            "type": "call",
+            "tool": tool_name,
+            "args": normalize_args(args),
+            "result": serialize_result(result),
+            "duration_ms": round(duration_ms, 2),
+        })
+
+
+class RecordingSession:
+    """Wraps a ClientSession so every `call_tool` (including follow-up pages) is recorded."""
+
+    def __init__(self, session, recorder: MCPRecorder):
+        self.session = session
+        self.recorder = recorder
+
+    async def list_tools(self):
+        return await self.session.list_tools()
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, *args, **kwargs):
+        start = time.perf_counter()
+        result = await self.session.call_tool(name, arguments, *args, **kwargs)
+        self.recorder.record_call(name, arguments, result, (time.perf_counter() - start) * 1000)
+        return result
@@ -0,0 +1,145 @@
+"""
+Local MCP stdio server that serves a recording (see utils/mcp_recording.py) in place of the Docker
+github-mcp-server, with injected latency and errors, for deterministic load tests.
+
+Run it through GitHubMCPAgent (no GITHUB_TOKEN needed):
+    agent = GitHubMCPAgent(server_cmd=sys.executable)
+    await agent.connect(args=replay_server_args("recordings/mcp.jsonl", latency_ms=80, error_rate=0.02))
+
+or directly:
+    python -m utils.mcp_replay_server --recording recordings/mcp.jsonl --latency-ms 80 --jitter-ms 20
+"""
+import argparse
+import asyncio
+import json
+import random
+from typing import List, Optional
+
+import mcp.server.stdio
+from mcp import types
+from mcp.server.lowlevel import Server
+
+from utils.mcp_recording import Recording, error_result, deserialize_result, normalize_args
+
+
+REPLAY_TOOLS = (
+    "list_pull_requests", "list_releases", "list_issues", "get_file_contents", "get_pull_request", "get_issue", "get_release_by_tag"
+)
+
+
+def replay_server_args(
+    recording: str,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    replay_latency: bool = False,
+    seed: Optional[int] = None,
+) -> List[str]:
+    """Arguments for `GitHubMCPAgent.connect(args=...)` with `server_cmd=sys.executable`."""
+    args = ["-m", "utils.mcp_replay_server", "--recording", recording,
+            "--latency-ms", str(latency_ms), "--jitter-ms", str(jitter_ms), "--error-rate", str(error_rate)]
+    if replay_latency:
+        args.append("--replay-latency")
+    if seed is not None:
+        args += ["--seed", str(seed)]
+    return args
+
+
+class ReplayServer:
+    """
+    Answers the recorded tools with their recorded responses.
+
+    Args:
+        recording (Recording): recorded tool list and calls.
+        latency_ms (float): fixed delay added to every call.
+        jitter_ms (float): uniform random delay in [0, jitter_ms) added on top.
+        error_rate (float): probability of answering with an injected error (isError=True).
+        replay_latency (bool): also sleep for the duration measured when the call was recorded.
+        tools (tuple): tool names exposed; tools missing from the recording are skipped.
+    """
+
+    def __init__(
+        self,
+        recording: Recording,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        replay_latency: bool = False,
+        tools=REPLAY_TOOLS,
+        seed: Optional[int] = None,
+    ):
+        self.recording = recording
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.replay_latency = replay_latency
+        self.tools = [t for t in tools if t in recording.tools]
+        self.random = random.Random(seed)
+
+    def list_tools(self) -> List[types.Tool]:
+        return [types.Tool.model_validate(self.recording.tools[name]) for name in self.tools]
+
+    def delay_s(self, event: Optional[dict]) -> float:
+        delay = self.latency_ms + (self.random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        if self.replay_latency and event is not None:
+            delay += event.get("duration_ms") or 0.0
+        return delay / 1000
+
+    async def call_tool(self, name: str, arguments: dict) -> types.CallToolResult:
+        if name not in self.tools:
+            return error_result(f"Unknown tool: {name}")
+        event = self.recording.lookup(name, arguments)
+
+        delay = self.delay_s(event)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            return error_result("Injected error: API rate limit exceeded, try again later.")
+        if event is None:
+            return error_result(f"No recorded response for {name} with {json.dumps(normalize_args(arguments))}")
+        return deserialize_result(event["result"])
+
+    def build(self) -> Server:
+        server = Server("github-mcp-replay")
+
+        @server.list_tools()
+        async def list_tools() -> List[types.Tool]:
+            return self.list_tools()
+
+        # los esquemas grabados pueden ser más estrictos que los args grabados: sin validación
+        @server.call_tool(validate_input=False)
+        async def call_tool(name: str, arguments: dict) -> types.CallToolResult:
+            return await self.call_tool(name, arguments)
+
+        return server
+
+    async def run_stdio(self) -> None:
+        server = self.build()
+        async with mcp.server.stdio.stdio_server() as (read, write):
+            await server.run(read, write, server.create_initialization_options())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded GitHub MCP responses over stdio.")
+    parser.add_argument("--recording", required=True, help="JSONL written by MCPRecorder (MCP_RECORD_PATH)")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--replay-latency", action="store_true", help="add the recorded duration of each call")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    replay = ReplayServer(
+        Recording(args.recording),
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        replay_latency=args.replay_latency,
+        seed=args.seed,
+    )
+    asyncio.run(replay.run_stdio())
+
+
+if __name__ == "__main__":
+    main()
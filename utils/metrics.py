@@ -0,0 +1,260 @@
+"""
+In-process metrics registry in the Prometheus text exposition format (no client library needed).
+
+    from utils import metrics
+
+    MCP_CALLS = metrics.counter("mcp_calls_total", "MCP tool calls.", ["tool", "status"])
+    MCP_CALLS.labels(tool="get_issue", status="ok").inc()
+
+    with MCP_LATENCY.labels(tool="get_issue").time():
+        ...
+
+`start_http_server()` serves GET /metrics from a daemon thread next to Streamlit
+(METRICS_PORT, default 9464; METRICS_PORT=0 disables it).
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+import bisect
+import os
+import threading
+import time
+
+
+# Buckets en segundos: de lecturas locales (ms) a turnos completos del LLM (minutos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Timer:
+    def __init__(self, observe):
+        self.observe = observe
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _Child:
+    def __init__(self, metric: "Metric"):
+        self._lock = metric._lock
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+
+class _HistogramChild:
+    def __init__(self, metric: "Histogram"):
+        self._lock = metric._lock
+        self.buckets = metric.buckets
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += value
+
+    def time(self) -> _Timer:
+        return _Timer(self.observe)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def _new_child(self):
+        return _Child(self)
+
+    def labels(self, **labels: str):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    # métricas sin etiquetas: se usan directamente
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_label_str(self.labelnames, key)} {_fmt(child.value)}"
+                for key, child in list(self._children.items())]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        return self.labels().time()
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = 'le="%s"' % _fmt(bound)
+                lines.append(f"{self.name}_bucket{_label_str(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_str(self.labelnames, key)} {_fmt(child.sum)}")
+            lines.append(f"{self.name}_count{_label_str(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        # idempotente: registrar dos veces el mismo nombre devuelve la métrica existente
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in list(self._metrics.values())) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_http_server(port: Optional[int] = None, addr: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """Starts the /metrics endpoint once per process; later calls return the running server."""
+    global _server
+    port = int(os.getenv("METRICS_PORT", "9464")) if port is None else port
+    if port == 0:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+            except OSError as e:
+                print(f"[Metrics] Could not start the metrics endpoint on {addr}:{port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+            print(f"[Metrics] Serving http://{addr}:{port}/metrics")
+    return _server
+
+
+# --- Métricas compartidas por los componentes ---
+
+REQUESTS = counter("assistant_requests_total", "Queries answered by the orchestrator.", ["route", "status"])
+REQUEST_LATENCY = histogram("assistant_request_duration_seconds", "End-to-end query latency.", ["route"])
+RUNNER_INFLIGHT = gauge("async_runner_inflight", "Coroutines running on the AsyncRunner loop.")
+RUNNER_LATENCY = histogram("async_runner_task_duration_seconds", "Duration of coroutines submitted to the AsyncRunner.")
+RUNNER_ERRORS = counter("async_runner_task_errors_total", "Coroutines submitted to the AsyncRunner that raised or timed out.")
+MCP_CALLS = counter("mcp_calls_total", "MCP tool calls.", ["tool", "status"])
+MCP_LATENCY = histogram("mcp_call_duration_seconds", "MCP tool call latency, including output processing.", ["tool"])
+MCP_SESSIONS = counter("mcp_session_starts_total", "MCP sessions opened (more than one per process means restarts).")
+MCP_SESSION_ERRORS = counter("mcp_session_errors_total", "Failures opening an MCP session.")
+CACHE_REQUESTS = counter("cache_requests_total", "Cache lookups by cache and result (hit/miss).", ["cache", "result"])
+EMBEDDED_TEXTS = counter("embedding_texts_total", "Texts embedded.", ["model"])
+EMBEDDING_LATENCY = histogram("embedding_batch_duration_seconds", "Latency of one embedding call.", ["model"])
+VECTOR_STORE_LATENCY = histogram("vector_store_duration_seconds", "Vector store operation latency.", ["store", "op"])
+LLM_TOKENS = counter("llm_tokens_total", "LLM tokens by kind (prompt = evaluated prefill tokens).", ["model", "kind"])
+LLM_TOKENS_PER_SECOND = histogram(
+    "llm_generation_tokens_per_second", "Generation speed of each LLM call.", ["model"],
+    buckets=(1, 2, 4, 6, 8, 10, 15, 20, 30, 50, 100),
+)
+LLM_PREFILL = histogram("llm_prefill_duration_seconds", "Prompt evaluation time of each LLM call.", ["model"])
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
@@ -0,0 +1,262 @@
+import json
+import re
+from collections import Counter
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.process_tool_output import PROCESSORS
+
+
+# Herramientas de listado paginadas y truncado adicional por elemento en el resumen
+PAGINATED_TOOLS = {
+    "list_pull_requests": {},
+    "list_issues": {},
+    "list_releases": {"body": 200},
+}
+
+_decoder = json.JSONDecoder()
+_SEPARATORS = re.compile(r"[\s,]*")
+_DATE_KEYS = ("updated_at", "updatedAt", "published_at", "created_at", "createdAt")
+
+
+def _result_text(result) -> Tuple[str, bool]:
+    content = getattr(result, "content", None) or []
+    text = getattr(content[0], "text", "") if content else ""
+    return text or "", bool(getattr(result, "isError", False))
+
+
+def iter_json_array(text: str, start: int) -> Iterator[Any]:
+    """
+    Yields the elements of the JSON array that begins at `text[start]` one by one, so only the
+    element being processed is materialized instead of the whole list.
+    """
+    idx = start + 1
+    n = len(text)
+    while True:
+        idx = _SEPARATORS.match(text, idx).end()
+        if idx >= n or text[idx] == "]":
+            return
+        item, idx = _decoder.raw_decode(text, idx)
+        yield item
+
+
+def iter_listing(text: str) -> Tuple[Iterator[Any], Optional[Dict]]:
+    """
+    Items and GraphQL pageInfo of a listing response. Accepts a bare array (REST tools) or an
+    object wrapping the array, e.g. {"issues": [...], "pageInfo": {...}}.
+    """
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        return iter_json_array(text, len(text) - len(stripped)), None
+
+    page_info = None
+    match = re.search(r'"pageInfo"\s*:\s*', text)
+    if match:
+        try:
+            page_info, _ = _decoder.raw_decode(text, match.end())
+        except json.JSONDecodeError:
+            page_info = None
+
+    match = re.search(r'"(issues|pull_requests|pullRequests|releases|items)"\s*:\s*\[', text)
+    if match:
+        return iter_json_array(text, match.end() - 1), page_info
+
+    raise ValueError("Response is not a listing")
+
+
+class Page:
+    """One page of a listing. `next_args` is only reliable once `items` has been consumed."""
+
+    def __init__(self, items: Iterator[Any], page_info: Optional[Dict], args: Dict, per_page: int):
+        self._items = items
+        self.page_info = page_info
+        self.args = args
+        self.per_page = per_page
+        self.count = 0
+
+    @property
+    def items(self) -> Iterator[Any]:
+        for item in self._items:
+            self.count += 1
+            yield item
+
+    @property
+    def next_args(self) -> Optional[Dict]:
+        if self.page_info is not None:
+            cursor = self.page_info.get("endCursor")
+            return {**self.args, "after": cursor} if self.page_info.get("hasNextPage") and cursor else None
+        # una página incompleta es la última
+        if self.count < self.per_page:
+            return None
+        return {**self.args, "page": int(self.args.get("page", 1)) + 1}
+
+
+async def iter_pages(session, tool_name: str, args: Dict, max_pages: int) -> AsyncIterator[Page]:
+    """
+    Lazily follows MCP pagination: a page is only requested after the previous one has been consumed.
+    Page-number tools use `page`; GraphQL-backed tools (list_issues) use the `after` cursor.
+    """
+    per_page = int(args.get("perPage", 30))
+
+    for _ in range(max_pages):
+        result = await session.call_tool(tool_name, args)
+        text, is_error = _result_text(result)
+        if is_error:
+            raise RuntimeError(text or f"{tool_name} failed")
+
+        items, page_info = iter_listing(text)
+        page = Page(items, page_info, args, per_page)
+        yield page
+
+        args = page.next_args
+        if args is None:
+            return
+
+
+def item_state(item: Dict) -> str:
+    return str(item.get("state") or ("draft" if item.get("draft") else "published"))
+
+
+def listing_order(tool_name: str, args: Dict) -> Optional[Tuple[str, bool]]:
+    """
+    (date field, descending) the MCP server sorts a listing by for `args`: "created" or "updated".
+    None for orders that cannot be reproduced from the items (popularity, comments...).
+    """
+    direction = str(args.get("direction") or "desc").lower()
+    if direction not in ("asc", "desc"):
+        return None
+    if tool_name == "list_pull_requests":
+        # REST: sort=created por defecto (popularity / long-running no se pueden reproducir)
+        field = {"created": "created", "updated": "updated"}.get(str(args.get("sort") or "created").lower())
+    elif tool_name == "list_issues":
+        # GraphQL: orderBy=CREATED_AT por defecto (COMMENTS no se puede reproducir)
+        field = {"CREATED_AT": "created", "UPDATED_AT": "updated"}.get(str(args.get("orderBy") or "CREATED_AT").upper())
+    else:
+        # list_releases no admite orden: siempre los más recientes primero
+        field = None if args.get("sort") or args.get("direction") or args.get("orderBy") else "created"
+    return (field, direction == "desc") if field else None
+
+
+def order_key(item: Dict, field: str) -> str:
+    if field == "updated":
+        return str(item.get("updated_at") or item.get("updatedAt") or "")
+    return str(item.get("created_at") or item.get("createdAt") or "")
+
+
+def order_heading(order: Optional[Tuple[str, bool]], n: int) -> str:
+    if order is None:
+        return f"First {n} in the order returned by GitHub"
+    field, descending = order
+    if field == "updated":
+        return f"{'Most' if descending else 'Least'} recently updated {n}"
+    return f"{'Newest' if descending else 'Oldest'} {n} by creation date"
+
+
+class TopItems:
+    """
+    The first `n` items of a listing in `order` (listing_order), ties and order None in arrival
+    order. Keeps at most 2n items however long the listing is.
+    """
+
+    def __init__(self, n: int, order: Optional[Tuple[str, bool]]):
+        self.n = n
+        self.order = order
+        self._items: List[Tuple[str, Dict]] = []
+
+    def add(self, item: Dict) -> None:
+        key = order_key(item, self.order[0]) if self.order else ""
+        self._items.append((key, item))
+        if len(self._items) >= 2 * self.n:
+            self._trim()
+
+    def _trim(self) -> None:
+        if self.order is not None:
+            # sort estable: a igual fecha se mantiene el orden del servidor
+            self._items.sort(key=lambda entry: entry[0], reverse=self.order[1])
+        del self._items[self.n:]
+
+    def items(self) -> List[Dict]:
+        self._trim()
+        return [item for _, item in self._items]
+
+
+def format_summary(
+    tool_name: str,
+    top_items: List[Dict],
+    states: Counter,
+    seen: int,
+    source: str,
+    token_budget: int = 600,
+    order: Optional[Tuple[str, bool]] = ("created", True),
+) -> List[str]:
+    """Header with the counts by state plus the formatted `top_items` (in `order`) within `token_budget`."""
+    processor = PROCESSORS[tool_name]
+    truncate = PAGINATED_TOOLS[tool_name]
+    counts = ", ".join(f"{state}: {n}" for state, n in states.most_common())
+    header = f"{seen} items in {source} ({counts}). {order_heading(order, len(top_items))}:"
+    lines, used = [header], len(header) // 4
+    for item in top_items:
+        line = processor.format_item(item, truncate=truncate)
+        cost = len(line) // 4 + 1  # ~4 caracteres por token
+        if used + cost > token_budget:
+            lines.append("... (truncated to fit the token budget)")
+            break
+        lines.append(line)
+        used += cost
+    return lines
+
+
+def item_date(item: Dict) -> str:
+    for key in _DATE_KEYS:
+        if item.get(key):
+            return str(item[key])
+    return ""
+
+
+async def summarize_listing(
+    session,
+    tool_name: str,
+    args: Dict,
+    top_n: int = 10,
+    max_pages: int = 1,
+    token_budget: int = 600,
+    on_top_items: Optional[Callable[[List[Dict]], None]] = None,
+) -> str:
+    """
+    Streams a paginated listing and returns a bounded summary: item counts by state, the first
+    `top_n` items in the order the call asked for (`sort`/`orderBy` and `direction`, see
+    listing_order; the server's order when it cannot be reproduced) formatted with the tool's
+    processor within `token_budget`, and the arguments to request the next page. Memory is bounded
+    by `top_n`, not by the size of the listing. `on_top_items` receives those items in that order
+    (used by the prefetcher).
+    """
+    states = Counter()
+    order = listing_order(tool_name, args)
+    top = TopItems(top_n, order)
+    seen = 0
+    pages = 0
+    next_args = None
+
+    try:
+        async for page in iter_pages(session, tool_name, args, max_pages):
+            pages += 1
+            for item in page.items:
+                seen += 1
+                states[item_state(item)] += 1
+                top.add(item)
+            next_args = page.next_args
+    except (ValueError, json.JSONDecodeError, RuntimeError) as e:
+        return f"Error: Could not run {tool_name}. {e} Try again by using just the required parameters."
+
+    if seen == 0:
+        return "No items found."
+
+    top_items = top.items()
+    if on_top_items is not None:
+        on_top_items(top_items)
+
+    lines = format_summary(tool_name, top_items, states, seen, f"{pages} page(s)", token_budget, order=order)
+    if next_args is not None:
+        cursor = {k: next_args[k] for k in ("page", "after") if k in next_args}
+        lines.append(f"More items available: call {tool_name} again adding {json.dumps(cursor)} to the input.")
+
+    return "\n".join(lines)
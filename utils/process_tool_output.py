@@ -1,275 +1,252 @@
 import json
+import string
 
-from typing import List
+from typing import Any, Dict, Iterable, List, Optional
 
-def process_tool_output(tool_name: str, output: str) -> str:
-    """
-    Process the output from a tool to ensure it fits within token limits.
-    This function can be customized based on specific needs.
-
-    Args:
-        output (str): The raw output from the tool.
-
-    Returns:
-        str: The processed output.
-    """
-    tools_available = {
-        "list_pull_requests": list_pull_requests,
-        "list_releases": list_releases,
-        "list_issues": list_issues,
-        "get_file_contents": get_file_contents,
-        "get_pull_request": get_pull_request,
-        "get_issue": get_issue,
-        "get_release_by_tag": get_release_by_tag
-    }
-    if tool_name in tools_available:
-        return tools_available[tool_name](output)
-    else:
-        return f"Tool '{tool_name}' not recognized. Unprocessed output:\n{output}"
-
-
-def list_pull_requests(output: str) -> List:
-    """
-    Specific processing for the list_pull_requests tool output.
-    This function can be customized based on specific needs.
+try:
+    import orjson
 
-    Args:
-        output (str): The raw output from the list_pull_requests tool.
+    def loads(text: str) -> Any:
+        return orjson.loads(text)
 
-    Returns:
-        str: The processed output.
-    """
-    content = getattr(output, "content", [])
-    try:
-        if isinstance(content, List) and content:
-            text = getattr(content[0], "text", "")
-        else:
-            text = ""
-        try:
-            list = json.loads(text)
-        except Exception as e:
-            return f"Error: Could not list pull requests. {e} Try again by using just the required parameters."
-    except Exception as e:
-        print(f"Error processing output: {e}")
+    JSONDecodeError = (orjson.JSONDecodeError, json.JSONDecodeError)
+except ImportError:
+    loads = json.loads
+    JSONDecodeError = json.JSONDecodeError
 
-    result_lines = []
 
-    for pr in list:
-        title = pr.get("title", "No title")
-        url = pr.get("url", "No URL")
-        state = pr.get("state", "No state")
-        number = pr.get("number", "No number")
+FIELD_DEFAULTS = {
+    "title": "No title",
+    "url": "No URL",
+    "state": "No state",
+    "number": "No number",
+    "name": "No name",
+    "tag_name": "No tag name",
+    "published_at": "No publish date",
+    "body": "",
+}
 
-        result_lines.append(f"PR #{number} - {title} ({state}): {url}")
 
-    return "\n".join(result_lines)
-
-def list_releases(output: str) -> List:
+class ToolProcessor:
     """
-    Specific processing for the list_releases tool output.
-    This function can be customized based on specific needs.
+    Declarative formatter for the output of one MCP tool.
 
     Args:
-        output (str): The raw output from the list_releases tool.
-
-    Returns:
-        str: The processed output.
-    """
-    content = getattr(output, "content", [])
-    try:
-        if isinstance(content, List) and content:
-            text = getattr(content[0], "text", "")
-        else:
-            text = ""
+        template (str): format string applied to every item, e.g. "PR #{number} - {title}".
+        is_list (bool): the response is a listing; every element is formatted with `template`.
+        items_key (str): key holding the array when the listing is wrapped in an object.
+        truncate (dict): max characters per field, e.g. {"body": 5000}.
+        defaults (dict): value used when a field is missing (FIELD_DEFAULTS otherwise).
+        source (str): "json" (first text content) or "resource" (embedded resource text, get_file_contents).
+        error_hint (str): appended to parse errors so the agent can retry.
+    """
+
+    def __init__(
+        self,
+        template: str = "",
+        is_list: bool = False,
+        items_key: Optional[str] = None,
+        truncate: Optional[Dict[str, int]] = None,
+        defaults: Optional[Dict[str, Any]] = None,
+        source: str = "json",
+        error_hint: str = "Try again by using just the required parameters.",
+    ):
+        self.template = template
+        self.is_list = is_list
+        self.items_key = items_key
+        self.truncate = truncate or {}
+        self.defaults = {**FIELD_DEFAULTS, **(defaults or {})}
+        self.source = source
+        self.error_hint = error_hint
+        self.fields = _template_fields(template)
+
+    def format_item(self, item: Dict, truncate: Optional[Dict[str, int]] = None) -> str:
+        if not self.fields:
+            return json.dumps(item, ensure_ascii=False, default=str)[:500]
+        limits = {**self.truncate, **(truncate or {})}
+        values = {}
+        for field in self.fields:
+            value = item.get(field)
+            if value is None:
+                value = self.defaults.get(field, "")
+            limit = limits.get(field)
+            if limit is not None and isinstance(value, str) and len(value) > limit:
+                value = value[:limit] + " ..."
+            values[field] = value
+        return self.template.format(**values)
+
+    def items(self, data: Any) -> Iterable[Dict]:
+        if isinstance(data, dict):
+            data = data.get(self.items_key, []) if self.items_key else _first_list(data)
+        return data if isinstance(data, list) else []
+
+    def __call__(self, tool_name: str, output) -> str:
+        content = getattr(output, "content", None) or []
+
+        if self.source == "resource":
+            try:
+                text = getattr(getattr(content[1], "resource", ""), "text", "")
+            except Exception as e:
+                return f"Error processing output: {e}. {self.error_hint}"
+            limit = self.truncate.get("text")
+            if limit is not None and len(text) > limit:
+                text = text[:limit] + "..."
+            return text
+
+        text = getattr(content[0], "text", "") if content else ""
+        if getattr(output, "isError", False):
+            return f"Error from {tool_name}: {text} {self.error_hint}"
         try:
-            list = json.loads(text)
-        except json.JSONDecodeError:
-            return "Error: Could not list releases. Try again by using just the required parameters."
-    except Exception as e:
-        print(f"Error processing output: {e}")
-
-    result_lines = []
-
-    for release in list:
-        name = release.get("name", "No name")
-        tag_name = release.get("tag_name", "No tag name")
-        url = release.get("url", "No URL")
-        published_at = release.get("published_at", "No publish date")
-        body = release.get("body", "")
-
-        if len(body) > 500:
-            body = body[:500] + " ..."
-
-        result_lines.append(f"Release {name} ({tag_name}) published at {published_at}: {url}\n {body}")
-
-    return "\n".join(result_lines)
-
-
-def list_issues(output: str) -> List:
-    """
-    Specific processing for the list_issues tool output.
-    This function can be customized based on specific needs.
-
-    Args:
-        output (str): The raw output from the list_issues tool.
-
-    Returns:
-        str: The processed output.
+            data = loads(text)
+        except JSONDecodeError as e:
+            return f"Error: Could not run {tool_name}. {e} {self.error_hint}"
+
+        if self.is_list:
+            return "\n".join(self.format_item(item) for item in self.items(data) if isinstance(item, dict))
+        if isinstance(data, dict):
+            return self.format_item(data)
+        return str(data)
+
+
+def _template_fields(template: str) -> List[str]:
+    return [field for _, field, _, _ in string.Formatter().parse(template) if field]
+
+
+def _first_list(data: Dict) -> List:
+    for value in data.values():
+        if isinstance(value, list):
+            return value
+    return []
+
+
+PROCESSORS: Dict[str, ToolProcessor] = {
+    "list_pull_requests": ToolProcessor(
+        "PR #{number} - {title} ({state}): {url}",
+        is_list=True,
+    ),
+    "list_releases": ToolProcessor(
+        "Release {name} ({tag_name}) published at {published_at}: {url}\n {body}",
+        is_list=True,
+        truncate={"body": 500},
+    ),
+    "list_issues": ToolProcessor(
+        "Issue #{number} - {title} ({state})",
+        is_list=True,
+        items_key="issues",
+        error_hint="Try again modifying the parameters.",
+    ),
+    "get_file_contents": ToolProcessor(
+        source="resource",
+        truncate={"text": 5000},
+        error_hint="Try again by using just the required parameters or change ref parameter from 'main' to 'master'.",
+    ),
+    "get_pull_request": ToolProcessor(
+        "PR #{number} - {title} ({state}): {url}\n {body}",
+        truncate={"body": 5000},
+        defaults={"body": "No body"},
+    ),
+    "get_issue": ToolProcessor(
+        "Issue #{number} - {title} ({state}): {url}\n {body}",
+        truncate={"body": 5000},
+        defaults={"body": "No body"},
+    ),
+    "get_release_by_tag": ToolProcessor(
+        "Release {name} ({tag_name}) published at {published_at}: {url}\n {body}",
+        truncate={"body": 5000},
+    ),
+}
+
+
+# Campos que se proyectan, por orden de preferencia, al generar un procesador para una herramienta nueva
+_PROJECTION_PRIORITY = (
+    "number", "name", "title", "full_name", "path", "tag_name", "state", "sha", "login",
+    "html_url", "url", "created_at", "updated_at", "published_at",
+)
+_LONG_TEXT_FIELDS = ("body", "description", "message", "content", "text", "patch")
+
+
+def processor_from_shape(tool_name: str, data: Any, max_fields: int = 5) -> ToolProcessor:
+    """
+    Builds a processor for a tool without a hand-written entry from the shape of one response:
+    listings keep up to `max_fields` identifying scalar fields per item; single objects also keep
+    one long text field, truncated.
+    """
+    is_list = isinstance(data, list) or (isinstance(data, dict) and bool(_first_list(data)))
+    sample = {}
+    if isinstance(data, list):
+        sample = next((item for item in data if isinstance(item, dict)), {})
+    elif is_list:
+        sample = next((item for item in _first_list(data) if isinstance(item, dict)), {})
+    elif isinstance(data, dict):
+        sample = data
+
+    fields = [f for f in _PROJECTION_PRIORITY if f in sample and not isinstance(sample[f], (dict, list))]
+    fields = fields[:max_fields] or [k for k, v in sample.items() if not isinstance(v, (dict, list))][:max_fields]
+    template = " | ".join(f"{f}: {{{f}}}" for f in fields)
+    truncate = {f: 200 for f in fields}
+
+    if not is_list:
+        text_field = next((f for f in _LONG_TEXT_FIELDS if isinstance(sample.get(f), str)), None)
+        if text_field:
+            template += f"\n{{{text_field}}}"
+            truncate[text_field] = 2000
+
+    items_key = None
+    if isinstance(data, dict) and is_list:
+        items_key = next(k for k, v in data.items() if isinstance(v, list))
+    return ToolProcessor(template, is_list=is_list, items_key=items_key, truncate=truncate,
+                         defaults={f: "" for f in fields})
+
+
+def register_processor(tool_name: str, processor: ToolProcessor) -> None:
+    PROCESSORS[tool_name] = processor
+
+
+def register_processors_from_schema(tools: Iterable) -> None:
+    """
+    Registers a placeholder for every MCP tool (objects with `name` and `inputSchema`) that has no
+    processor yet. Tools whose schema does not suggest a listing or object are left unprocessed;
+    the projection itself is derived from the first response (see process_tool_output).
+    """
+    for tool in tools:
+        if tool.name in PROCESSORS:
+            continue
+        props = (getattr(tool, "inputSchema", None) or {}).get("properties") or {}
+        if tool.name.startswith(("list_", "search_", "get_")) or "page" in props or "perPage" in props:
+            _PENDING_SHAPE.add(tool.name)
+
+
+_PENDING_SHAPE = set()
+
+
+def process_tool_output(tool_name: str, output) -> str:
     """
-    content = getattr(output, "content", [])
-    try:
-        if isinstance(content, List) and content:
-            text = getattr(content[0], "text", "")
-        else:
-            text = ""
-        try:
-            list = json.loads(text)
-        except json.JSONDecodeError:
-            return "Error: Could not list issues. Try again modifying the parameters."
-    except Exception as e:
-        print(f"Error processing output: {e}")
-
-    result_lines = []
-
-    issues = list.get("issues", [])
-
-    for issue in issues:
-        title = issue.get("title", "No title")
-        state = issue.get("state", "No state")
-        number = issue.get("number", "No number")
-
-        result_lines.append(f"Issue #{number} - {title} ({state})")
-
-    return "\n".join(result_lines)
-
-def get_file_contents(output: str) -> str:
-    """
-    Specific processing for the get_file_contents tool output.
-    This function can be customized based on specific needs.
-
-    Args:
-        output (str): The raw output from the get_file_contents tool.
-
-    Returns:
-        str: The processed output.
-    """
-    content = getattr(output, "content", [])
-    try:
-        if isinstance(content, List) and content:
-            resource = getattr(content[1], "resource", "")
-            text = getattr(resource, "text", "")
-        else:
-            text = ""
-    except Exception as e:
-        return f"Error processing output: {e}. Try again by using just the required parameters or change ref parameter from 'main' to 'master'."
-
-    if len(text) > 5000:
-        text = text[:5000] + "..."
-        
-    return text
-
-def get_pull_request(output: str) -> str:
-    """
-    Specific processing for the get_pull_request tool output.
-    This function can be customized based on specific needs.
-
-    Args:
-        output (str): The raw output from the get_pull_request tool.
-
-    Returns:
-        str: The processed output.
-    """
-    content = getattr(output, "content", [])
-    try:
-        if isinstance(content, List) and content:
-            text = getattr(content[0], "text", "")
-        else:
-            text = ""
-        try:
-            pr = json.loads(text)
-        except json.JSONDecodeError:
-            return "Error: Could not get pull request. Try again by using just the required parameters."
-    except Exception as e:
-        print(f"Error processing output: {e}")
-
-    title = pr.get("title", "No title")
-    url = pr.get("url", "No URL")
-    state = pr.get("state", "No state")
-    number = pr.get("number", "No number")
-    body = pr.get("body", "No body")
-
-    if len(body) > 5000:
-        body = body[:5000] + "..."
-
-    return f"PR #{number} - {title} ({state}): {url}\n {body}"
+    Process the output from a tool to ensure it fits within token limits.
 
-
-def get_issue(output: str) -> str:
-    """
-    Specific processing for the get_issue tool output.
-    This function can be customized based on specific needs.
+    Tools with a processor in PROCESSORS are formatted declaratively. Tools registered through
+    register_processors_from_schema get a processor generated from their first response.
 
     Args:
-        output (str): The raw output from the get_issue tool.
+        tool_name (str): Name of the MCP tool.
+        output: The raw CallToolResult from the tool.
 
     Returns:
         str: The processed output.
     """
-    content = getattr(output, "content", [])
-    try:
-        if isinstance(content, List) and content:
-            text = getattr(content[0], "text", "")
-        else:
-            text = ""
-        try:
-            issue = json.loads(text)
-        except json.JSONDecodeError:
-            return "Error: Could not get issue. Try again by using just the required parameters."
-    except Exception as e:
-        print(f"Error processing output: {e}")
-
-    title = issue.get("title", "No title")
-    url = issue.get("url", "No URL")
-    state = issue.get("state", "No state")
-    number = issue.get("number", "No number")
-    body = issue.get("body", "No body")
-
-    if len(body) > 5000:
-        body = body[:5000] + "..."
+    processor = PROCESSORS.get(tool_name)
+    if processor is not None:
+        return processor(tool_name, output)
 
-    return f"Issue #{number} - {title} ({state}): {url}\n {body}"
-
-def get_release_by_tag(output: str) -> str:
-    """
-    Specific processing for the get_release_by_tag tool output.
-    This function can be customized based on specific needs.
-
-    Args:
-        output (str): The raw output from the get_release_by_tag tool.
-
-    Returns:
-        str: The processed output.
-    """
-    content = getattr(output, "content", [])
-    try:
-        if isinstance(content, List) and content:
-            text = getattr(content[0], "text", "")
-        else:
-            text = ""
+    content = getattr(output, "content", None) or []
+    text = getattr(content[0], "text", "") if content else ""
+    if tool_name in _PENDING_SHAPE and not getattr(output, "isError", False):
         try:
-            release = json.loads(text)
-        except json.JSONDecodeError:
-            return "Error: Could not get release by tag. Try again by using just the required parameters."
-    except Exception as e:
-        print(f"Error processing output: {e}")
-
-    name = release.get("name", "No name")
-    tag_name = release.get("tag_name", "No tag name")
-    url = release.get("url", "No URL")
-    published_at = release.get("published_at", "No publish date")
-    body = release.get("body", "")
-
-    if len(body) > 5000:
-        body = body[:5000] + "..."
-
-    return f"Release {name} ({tag_name}) published at {published_at}: {url}\n {body}"
\ No newline at end of file
+            data = loads(text)
+        except JSONDecodeError:
+            data = None
+        if isinstance(data, (dict, list)) and data:
+            register_processor(tool_name, processor_from_shape(tool_name, data))
+            _PENDING_SHAPE.discard(tool_name)
+            return PROCESSORS[tool_name](tool_name, output)
+
+    return f"Tool '{tool_name}' not recognized. Unprocessed output:\n{text or output}"
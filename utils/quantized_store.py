@@ -0,0 +1,269 @@
+from typing import List, Dict, Optional, Set
+import numpy as np
+import os
+import tempfile
+import uuid
+
+from utils import metrics
+
+
+# popcount de cada byte posible, para la distancia de Hamming sobre códigos empaquetados
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def quantize_int8(vectors: np.ndarray):
+    """
+    Symmetric scalar quantization with one scale per vector.
+
+    Args:
+        vectors (np.ndarray): float matrix of shape (n, dim).
+
+    Returns:
+        tuple: (int8 codes of shape (n, dim), float32 scales of shape (n,)).
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    max_abs = np.abs(vectors).max(axis=1)
+    scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """
+    Sign quantization: one bit per dimension, packed into uint8 (dim / 8 bytes per vector).
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    return np.packbits(vectors > 0, axis=1)
+
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    return _POPCOUNT[np.bitwise_xor(codes, query_code)].sum(axis=1, dtype=np.int32)
+
+
+class QuantizedVectorStore:
+    """
+    Local vector store that keeps int8 or binary codes in memory and re-scores a small
+    candidate set with the full precision vectors.
+
+    Exposes the same `upsert_embeddings` / `query` interface as `PineconeVectorStore`, so it
+    can be plugged into `RAGAgent` for large local corpora. When `storage_dir` is given the
+    float32 vectors used for re-scoring live in a memory-mapped file on disk and only the
+    codes stay resident. Each store gets its own file in `storage_dir` (removed by `close`),
+    so several stores can share the directory.
+
+    Ids are unique: adding an existing id replaces its vector, and `upsert_embeddings` replaces
+    every chunk of the same repository and document, so re-ingesting a README does not
+    duplicate it.
+
+    int8 keeps recall close to float32 at 1/4 of the memory. Binary codes take 1/32 but are a
+    much coarser first stage: use them with a large `rescore_factor`.
+    """
+
+    MODES = ("int8", "binary", "float32")
+
+    def __init__(
+        self,
+        dimension: int = 768,
+        mode: str = "int8",
+        rescore_factor: int = 4,
+        storage_dir: Optional[str] = None,
+        search_batch: int = 4096,
+    ):
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be one of {self.MODES}, got '{mode}'")
+        if mode == "binary" and dimension % 8 != 0:
+            raise ValueError("binary mode requires a dimension multiple of 8")
+
+        self.dimension = dimension
+        self.mode = mode
+        self.rescore_factor = max(1, rescore_factor)
+        self.search_batch = search_batch
+
+        self.ids: List[str] = []
+        self.metadata: List[Dict] = []
+        self._rows: Dict[str, int] = {}  # id -> fila vigente
+        self._deleted: Set[int] = set()  # filas sustituidas o borradas: se quedan en los arrays, nunca se devuelven
+
+        # bloques pendientes de consolidar; se concatenan de forma perezosa en la primera consulta
+        self._pending_codes: List[np.ndarray] = []
+        self._pending_scales: List[np.ndarray] = []
+        self._pending_full: List[np.ndarray] = []
+        self._codes = self._empty_codes()
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._full_mem = np.zeros((0, dimension), dtype=np.float32)
+
+        self.storage_path = None
+        self._full_map = None
+        if storage_dir:
+            os.makedirs(storage_dir, exist_ok=True)
+            # un fichero nuevo por store: las filas del memmap son las de este store y de nadie más
+            fd, self.storage_path = tempfile.mkstemp(prefix=f"vectors-{mode}-{dimension}-", suffix=".f32", dir=storage_dir)
+            os.close(fd)
+
+    def __len__(self) -> int:
+        return len(self.ids) - len(self._deleted)
+
+    def close(self) -> None:
+        """Removes the store's re-scoring file (the store is unusable afterwards)."""
+        self._full_map = None
+        if self.storage_path and os.path.exists(self.storage_path):
+            os.remove(self.storage_path)
+        self.storage_path = None
+
+    def _empty_codes(self) -> np.ndarray:
+        if self.mode == "binary":
+            return np.zeros((0, self.dimension // 8), dtype=np.uint8)
+        if self.mode == "int8":
+            return np.zeros((0, self.dimension), dtype=np.int8)
+        return np.zeros((0, self.dimension), dtype=np.float32)
+
+    def add(self, vectors, ids: Optional[List[str]] = None, metadata: Optional[List[Dict]] = None) -> None:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if vectors.shape[1] != self.dimension:
+            raise ValueError(f"Expected vectors of dimension {self.dimension}, got {vectors.shape[1]}")
+
+        # se guarda todo normalizado: el producto escalar es la similitud coseno (igual que el índice de Pinecone)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 0, norms, 1.0)
+
+        n = vectors.shape[0]
+        ids = ids or [f"chunk-{uuid.uuid4().hex[:8]}" for _ in range(n)]
+        metadata = metadata or [{} for _ in range(n)]
+        self.delete(ids)
+        for i, id_ in enumerate(ids):
+            if id_ in self._rows:
+                self._deleted.add(self._rows[id_])  # id repetido en el mismo lote: gana el último
+            self._rows[id_] = len(self.ids) + i
+        self.ids.extend(ids)
+        self.metadata.extend(metadata)
+
+        if self.mode == "int8":
+            codes, scales = quantize_int8(vectors)
+            self._pending_codes.append(codes)
+            self._pending_scales.append(scales)
+        elif self.mode == "binary":
+            self._pending_codes.append(quantize_binary(vectors))
+        else:
+            self._pending_codes.append(vectors)
+
+        if self.mode != "float32":
+            if self.storage_path:
+                with open(self.storage_path, "ab") as f:
+                    f.write(vectors.tobytes())
+                self._full_map = None
+            else:
+                self._pending_full.append(vectors)
+
+    def delete(self, ids: List[str]) -> int:
+        """Deletes the given ids (unknown ones are ignored); returns how many were deleted."""
+        rows = [self._rows.pop(id_) for id_ in ids if id_ in self._rows]
+        self._deleted.update(rows)
+        return len(rows)
+
+    def upsert_embeddings(self, items: List[Dict], document: str, repo: str) -> None:
+        # los fragmentos anteriores de este documento se sustituyen, también si ahora hay menos
+        self.delete([
+            id_ for id_, row in self._rows.items()
+            if self.metadata[row].get("repo") == repo and self.metadata[row].get("document") == document
+        ])
+        vectors, metadata = [], []
+        for i, item in enumerate(items):
+            if isinstance(item, dict):
+                vectors.append(item.get("embedding", []))
+                text = item.get("text", "")
+            else:
+                vectors.append(item)
+                text = ""
+            metadata.append({"text": text, "chunk_index": i, "document": document, "repo": repo})
+
+        if vectors:
+            self.add(vectors, ids=[f"{repo}-{document}-{i}" for i in range(len(vectors))], metadata=metadata)
+        print(f"[QuantizedStore] {len(vectors)} vectors inserted ({self.mode}).")
+
+    def _consolidate(self) -> None:
+        if self._pending_codes:
+            self._codes = np.concatenate([self._codes] + self._pending_codes)
+            self._pending_codes = []
+        if self._pending_scales:
+            self._scales = np.concatenate([self._scales] + self._pending_scales)
+            self._pending_scales = []
+        if self._pending_full:
+            self._full_mem = np.concatenate([self._full_mem] + self._pending_full)
+            self._pending_full = []
+
+    def _full_vectors(self) -> np.ndarray:
+        if self.mode == "float32":
+            return self._codes
+        if self.storage_path is None:
+            return self._full_mem
+        if self._full_map is None or self._full_map.shape[0] != len(self.ids):
+            self._full_map = np.memmap(self.storage_path, dtype=np.float32, mode="r", shape=(len(self.ids), self.dimension))
+        return self._full_map
+
+    def _coarse_scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate similarity for every stored vector (higher is better)."""
+        n = self._codes.shape[0]
+        scores = np.empty(n, dtype=np.float32)
+
+        if self.mode == "binary":
+            q_code = quantize_binary(query)[0]
+            for start in range(0, n, self.search_batch):
+                block = self._codes[start:start + self.search_batch]
+                scores[start:start + len(block)] = -hamming_distances(block, q_code)
+        elif self.mode == "int8":
+            q_codes, q_scale = quantize_int8(query)
+            # numpy no tiene producto int8 acelerado: se convierte por bloques pequeños (caben en caché) y se usa BLAS
+            q_codes = q_codes[0].astype(np.float32)
+            for start in range(0, n, self.search_batch):
+                block = self._codes[start:start + self.search_batch]
+                dots = block.astype(np.float32) @ q_codes
+                scores[start:start + len(block)] = dots * self._scales[start:start + len(block)] * q_scale[0]
+        else:
+            scores[:] = self._codes @ query
+
+        return scores
+
+    def query(self, embedding: List[float], top_k: int = 5, rescore: bool = True) -> List[Dict]:
+        with metrics.VECTOR_STORE_LATENCY.labels(store=f"local-{self.mode}", op="query").time():
+            return self._query(embedding, top_k, rescore)
+
+    def _query(self, embedding: List[float], top_k: int, rescore: bool) -> List[Dict]:
+        if not len(self):
+            return []
+        self._consolidate()
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        scores = self._coarse_scores(query)
+        deleted = np.fromiter(self._deleted, dtype=np.int64, count=len(self._deleted))
+        scores[deleted] = -np.inf
+        n = scores.shape[0]
+        top_k = min(top_k, len(self))
+
+        if rescore and self.mode != "float32":
+            n_candidates = min(n, top_k * self.rescore_factor)
+            candidates = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+            candidates.sort()  # acceso secuencial al memmap
+            scores = self._full_vectors()[candidates] @ query
+            scores[np.isin(candidates, deleted)] = -np.inf
+        else:
+            candidates = np.arange(n)
+
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        return [
+            {"id": self.ids[candidates[i]], "score": float(scores[i]), "metadata": self.metadata[candidates[i]]}
+            for i in order
+        ]
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Bytes used by the search codes (RAM) and by the re-scoring vectors (RAM or disk)."""
+        self._consolidate()
+        full_bytes = len(self.ids) * self.dimension * 4 if self.mode != "float32" else 0
+        return {
+            "codes_bytes": int(self._codes.nbytes + self._scales.nbytes),
+            "rescore_ram_bytes": 0 if self.storage_path else full_bytes,
+            "rescore_disk_bytes": full_bytes if self.storage_path else 0,
+        }
@@ -2,62 +2,64 @@ import json
 import re
 from typing import Dict, Optional
 
+from utils import metrics, tracing
+from utils.query_classifier import CATEGORY_KEYWORDS, KeywordMatcher, QueryClassifier
+
+
+QUERY_ANALYSES = metrics.counter("query_analysis_total", "Query analyses by what decided them (local, llm, keywords).", ["source"])
+
+_REPOSITORY_PATTERNS = [
+    re.compile(r'github\.com/([^/\s]+/[^/\s]+)', re.IGNORECASE),
+    re.compile(r'(?:repo|repositorio)[:\s]+([^\s]+/[^\s]+)', re.IGNORECASE),
+    re.compile(r'([a-zA-Z0-9_-]+/[a-zA-Z0-9_.-]+)(?:\s|$)', re.IGNORECASE),
+]
+
+
+def extract_repository(query: str) -> Optional[str]:
+    """"owner/repo" mentioned in the query (also used to track the most asked-about repositories)."""
+    for pattern in _REPOSITORY_PATTERNS:
+        match = pattern.search(query)
+        if match:
+            repo = match.group(1)
+            if '/' in repo and len(repo.split('/')) == 2:
+                return repo
+    return None
+
+
 class QueryAnalyzer:
-    def __init__(self, llm, logger=None):
+    def __init__(self, llm=None, logger=None, classifier: Optional[QueryClassifier] = None):
         self.llm = llm
         self.logger = logger
+        # con clasificador local el LLM solo decide los casos dudosos (ver utils/query_classifier.py)
+        self.classifier = classifier
         
         # Palabras clave para detección rápida
-        self.keywords_codigo = {
-            'programming': ['código', 'code', 'programar', 'programming', 'script', 'función', 'function', 
-                           'variable', 'clase', 'class', 'método', 'method', 'algoritmo', 'algorithm'],
-            'github': ['github', 'git', 'repositorio', 'repository', 'repo', 'pull request', 'pr', 
-                      'commit', 'branch', 'fork', 'clone', 'merge'],
-            'open_source': ['open source', 'código abierto', 'opensource', 'libre', 'free software',
-                          'licencia', 'license', 'contribuir', 'contribute'],
-            'lenguages': ['python', 'javascript', 'java', 'c++', 'c#', 'php', 'ruby', 'go', 'rust',
-                        'typescript', 'html', 'css', 'sql', 'bash', 'shell']
-        }
+        self.keywords_codigo = CATEGORY_KEYWORDS
+        self.keyword_matcher = KeywordMatcher(self.keywords_codigo)
 
     def _quick_keyword_check(self, query: str) -> Dict[str, float]:
         """Análisis rápido basado en palabras clave"""
-        query_lower = query.lower()
-        scores = {
-            'programming': 0.0,
-            'github': 0.0,
-            'open_source': 0.0
-        }
-        
-        for category, keywords in self.keywords_codigo.items():
-            matches = sum(1 for keyword in keywords if keyword in query_lower)
-            if category == 'programming':
-                scores['programming'] = min(matches * 0.3, 1.0)
-            elif category == 'github':
-                scores['github'] = min(matches * 0.4, 1.0)
-            elif category in ['open_source', 'lenguages']:
-                scores['open_source'] += min(matches * 0.2, 0.5)
-        
-        scores['open_source'] = min(scores['open_source'], 1.0)
-        return scores
+        return self.keyword_matcher.scores(query)
 
     def _extract_repository(self, query: str) -> Optional[str]:
-        patterns = [
-            r'github\.com/([^/\s]+/[^/\s]+)', 
-            r'(?:repo|repositorio)[:\s]+([^\s]+/[^\s]+)',  
-            r'([a-zA-Z0-9_-]+/[a-zA-Z0-9_.-]+)(?:\s|$)',  
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
-                repo = match.group(1)
-                if '/' in repo and len(repo.split('/')) == 2:
-                    return repo
-        return None
+        return extract_repository(query)
 
     def analyze_query(self, query: str) -> Dict:
-        keyword_scores = self._quick_keyword_check(query)
         repository = self._extract_repository(query)
+        with tracing.span("query_analysis") as span:
+            if self.classifier is not None:
+                local = self.classifier.classify(query)
+                if local.pop("confident") or self.llm is None:
+                    span.set_attribute("source", "local")
+                    QUERY_ANALYSES.labels(source="local").inc()
+                    return {**local, "repository": repository, "source": "local"}
+            analysis = self._analyze_with_llm(query, repository)
+            span.set_attribute("source", analysis["source"])
+            QUERY_ANALYSES.labels(source=analysis["source"]).inc()
+            return analysis
+
+    def _analyze_with_llm(self, query: str, repository: Optional[str]) -> Dict:
+        keyword_scores = self._quick_keyword_check(query)
         
         # Prompt mejorado y más específico
         prompt = f"""You are a classifier with a POSITIVE bias towards programming topics.
@@ -87,13 +89,12 @@ Expected response format:
         try:
             response = self.llm.invoke(prompt)
             
-            response = self._clean_llm_response(response.content)
-            
-            llm_analysis = json.loads(response)
+            llm_analysis = self._parse_llm_response(response.content)
             
             llm_analysis = self._validate_analysis(llm_analysis)
             
             final_analysis = self._combine_analyses(llm_analysis, keyword_scores, repository)
+            final_analysis["source"] = "llm"
             
         except Exception as e:
             if self.logger:
@@ -105,11 +106,24 @@ Expected response format:
                 "programming": keyword_scores['programming'] > 0.3,
                 "repository": repository,
                 "trust": max(keyword_scores.values()) if any(v > 0.3 for v in keyword_scores.values()) else 0.1,
-                "reasoning": "Analysis based on keywords (LLM failed)"
+                "reasoning": "Analysis based on keywords (LLM failed)",
+                "source": "keywords",
             }
         
         return final_analysis
 
+    def _parse_llm_response(self, response: str) -> Dict:
+        """First JSON object of the response; the line cleanup below is only the fallback."""
+        start = response.find('{')
+        if start != -1:
+            try:
+                parsed, _ = json.JSONDecoder().raw_decode(response[start:])
+                if isinstance(parsed, dict):
+                    return parsed
+            except json.JSONDecodeError:
+                pass
+        return json.loads(self._clean_llm_response(response))
+
     def _clean_llm_response(self, response: str) -> str:
 
         response = re.sub(r'```json\s*', '', response)
@@ -152,7 +166,7 @@ Expected response format:
 
     def _combine_analyses(self, llm_analysis: Dict, keyword_scores: Dict, repository: Optional[str]) -> Dict:
 
-        if llm_analysis["confianza"] < 0.4:
+        if llm_analysis["trust"] < 0.4:
             llm_analysis["open_source"] = llm_analysis["open_source"] or keyword_scores['open_source'] > 0.3
             llm_analysis["github"] = llm_analysis["github"] or keyword_scores['github'] > 0.3
             llm_analysis["programming"] = llm_analysis["programming"] or keyword_scores['programming'] > 0.3
@@ -0,0 +1,217 @@
+"""
+LLM-free query classifier used by QueryAnalyzer (utils/query_analysis.py).
+
+- KeywordMatcher: the category keywords compiled into one whole-word alternation, counted in a
+  single pass over the query (no substring hits like "pr" in "print" or "go" in "google").
+- CentroidClassifier: nearest centroid over normalized Embedder vectors of the labeled queries in
+  query_classifier_train.jsonl (one {"query", "label"} object per line, labeled by content:
+  github, open_source, programming or off_topic). resultados.xlsb.csv is the evaluation set of
+  benchmarks/ and is never used for training. Centroids are cached in an .npz file keyed by the
+  embedding model and the training examples, so only the first start embeds them.
+
+QueryClassifier combines both and reports whether it is confident. QueryAnalyzer calls the LLM
+only when it is not (or always, when built without a classifier).
+
+    classifier = QueryClassifier.from_env(embedder)
+    analysis = QueryAnalyzer(llm, classifier=classifier).analyze_query(query)
+
+`python -m utils.query_classifier` reports, on the held-out evaluation set, how many questions
+are classified as relevant and how many would still go to the LLM.
+
+Environment:
+    QUERY_CLASSIFIER_TRAIN          labeled training queries (default query_classifier_train.jsonl at the repository root)
+    QUERY_CENTROIDS_PATH            centroid cache (default ~/.cache/github-ai-assistant/query_centroids.npz)
+    QUERY_CLASSIFIER_MIN_CONFIDENCE probability of the top label under which the LLM decides (default 0.6)
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+
+
+DEFAULT_TRAIN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "query_classifier_train.jsonl")
+DEFAULT_CENTROIDS_PATH = os.path.join(os.path.expanduser("~"), ".cache", "github-ai-assistant", "query_centroids.npz")
+
+CATEGORIES = ("open_source", "github", "programming")
+LABELS = CATEGORIES + ("off_topic",)
+
+CATEGORY_KEYWORDS: Dict[str, List[str]] = {
+    'programming': ['código', 'code', 'programar', 'programming', 'script', 'función', 'function',
+                    'variable', 'clase', 'class', 'método', 'method', 'algoritmo', 'algorithm'],
+    'github': ['github', 'git', 'repositorio', 'repository', 'repo', 'pull request', 'pr',
+               'commit', 'branch', 'fork', 'clone', 'merge'],
+    'open_source': ['open source', 'código abierto', 'opensource', 'libre', 'free software',
+                    'licencia', 'license', 'contribuir', 'contribute'],
+    'lenguages': ['python', 'javascript', 'java', 'c++', 'c#', 'php', 'ruby', 'go', 'rust',
+                  'typescript', 'html', 'css', 'sql', 'bash', 'shell'],
+}
+
+
+class KeywordMatcher:
+    """Keyword scores per category with one compiled regex (same weights as the old substring check)."""
+
+    def __init__(self, keywords: Dict[str, List[str]] = CATEGORY_KEYWORDS):
+        # las más largas primero: "pull request" antes que "pr", "código abierto" antes que "código"
+        entries = sorted(((k.lower(), c) for c, words in keywords.items() for k in words), key=lambda e: -len(e[0]))
+        self._categories = [c for _, c in entries]
+        alternation = "|".join(f"({re.escape(k)})" for k, _ in entries)
+        self._pattern = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)")
+
+    def counts(self, query: str) -> Dict[str, int]:
+        counts = dict.fromkeys(CATEGORY_KEYWORDS, 0)
+        for match in self._pattern.finditer(query.lower()):
+            counts[self._categories[match.lastindex - 1]] += 1
+        return counts
+
+    def scores(self, query: str) -> Dict[str, float]:
+        counts = self.counts(query)
+        return {
+            'programming': min(counts['programming'] * 0.3, 1.0),
+            'github': min(counts['github'] * 0.4, 1.0),
+            'open_source': min(min(counts['open_source'] * 0.2, 0.5) + min(counts['lenguages'] * 0.2, 0.5), 1.0),
+        }
+
+
+def training_examples(path: Optional[str] = None) -> List[Tuple[str, str]]:
+    """(query, label) pairs of the training file; [] when it is missing (keywords only)."""
+    path = path or os.getenv("QUERY_CLASSIFIER_TRAIN", DEFAULT_TRAIN_PATH)
+    examples = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    if entry["label"] not in LABELS:
+                        raise ValueError(f"unknown label {entry['label']!r}")
+                    examples.append((entry["query"].strip(), entry["label"]))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[QueryClassifier] No training examples, using keywords only: {e}")
+        return []
+    return examples
+
+
+def examples_digest(examples: Sequence[Tuple[str, str]]) -> str:
+    h = hashlib.sha256()
+    for text, label in examples:
+        h.update(f"{label}\t{text}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+class CentroidClassifier:
+    """Nearest centroid over normalized embeddings; probabilities are a softmax of the cosine similarities."""
+
+    def __init__(self, labels: Sequence[str], centroids: np.ndarray, model_id: str, temperature: float = 0.05):
+        self.labels = list(labels)
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.model_id = model_id
+        self.temperature = temperature
+
+    @classmethod
+    def fit(cls, embedder, examples: Sequence[Tuple[str, str]], temperature: float = 0.05) -> "CentroidClassifier":
+        vectors = np.asarray(embedder.embed_chunks([text for text, _ in examples], normalize=True), dtype=np.float32)
+        targets = np.array([label for _, label in examples])
+        labels = [label for label in LABELS if (targets == label).any()]
+        centroids = np.stack([vectors[targets == label].mean(axis=0) for label in labels])
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        return cls(labels, centroids, getattr(embedder, "model_id", ""), temperature)
+
+    def probabilities(self, vector: Sequence[float]) -> Dict[str, float]:
+        q = np.asarray(vector, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+        logits = (self.centroids @ q) / self.temperature
+        p = np.exp(logits - logits.max())
+        p /= p.sum()
+        return {label: float(v) for label, v in zip(self.labels, p)}
+
+    def save(self, path: str, digest: str) -> None:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(path, centroids=self.centroids, labels=np.array(self.labels), model_id=self.model_id, digest=digest)
+
+    @classmethod
+    def load(cls, path: str, model_id: str, digest: str, temperature: float = 0.05) -> Optional["CentroidClassifier"]:
+        """Cached centroids, or None when missing or trained with another model or other examples."""
+        try:
+            with np.load(path) as data:
+                if str(data["model_id"]) != model_id or str(data["digest"]) != digest:
+                    return None
+                return cls([str(label) for label in data["labels"]], data["centroids"], model_id, temperature)
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+class QueryClassifier:
+    """
+    Local analysis with the QueryAnalyzer fields plus "confident". Without an embedder only the
+    keywords decide, and a query without keywords is never confident.
+    """
+
+    def __init__(self, embedder=None, centroids: Optional[CentroidClassifier] = None, min_confidence: float = 0.6):
+        self.embedder = embedder
+        self.centroids = centroids
+        self.min_confidence = min_confidence
+        self.matcher = KeywordMatcher()
+
+    @classmethod
+    def from_env(cls, embedder=None, examples_path: Optional[str] = None) -> "QueryClassifier":
+        centroids = None
+        examples = training_examples(examples_path) if embedder is not None else []
+        if examples:
+            path = os.getenv("QUERY_CENTROIDS_PATH", DEFAULT_CENTROIDS_PATH)
+            digest = examples_digest(examples)
+            centroids = CentroidClassifier.load(path, getattr(embedder, "model_id", ""), digest)
+            if centroids is None:
+                centroids = CentroidClassifier.fit(embedder, examples)
+                try:
+                    centroids.save(path, digest)
+                except OSError as e:
+                    print(f"[QueryClassifier] Could not cache the centroids: {e}")
+        return cls(embedder, centroids, min_confidence=float(os.getenv("QUERY_CLASSIFIER_MIN_CONFIDENCE", "0.6")))
+
+    def classify(self, query: str) -> Dict:
+        scores = self.matcher.scores(query)
+        keyword_hit = max(scores.values()) > 0.3
+        flags = {c: scores[c] > 0.3 for c in CATEGORIES}
+
+        if self.centroids is None:
+            trust = max(scores.values()) if keyword_hit else 0.1
+            return {**flags, "trust": trust, "confident": keyword_hit, "reasoning": "Local classifier: keywords"}
+
+        probs = self.centroids.probabilities(self.embedder.embed_chunk(query))
+        top = max(probs, key=probs.get)
+        trust = probs[top]
+        if top == "off_topic":
+            # palabras clave de programación en una pregunta que parece fuera de tema: decide el LLM
+            confident = trust >= self.min_confidence and not keyword_hit
+        else:
+            flags = {c: flags[c] or probs.get(c, 0.0) >= 0.25 for c in CATEGORIES}
+            flags[top] = True
+            confident = trust >= self.min_confidence
+        ranked = ", ".join(f"{label} {p:.2f}" for label, p in sorted(probs.items(), key=lambda kv: -kv[1]))
+        return {**flags, "trust": trust, "confident": confident, "reasoning": f"Local classifier: {ranked}"}
+
+
+def main():
+    import argparse
+
+    from benchmarks.datasets import RESULTS_CSV, load_results_csv
+    from utils.embeddings import Embedder
+
+    parser = argparse.ArgumentParser(description="Evaluate the local query classifier on the held-out evaluation set.")
+    parser.add_argument("--queries", default=RESULTS_CSV, help="evaluated queries (all of them are in scope)")
+    parser.add_argument("--model", default=os.getenv("EMBEDDING_MODEL", "all-mpnet-base-v2"))
+    parser.add_argument("--backend", default=os.getenv("EMBEDDING_BACKEND", "sentence-transformers"))
+    args = parser.parse_args()
+
+    classifier = QueryClassifier.from_env(Embedder(args.model, backend=args.backend))
+    results = [classifier.classify(row["query"]) for row in load_results_csv(args.queries)]
+    relevant = sum(1 for r in results if any(r[c] for c in CATEGORIES))
+    confident = sum(1 for r in results if r["confident"])
+    print(f"{len(results)} queries: {relevant} relevant, {confident} decided locally, {len(results) - confident} sent to the LLM")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+Local snapshot of the recent pull requests, issues and releases of the most asked-about repositories.
+
+RepoSnapshotStore (SQLite) keeps three things:
+- How often each repository appears in questions. The score decays with a 24 h half-life and
+  is fed with QueryAnalyzer's repository extraction.
+- The recent items of each repository and kind.
+- When each (repository, kind) was last synced.
+
+SnapshotRefresher runs in the background on the assistant's event loop. Every `interval_s` it
+syncs the hottest repositories. The sync is incremental: listings are requested newest-updated
+first, and paging stops at the first item that is not newer than the last sync. Requests go
+through a token-bucket budget, so the refresher stays well inside GitHub's rate limit.
+
+MCPTool answers list_pull_requests / list_issues / list_releases from the snapshot when that
+repository and kind were synced less than `max_age_s` ago and the call only filters by state and
+sorts by creation or update date. Items are ranked with the same rule as the live summaries
+(utils/paginated_output.py: listing_order / TopItems). Busy repositories never fit in one sync, so
+the snapshot may be partial: it then holds every item updated since `covers_since`, and a
+newest-first call is served when its top items all fall in that range (the header says how many
+items the snapshot holds). Other calls on a partial snapshot go to the MCP server.
+
+Environment:
+    REPO_SNAPSHOT              0 disables the snapshot (default 1)
+    REPO_SNAPSHOT_PATH         SQLite file (default ~/.cache/github-ai-assistant/repo_snapshot.sqlite)
+    REPO_SNAPSHOT_TOP          repositories kept in sync (default 5)
+    REPO_SNAPSHOT_MIN_SCORE    decayed query count needed to be synced (default 2)
+    REPO_SNAPSHOT_INTERVAL     seconds between refresh rounds (default 120)
+    REPO_SNAPSHOT_MAX_AGE      seconds a synced listing is served without the MCP server (default 600)
+    REPO_SNAPSHOT_RATE         MCP requests per second spent on refreshing (default 0.5)
+"""
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils import metrics
+from utils.paginated_output import TopItems, format_summary, item_date, item_state, iter_pages, listing_order, order_key
+from utils.tool_cache import RateBudget
+
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "github-ai-assistant", "repo_snapshot.sqlite")
+HALF_LIFE_S = 24 * 3600
+
+# tipo de elemento -> (listado, argumentos de la sincronización incremental: primero lo actualizado más recientemente)
+KINDS: Dict[str, Tuple[str, Dict]] = {
+    "pull_requests": ("list_pull_requests", {"state": "all", "sort": "updated", "direction": "desc", "perPage": 50}),
+    "issues": ("list_issues", {"orderBy": "UPDATED_AT", "direction": "DESC", "perPage": 50}),
+    "releases": ("list_releases", {"perPage": 30}),
+}
+TOOL_KINDS = {tool: kind for kind, (tool, _) in KINDS.items()}
+# argumentos con los que un listado se puede servir desde la instantánea
+SNAPSHOT_ARGS = {"owner", "repo", "state", "perPage", "sort", "direction", "orderBy"}
+
+SNAPSHOT_SYNCS = metrics.counter("repo_snapshot_syncs_total", "Snapshot syncs by kind and status.", ["kind", "status"])
+SNAPSHOT_ITEMS = metrics.counter("repo_snapshot_items_total", "Items written to the snapshot by a sync.", ["kind"])
+
+
+def item_key(kind: str, item: Dict) -> str:
+    if kind == "releases":
+        return str(item.get("tag_name") or item.get("tagName") or item.get("id"))
+    return str(item.get("number"))
+
+
+class RepoSnapshotStore:
+    def __init__(self, path: str = DEFAULT_PATH, max_items: int = 200):
+        self.path = path
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS repo_queries (repo TEXT PRIMARY KEY, score REAL NOT NULL, last_seen REAL NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS items ("
+                " repo TEXT NOT NULL, kind TEXT NOT NULL, key TEXT NOT NULL, state TEXT, updated_at TEXT, data TEXT NOT NULL,"
+                " PRIMARY KEY (repo, kind, key));"
+                "CREATE TABLE IF NOT EXISTS syncs ("
+                " repo TEXT NOT NULL, kind TEXT NOT NULL, synced_at REAL NOT NULL, watermark TEXT,"
+                " complete INTEGER NOT NULL DEFAULT 0, covers_since TEXT, PRIMARY KEY (repo, kind));"
+            )
+            # ficheros creados antes de estas columnas: incompletos y sin cobertura conocida
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(syncs)")}
+            if "complete" not in columns:
+                self._conn.execute("ALTER TABLE syncs ADD COLUMN complete INTEGER NOT NULL DEFAULT 0")
+            if "covers_since" not in columns:
+                self._conn.execute("ALTER TABLE syncs ADD COLUMN covers_since TEXT")
+
+    @classmethod
+    def from_env(cls) -> Optional["RepoSnapshotStore"]:
+        if os.getenv("REPO_SNAPSHOT", "1") == "0":
+            return None
+        try:
+            return cls(os.getenv("REPO_SNAPSHOT_PATH", DEFAULT_PATH))
+        except sqlite3.Error as e:
+            print(f"[Snapshot] Snapshot disabled: {e}")
+            return None
+
+    # --- popularidad ---
+
+    def record_query(self, repository: Optional[str]) -> None:
+        if not repository or "/" not in repository:
+            return
+        repo, now = repository.strip().strip("/").lower(), time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT score, last_seen FROM repo_queries WHERE repo = ?", (repo,)).fetchone()
+            score = row[0] * 0.5 ** ((now - row[1]) / HALF_LIFE_S) + 1 if row else 1.0
+            self._conn.execute("INSERT OR REPLACE INTO repo_queries VALUES (?, ?, ?)", (repo, score, now))
+
+    def hottest(self, n: int, min_score: float = 1.0) -> List[Tuple[str, float]]:
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute("SELECT repo, score, last_seen FROM repo_queries").fetchall()
+        scored = [(repo, score * 0.5 ** ((now - seen) / HALF_LIFE_S)) for repo, score, seen in rows]
+        return sorted([r for r in scored if r[1] >= min_score], key=lambda r: -r[1])[:n]
+
+    # --- elementos ---
+
+    def last_sync(self, repo: str, kind: str) -> Tuple[Optional[float], Optional[str], bool, Optional[str]]:
+        """
+        (synced_at, watermark, complete, covers_since) of the last sync: complete means the snapshot
+        holds the whole listing; otherwise it holds every item updated at or after covers_since (None: unknown).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_at, watermark, complete, covers_since FROM syncs WHERE repo = ? AND kind = ?", (repo.lower(), kind)
+            ).fetchone()
+        return (row[0], row[1], bool(row[2]), row[3]) if row else (None, None, False, None)
+
+    def save(
+        self,
+        repo: str,
+        kind: str,
+        items: List[Dict],
+        watermark: Optional[str],
+        complete: bool = False,
+        covers_since: Optional[str] = None,
+    ) -> None:
+        repo = repo.lower()
+        rows = [(repo, kind, item_key(kind, i), item_state(i), item_date(i), json.dumps(i, ensure_ascii=False)) for i in items]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?)", rows)
+                # solo los max_items actualizados más recientemente por repositorio y tipo
+                trimmed = self._conn.execute(
+                    "DELETE FROM items WHERE repo = ? AND kind = ? AND key NOT IN ("
+                    " SELECT key FROM items WHERE repo = ? AND kind = ? ORDER BY updated_at DESC LIMIT ?)",
+                    (repo, kind, repo, kind, self.max_items),
+                ).rowcount
+                if trimmed:
+                    # recortada a max_items ya no es el listado entero: cubre desde el elemento más antiguo que queda
+                    oldest = self._conn.execute(
+                        "SELECT min(updated_at) FROM items WHERE repo = ? AND kind = ?", (repo, kind)
+                    ).fetchone()[0]
+                    complete, covers_since = False, max(covers_since or "", oldest or "") or None
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO syncs VALUES (?, ?, ?, ?, ?, ?)",
+                    (repo, kind, time.time(), watermark, int(complete), None if complete else covers_since),
+                )
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def items(self, repo: str, kind: str, state: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        query, params = "SELECT data FROM items WHERE repo = ? AND kind = ?", [repo.lower(), kind]
+        if state:
+            query += " AND lower(state) = ?"
+            params.append(state.lower())
+        query += " ORDER BY updated_at DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return [json.loads(row[0]) for row in self._conn.execute(query, params)]
+
+    def answer_listing(self, tool_name: str, args: Dict, max_age_s: float, top_n: int = 10) -> Optional[str]:
+        """
+        The summary summarize_listing would give, from the snapshot; None if it is stale, the
+        filters or the order do not fit, or a partial snapshot may be missing one of the top items.
+        """
+        kind = TOOL_KINDS.get(tool_name)
+        if kind is None or not args.get("owner") or not args.get("repo") or set(args) - SNAPSHOT_ARGS:
+            return None
+        order = listing_order(tool_name, args)
+        if order is None:
+            return None
+        repo = f"{args['owner']}/{args['repo']}"
+        synced_at, _, complete, covers_since = self.last_sync(repo, kind)
+        if synced_at is None or time.time() - synced_at > max_age_s:
+            return None
+        field, descending = order
+        # una instantánea parcial tiene lo actualizado desde covers_since: solo sirve los más recientes
+        if not complete and (covers_since is None or not descending):
+            return None
+        state = str(args.get("state") or "").lower()
+        items = self.items(repo, kind, state=None if state in ("", "all") else state)
+        if not items:
+            return "No items found." if complete else None
+        if not all(order_key(item, field) for item in items):
+            return None  # elementos sin la fecha pedida: no se puede reproducir el orden
+        top = TopItems(top_n, order)
+        for item in items:
+            top.add(item)
+        top_items = top.items()
+        # creado o actualizado después de covers_since implica actualizado después: está en la instantánea
+        if not complete and (len(top_items) < top_n or any(order_key(item, field) < covers_since for item in top_items)):
+            return None
+        states = Counter(item_state(i) for i in items)
+        age = int(time.time() - synced_at)
+        source = f"the local snapshot (synced {age}s ago)"
+        if not complete:
+            source = f"the local snapshot (synced {age}s ago; partial, it holds the {len(items)} most recently updated, the listing has more)"
+        lines = format_summary(tool_name, top_items, states, len(items), source, order=order)
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SnapshotRefresher:
+    """Background task that keeps the snapshot of the hottest repositories up to date."""
+
+    def __init__(
+        self,
+        store: RepoSnapshotStore,
+        session_provider: Callable[[], Any],
+        top_n: int = 5,
+        min_score: float = 2.0,
+        interval_s: float = 120.0,
+        rate_per_s: float = 0.5,
+        max_pages: int = 3,
+        logger: Callable[[str], None] = print,
+    ):
+        self.store = store
+        self.session_provider = session_provider  # la sesión MCP puede reconectarse: se pide en cada ronda
+        self.top_n = top_n
+        self.min_score = min_score
+        self.interval_s = interval_s
+        self.budget = RateBudget(rate_per_s, burst=1.0)
+        self.max_pages = max_pages
+        self.logger = logger
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, store: Optional[RepoSnapshotStore], session_provider: Callable[[], Any], logger: Callable[[str], None] = print) -> Optional["SnapshotRefresher"]:
+        if store is None:
+            return None
+        return cls(
+            store,
+            session_provider,
+            top_n=int(os.getenv("REPO_SNAPSHOT_TOP", "5")),
+            min_score=float(os.getenv("REPO_SNAPSHOT_MIN_SCORE", "2")),
+            interval_s=float(os.getenv("REPO_SNAPSHOT_INTERVAL", "120")),
+            rate_per_s=float(os.getenv("REPO_SNAPSHOT_RATE", "0.5")),
+            logger=logger,
+        )
+
+    async def _request(self) -> None:
+        # espera a que el presupuesto tenga una petición libre
+        while not self.budget.take():
+            await asyncio.sleep(1.0 / max(self.budget.rate, 1e-3))
+
+    async def sync(self, repo: str, kind: str) -> int:
+        """Fetches the items of `kind` updated since the last sync; returns how many were written."""
+        session = self.session_provider()
+        if session is None:
+            return 0
+        owner, name = repo.split("/", 1)
+        tool_name, base_args = KINDS[kind]
+        _, watermark, was_complete, covered = self.store.last_sync(repo, kind)
+        args = {"owner": owner, "repo": name, **base_args}
+        if kind == "issues" and watermark:
+            args["since"] = watermark
+
+        items, newest = [], watermark
+        # reached_end: se recorrió el listado hasta su última página; caught_up: se llegó a lo ya sincronizado
+        reached_end = caught_up = False
+        try:
+            pages = iter_pages(session, tool_name, args, self.max_pages)
+            while True:
+                await self._request()
+                page = await anext(pages, None)
+                if page is None:
+                    break
+                for item in page.items:
+                    updated = item_date(item)
+                    # ordenado por actualización: lo demás ya está en la instantánea
+                    if watermark and updated and updated <= watermark:
+                        caught_up = True
+                        break
+                    items.append(item)
+                    if updated and (newest is None or updated > newest):
+                        newest = updated
+                if not caught_up and page.next_args is None:
+                    reached_end = True
+                if caught_up or reached_end or kind == "releases":
+                    await pages.aclose()
+                    break
+        except Exception as e:
+            SNAPSHOT_SYNCS.labels(kind=kind, status="error").inc()
+            self.logger(f"[Snapshot] {repo} {kind} sync failed: {e}")
+            return 0
+
+        # un listado entero (sin since) hasta el final, o lo nuevo de una instantánea que ya estaba completa
+        complete = (reached_end and "since" not in args) or ((reached_end or caught_up) and was_complete)
+        if not complete and (covered is None or not (reached_end or caught_up)):
+            # cortado por max_pages (o sin cobertura previa): solo lo traído ahora es continuo
+            dates = [item_date(item) for item in items if item_date(item)]
+            covered = min(dates) if dates else None
+        self.store.save(repo, kind, items, newest, complete=complete, covers_since=None if complete else covered)
+        SNAPSHOT_SYNCS.labels(kind=kind, status="ok").inc()
+        SNAPSHOT_ITEMS.labels(kind=kind).inc(len(items))
+        return len(items)
+
+    async def refresh_once(self) -> Dict[str, int]:
+        written = {}
+        for repo, _ in self.store.hottest(self.top_n, self.min_score):
+            for kind in KINDS:
+                written[f"{repo}:{kind}"] = await self.sync(repo, kind)
+        if written:
+            self.logger(f"[Snapshot] Refreshed {len(written) // len(KINDS)} repositories ({sum(written.values())} items updated)")
+        return written
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                self.logger(f"[Snapshot] Refresh failed: {e}")
+            await asyncio.sleep(self.interval_s)
+
+    def start(self) -> None:
+        """Starts the refresh loop on the running event loop (once)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -1,4 +1,6 @@
-import asyncio, threading
+import asyncio, threading, time
+
+from utils import metrics
 
 class AsyncRunner:
     def __init__(self):
@@ -10,10 +12,22 @@ class AsyncRunner:
         asyncio.set_event_loop(self.loop)
         self.loop.run_forever()
 
+    async def _measured(self, coro):
+        metrics.RUNNER_INFLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            return await coro
+        except BaseException:
+            metrics.RUNNER_ERRORS.inc()
+            raise
+        finally:
+            metrics.RUNNER_INFLIGHT.dec()
+            metrics.RUNNER_LATENCY.observe(time.perf_counter() - start)
+
     def run(self, coro, timeout: float | None = None):
-        fut = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        fut = asyncio.run_coroutine_threadsafe(self._measured(coro), self.loop)
         return fut.result(timeout=timeout)
 
     def stop(self):
         self.loop.call_soon_threadsafe(self.loop.stop)
-        self.thread.join()
\ No newline at end of file
+        self.thread.join()
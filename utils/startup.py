@@ -0,0 +1,159 @@
+"""
+Concurrent cold start: independent components (MCP server, embedding model, Pinecone client,
+Ollama model load...) start at the same time, so time-to-ready approaches the slowest chain of
+dependencies instead of the sum of all steps.
+
+    startup = StartupCoordinator(logger=print)
+    startup.add("embedder", load_embedder)                       # blocking: runs on a thread
+    startup.add("mcp", agent.connect, optional=True)             # coroutine: runs as a task
+    startup.add("executor", build_executor, deps=("embedder", "mcp"))
+    results = await startup.run()
+    print(startup.format_timeline())
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import asyncio
+import inspect
+import time
+
+from utils import metrics, tracing
+
+
+STARTUP_DURATION = metrics.gauge("startup_component_duration_seconds", "Duration of each startup step.", ["component", "status"])
+STARTUP_READY = metrics.gauge("startup_ready_seconds", "Time from the start of the cold start to ready.")
+
+
+class StartupStep:
+    __slots__ = ("name", "fn", "deps", "optional", "status", "start_s", "end_s", "error")
+
+    def __init__(self, name: str, fn: Callable[[], Any], deps: Iterable[str], optional: bool):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.optional = optional
+        self.status = "pending"
+        self.start_s: Optional[float] = None
+        self.end_s: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+class StartupCoordinator:
+    """
+    Runs startup steps as soon as their dependencies finish: coroutine functions as tasks on the
+    running loop, plain functions on worker threads. A failed optional step only logs; a failed
+    required step skips its dependents and its exception is raised by run().
+    """
+
+    def __init__(self, logger: Callable[[str], None] = print):
+        self.logger = logger
+        self.steps: Dict[str, StartupStep] = {}
+        self.ready_s: Optional[float] = None
+
+    def add(self, name: str, fn: Callable[[], Any], deps: Iterable[str] = (), optional: bool = False) -> "StartupCoordinator":
+        self.steps[name] = StartupStep(name, fn, deps, optional)
+        return self
+
+    async def _run_step(self, step: StartupStep, tasks: Dict[str, asyncio.Task], t0: float) -> Any:
+        results = await asyncio.gather(*(tasks[d] for d in step.deps), return_exceptions=True)
+        failed = [d for d, r in zip(step.deps, results) if isinstance(r, BaseException) and not self.steps[d].optional]
+        if failed:
+            step.status = "skipped"
+            step.error = f"dependency failed: {', '.join(failed)}"
+            raise RuntimeError(f"{step.name} skipped: {step.error}")
+
+        step.status = "running"
+        step.start_s = time.perf_counter() - t0
+        try:
+            with tracing.span(f"startup.{step.name}"):
+                if inspect.iscoroutinefunction(step.fn):
+                    result = await step.fn()
+                else:
+                    result = await asyncio.to_thread(step.fn)
+            step.status = "ok"
+            return result
+        except Exception as e:
+            step.status = "error"
+            step.error = f"{type(e).__name__}: {e}"
+            self.logger(f"[Startup] {step.name} failed{' (optional)' if step.optional else ''}: {e}")
+            raise
+        finally:
+            step.end_s = time.perf_counter() - t0
+            STARTUP_DURATION.labels(component=step.name, status=step.status).set(step.end_s - step.start_s)
+
+    async def run(self) -> Dict[str, Any]:
+        """Runs every step; returns {name: result} (None for failed optional steps)."""
+        for step in self.steps.values():
+            missing = [d for d in step.deps if d not in self.steps]
+            if missing:
+                raise ValueError(f"Startup step {step.name} depends on unknown steps: {missing}")
+
+        t0 = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+        with tracing.span("startup"):
+            # las tareas se crean en orden de inserción: las dependencias ya registradas existen
+            for name in self._ordered():
+                tasks[name] = asyncio.ensure_future(self._run_step(self.steps[name], tasks, t0))
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+        self.ready_s = time.perf_counter() - t0
+        STARTUP_READY.set(self.ready_s)
+        self.logger(self.format_timeline())
+
+        results, first_error = {}, None
+        for name, task in tasks.items():
+            error = task.exception()
+            if error is None:
+                results[name] = task.result()
+            elif self.steps[name].optional:
+                results[name] = None
+            elif first_error is None and self.steps[name].status == "error":
+                first_error = error
+        if first_error is not None:
+            raise first_error
+        return results
+
+    def _ordered(self) -> List[str]:
+        ordered, visiting = [], set()
+
+        def visit(name: str):
+            if name in ordered:
+                return
+            if name in visiting:
+                raise ValueError(f"Startup dependency cycle at {name}")
+            visiting.add(name)
+            for dep in self.steps[name].deps:
+                visit(dep)
+            ordered.append(name)
+
+        for name in self.steps:
+            visit(name)
+        return ordered
+
+    @property
+    def timeline(self) -> List[Dict[str, Any]]:
+        rows = []
+        for step in sorted(self.steps.values(), key=lambda s: (s.start_s is None, s.start_s or 0.0)):
+            rows.append({
+                "component": step.name,
+                "status": step.status,
+                "start_s": round(step.start_s, 3) if step.start_s is not None else None,
+                "end_s": round(step.end_s, 3) if step.end_s is not None else None,
+                "duration_s": round(step.end_s - step.start_s, 3) if step.start_s is not None and step.end_s is not None else None,
+                "deps": list(step.deps),
+                **({"error": step.error} if step.error else {}),
+            })
+        return rows
+
+    def format_timeline(self, width: int = 40) -> str:
+        total = self.ready_s or max((s.end_s or 0.0 for s in self.steps.values()), default=0.0) or 1e-9
+        lines = [f"[Startup] ready in {total:.2f}s (sum of steps {self.sum_s():.2f}s)"]
+        for row in self.timeline:
+            if row["start_s"] is None:
+                lines.append(f"  {row['component']:<18} {row['status']}")
+                continue
+            begin = min(width - 1, int(row["start_s"] / total * width))
+            length = min(width - begin, max(1, int(row["duration_s"] / total * width)))
+            bar = " " * begin + "#" * length
+            lines.append(f"  {row['component']:<18} |{bar:<{width}}| {row['start_s']:6.2f}s +{row['duration_s']:.2f}s {row['status']}")
+        return "\n".join(lines)
+
+    def sum_s(self) -> float:
+        return sum((s.end_s - s.start_s) for s in self.steps.values() if s.start_s is not None and s.end_s is not None)
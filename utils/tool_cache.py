@@ -0,0 +1,257 @@
+"""
+Tool-result cache and speculative prefetch for the MCP tools.
+
+ToolResultCache keeps the processed output of successful MCP calls for a short TTL, keyed by
+tool and normalized arguments, so repeated calls (e.g. the agent re-reading a PR) skip the
+round-trip to GitHub. Listings and searches change whenever something is opened, merged or
+closed, so every tool other than `get_*` gets the much shorter MCP_CACHE_LIST_TTL.
+
+Prefetcher covers the usual follow-ups: "last PR, then summarize it" or "last open issue, then
+details" is a `list_*` call followed by a `get_*` call on the top item. When a listing returns,
+the top items are fetched in the background into the cache, and the follow-up call finds its
+result there (or awaits the fetch already in flight). The prefetch is speculative, so it has a
+budget: at most `max_concurrency` requests at once and `rate_per_s` requests per second on
+average. Items over the budget are skipped, not queued.
+
+Environment:
+    MCP_CACHE_TTL             seconds a get_* result stays valid (default 300; 0 disables the cache)
+    MCP_CACHE_LIST_TTL        seconds a listing or search result stays valid (default 30; 0 never caches them)
+    MCP_CACHE_SIZE            max cached results, LRU (default 256)
+    MCP_PREFETCH              top items prefetched per listing (default 2; 0 disables prefetch)
+    MCP_PREFETCH_CONCURRENCY  concurrent prefetch requests (default 2)
+    MCP_PREFETCH_RATE         prefetch requests per second (default 1; GitHub allows 5000/hour)
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import os
+import time
+
+from utils import metrics
+from utils.mcp_recording import normalize_args
+from utils.process_tool_output import process_tool_output
+
+
+# listado -> (herramienta de detalle, argumento con el número del elemento)
+FOLLOW_UPS: Dict[str, Tuple[str, str]] = {
+    "list_pull_requests": ("get_pull_request", "pullNumber"),
+    "list_issues": ("get_issue", "issue_number"),
+}
+
+MCP_PREFETCH = metrics.counter(
+    "mcp_prefetch_total",
+    "Speculative MCP calls by result (started, ok, error, skipped = over budget, used = served a later call).",
+    ["tool", "result"],
+)
+
+
+def cache_key(tool_name: str, args: Optional[Dict]) -> str:
+    # el agente escribe "pullNumber": "42" o 42, "Vercel" o "vercel": misma llamada
+    normalized = {}
+    for k, v in normalize_args(args).items():
+        if isinstance(v, str):
+            v = v.strip()
+            v = int(v) if v.isdigit() else v.lower() if k in ("owner", "repo") else v
+        normalized[k] = v
+    return f"{tool_name}:{json.dumps(normalized, sort_keys=True, default=str)}"
+
+
+class ToolResultCache:
+    """TTL + LRU cache of processed tool outputs, with the in-flight fetches of the prefetcher."""
+
+    def __init__(self, max_entries: int = 256, ttl_s: float = 300.0, listing_ttl_s: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.listing_ttl_s = listing_ttl_s
+        self._entries: "OrderedDict[str, Tuple[float, str, bool]]" = OrderedDict()  # key -> (expira, salida, prefetch)
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def from_env(cls) -> Optional["ToolResultCache"]:
+        ttl = float(os.getenv("MCP_CACHE_TTL", "300"))
+        if ttl <= 0:
+            return None
+        return cls(
+            max_entries=int(os.getenv("MCP_CACHE_SIZE", "256")),
+            ttl_s=ttl,
+            listing_ttl_s=float(os.getenv("MCP_CACHE_LIST_TTL", "30")),
+        )
+
+    def ttl_for(self, tool_name: str) -> float:
+        # un PR o issue concreto cambia poco; un listado cambia con cada PR abierto o cerrado
+        return self.ttl_s if tool_name.startswith("get_") else self.listing_ttl_s
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value, prefetched = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        if prefetched:
+            # solo la primera llamada que aprovecha el prefetch cuenta como "used"
+            self._entries[key] = (expires, value, False)
+            MCP_PREFETCH.labels(tool=key.split(":", 1)[0], result="used").inc()
+        return value
+
+    def has(self, key: str) -> bool:
+        """Cached (and fresh) or in flight; does not count as a use of a prefetched entry."""
+        entry = self._entries.get(key)
+        return key in self._pending or (entry is not None and entry[0] >= time.monotonic())
+
+    def get(self, tool_name: str, args: Optional[Dict]) -> Optional[str]:
+        return self._lookup(cache_key(tool_name, args))
+
+    async def aget(self, tool_name: str, args: Optional[Dict]) -> Optional[str]:
+        """Like get, but waits for a prefetch of the same call that is still in flight."""
+        key = cache_key(tool_name, args)
+        value = self._lookup(key)
+        pending = self._pending.get(key)
+        if value is None and pending is not None and pending.get_loop() is asyncio.get_running_loop():
+            await asyncio.shield(pending)
+            value = self._lookup(key)
+        metrics.cache_lookup("mcp_tool_result", value is not None)
+        return value
+
+    def put(self, tool_name: str, args: Optional[Dict], value: str, prefetched: bool = False) -> None:
+        self._store(cache_key(tool_name, args), value, prefetched)
+
+    def _store(self, key: str, value: str, prefetched: bool) -> None:
+        # los errores se devuelven como texto al agente: no se guardan
+        ttl = self.ttl_for(key.split(":", 1)[0])
+        if value.startswith("Error") or ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value, prefetched)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def begin(self, key: str) -> Optional[asyncio.Future]:
+        """Marks `key` as being fetched; None if it is already cached or in flight."""
+        if self.has(key):
+            return None
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        return future
+
+    def end(self, key: str, value: Optional[str], prefetched: bool = True) -> None:
+        if value is not None:
+            self._store(key, value, prefetched)
+        future = self._pending.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class RateBudget:
+    """Token bucket: `rate` tokens per second up to `burst`; take() never waits."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class Prefetcher:
+    """Fetches the detail of the top items of a listing in the background into a ToolResultCache."""
+
+    def __init__(
+        self,
+        cache: ToolResultCache,
+        available_tools: Optional[Set[str]] = None,
+        top_k: int = 2,
+        max_concurrency: int = 2,
+        rate_per_s: float = 1.0,
+        logger: Callable[[str], None] = print,
+    ):
+        self.cache = cache
+        self.available_tools = available_tools
+        self.top_k = top_k
+        self.max_concurrency = max_concurrency
+        self.budget = RateBudget(rate_per_s, burst=max(1.0, float(max_concurrency)))
+        self.logger = logger
+        self._tasks: Set[asyncio.Task] = set()
+
+    @classmethod
+    def from_env(cls, cache: Optional[ToolResultCache], available_tools: Optional[Set[str]] = None) -> Optional["Prefetcher"]:
+        top_k = int(os.getenv("MCP_PREFETCH", "2"))
+        if cache is None or top_k <= 0:
+            return None
+        return cls(
+            cache,
+            available_tools=available_tools,
+            top_k=top_k,
+            max_concurrency=int(os.getenv("MCP_PREFETCH_CONCURRENCY", "2")),
+            rate_per_s=float(os.getenv("MCP_PREFETCH_RATE", "1")),
+        )
+
+    def follow_ups(self, tool_name: str, args: Dict, items: List[Dict]) -> List[Tuple[str, Dict]]:
+        """(tool, args) of the detail calls for the first `top_k` items of a listing."""
+        if tool_name not in FOLLOW_UPS or not args.get("owner") or not args.get("repo"):
+            return []
+        detail_tool, number_arg = FOLLOW_UPS[tool_name]
+        if self.available_tools is not None and detail_tool not in self.available_tools:
+            return []
+        calls = []
+        for item in items[: self.top_k]:
+            number = item.get("number")
+            if isinstance(number, int):
+                calls.append((detail_tool, {"owner": args["owner"], "repo": args["repo"], number_arg: number}))
+        return calls
+
+    def after_listing(self, session, tool_name: str, args: Dict, items: List[Dict]) -> int:
+        """Schedules the follow-up fetches on the running loop; returns how many were started."""
+        started = 0
+        for detail_tool, detail_args in self.follow_ups(tool_name, args, items):
+            in_flight = sum(1 for task in self._tasks if not task.done())
+            key = cache_key(detail_tool, detail_args)
+            if self.cache.has(key):
+                continue
+            if in_flight >= self.max_concurrency or not self.budget.take():
+                MCP_PREFETCH.labels(tool=detail_tool, result="skipped").inc()
+                continue
+            self.cache.begin(key)
+            task = asyncio.get_running_loop().create_task(self._fetch(session, detail_tool, detail_args, key))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            MCP_PREFETCH.labels(tool=detail_tool, result="started").inc()
+            started += 1
+        if started:
+            self.logger(f"[Prefetch] {tool_name}: fetching {started} item(s) in the background")
+        return started
+
+    async def _fetch(self, session, tool_name: str, args: Dict, key: str) -> None:
+        value = None
+        try:
+            value = process_tool_output(tool_name, await session.call_tool(tool_name, args))
+            MCP_PREFETCH.labels(tool=tool_name, result="error" if value.startswith("Error") else "ok").inc()
+        except Exception as e:
+            MCP_PREFETCH.labels(tool=tool_name, result="error").inc()
+            self.logger(f"[Prefetch] {tool_name} failed: {e}")
+        finally:
+            self.cache.end(key, value)
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
@@ -0,0 +1,296 @@
+"""
+Lightweight tracing: nested spans over a contextvar, exported as OpenTelemetry (OTLP/JSON) traces.
+
+    from utils import tracing
+
+    with tracing.span("rag_agent", query_chars=len(query)) as s:
+        ...
+        s.set_attribute("matches", len(results))
+
+Tracing is off unless TRACE_FILE is set (one OTLP/JSON trace per line) or `tracing.enable()` is
+called. When off, `span()` returns a shared no-op span after a single flag check. `record()`
+traces a single request even then: its spans are collected in `root.trace` for the caller (the
+timing panel of app.py) and nothing global changes.
+
+    with tracing.record("query") as root:
+        ...
+    tracing.breakdown(root.trace)
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+import json
+import os
+import secrets
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status", "trace")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.trace: List["Span"] = parent.trace if parent else []
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status = "OK"
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = "ERROR"
+        self.attributes["error"] = f"{type(error).__name__}: {error}"
+
+
+class _NoopSpan:
+    trace: List[Span] = []
+    duration_ms = 0.0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+    # también hace de context manager: span() lo devuelve tal cual con el tracing desactivado
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: List[Span], service_name: str = "github-ai-assistant") -> Dict[str, Any]:
+    """OTLP/JSON ExportTraceServiceRequest for one trace (loadable by Jaeger / the OTel collector)."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "utils.tracing"},
+                "spans": [
+                    {
+                        "traceId": s.trace_id,
+                        "spanId": s.span_id,
+                        **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                        "name": s.name,
+                        "kind": 1,
+                        "startTimeUnixNano": str(s.start_ns),
+                        "endTimeUnixNano": str(s.end_ns or s.start_ns),
+                        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                        "status": {"code": 2 if s.status == "ERROR" else 1},
+                    }
+                    for s in spans
+                ],
+            }],
+        }]
+    }
+
+
+class FileExporter:
+    """Appends each finished trace as one OTLP/JSON line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        line = json.dumps(to_otlp(spans), ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class MemoryExporter:
+    """Keeps the last `max_traces` traces in memory."""
+
+    def __init__(self, max_traces: int = 50):
+        self.traces: Deque[List[Span]] = deque(maxlen=max_traces)
+
+    def export(self, spans: List[Span]) -> None:
+        self.traces.append(spans)
+
+
+class Tracer:
+    def __init__(self, exporters: Optional[List[Any]] = None):
+        self.exporters = list(exporters or [])
+        self.enabled = bool(self.exporters)
+
+    @classmethod
+    def from_env(cls, env: str = "TRACE_FILE") -> "Tracer":
+        path = os.environ.get(env)
+        return cls([FileExporter(path)] if path else [])
+
+    def add_exporter(self, exporter) -> None:
+        self.exporters.append(exporter)
+        self.enabled = True
+
+    def finish(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        if span.parent_id is None:
+            for exporter in self.exporters:
+                try:
+                    exporter.export(span.trace)
+                except Exception as e:
+                    print(f"[Tracing] Export failed: {e}")
+
+
+tracer = Tracer.from_env()
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def enable(exporter=None) -> None:
+    tracer.add_exporter(exporter or MemoryExporter())
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def _new_span(name: str, parent: Optional[Span], attributes: Dict[str, Any]) -> Span:
+    s = Span(name, parent, attributes)
+    s.trace.append(s)
+    return s
+
+
+def start_span(name: str, parent: Optional[Span] = None, **attributes: Any):
+    """Starts a span without making it current (for callbacks that end it elsewhere)."""
+    parent = parent or _current.get()
+    # dentro de un record() se traza aunque el tracer esté apagado
+    if not tracer.enabled and parent is None:
+        return NOOP_SPAN
+    return _new_span(name, parent, attributes)
+
+
+def end_span(s) -> None:
+    if s is not NOOP_SPAN:
+        tracer.finish(s)
+
+
+def span(name: str, **attributes: Any):
+    """Context manager that makes a new child of the current span current for its block."""
+    if not tracer.enabled and _current.get() is None:
+        return NOOP_SPAN
+    return _active_span(name, attributes)
+
+
+def record(name: str, **attributes: Any):
+    """Like span(), but always traced: the request's spans end up in `root.trace`."""
+    return _active_span(name, attributes)
+
+
+@contextmanager
+def _active_span(name: str, attributes: Dict[str, Any]):
+    s = _new_span(name, _current.get(), attributes)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.record_error(e)
+        raise
+    finally:
+        _current.reset(token)
+        tracer.finish(s)
+
+
+class TracingCallback(BaseCallbackHandler):
+    """One `llm` span per model call with Ollama's token counts and prefill/generation times."""
+
+    def __init__(self):
+        self._spans: Dict[Any, Any] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        # como span(): también dentro de un record() con el tracer apagado
+        if tracer.enabled or current_span() is not None:
+            self._spans[run_id] = start_span("llm", prompt_chars=sum(len(str(m.content)) for m in messages[0]))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs) -> None:
+        if tracer.enabled or current_span() is not None:
+            self._spans[run_id] = start_span("llm", prompt_chars=len(prompts[0]))
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        s = self._spans.pop(run_id, None)
+        if s is None:
+            return
+        info = (response.generations[0][0].generation_info or {}) if response.generations and response.generations[0] else {}
+        if "prompt_eval_count" in info or "eval_count" in info:
+            s.set_attributes(
+                prompt_tokens=info.get("prompt_eval_count", 0),
+                completion_tokens=info.get("eval_count", 0),
+                prompt_eval_ms=info.get("prompt_eval_duration", 0) / 1e6,
+                eval_ms=info.get("eval_duration", 0) / 1e6,
+                load_ms=info.get("load_duration", 0) / 1e6,
+            )
+        end_span(s)
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        s = self._spans.pop(run_id, None)
+        if s is not None:
+            s.record_error(error)
+            end_span(s)
+
+
+def breakdown(spans: List[Span]) -> List[Dict[str, Any]]:
+    """
+    Per-stage rows of a trace in start order: depth, total and self time (total minus children),
+    and the attributes. Self times add up to the root duration.
+    """
+    children: Dict[Optional[str], List[Span]] = {}
+    for s in spans:
+        children.setdefault(s.parent_id, []).append(s)
+
+    rows = []
+
+    def visit(s: Span, depth: int):
+        child_ms = sum(c.duration_ms for c in children.get(s.span_id, []))
+        rows.append({
+            "stage": s.name,
+            "depth": depth,
+            "total_ms": round(s.duration_ms, 1),
+            "self_ms": round(max(0.0, s.duration_ms - child_ms), 1),
+            "attributes": dict(s.attributes),
+        })
+        for c in sorted(children.get(s.span_id, []), key=lambda c: c.start_ns):
+            visit(c, depth + 1)
+
+    for root in children.get(None, []):
+        visit(root, 0)
+    return rows
+
+
+def totals_by_stage(spans: List[Span]) -> Dict[str, float]:
+    """Self time summed per span name, e.g. {"llm": 31000.0, "mcp.call": 2400.0, ...}."""
+    totals: Dict[str, float] = {}
+    for row in breakdown(spans):
+        totals[row["stage"]] = totals.get(row["stage"], 0.0) + row["self_ms"]
+    return dict(sorted(totals.items(), key=lambda kv: -kv[1]))